@@ -0,0 +1,202 @@
+"""Offline benchmarks for /whoami and /register.
+
+    python -m bench --label my-branch --iterations 50
+    python -m bench --label my-branch --compare bench/results/main.json
+
+Starts the fake FFLogs server, points the bot's FFLogs client at it, drives
+the cog callbacks with fake interactions and writes p50/p95/p99 latency and
+request counts per scenario to bench/results/<label>.json.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from typing import Awaitable, Callable, Dict, List
+
+from bench.fake_fflogs import FakeFFLogs
+from bench.harness import FakeInteraction, percentile
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def git_version() -> str:
+    try:
+        return subprocess.check_output(["git", "describe", "--always", "--dirty"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def configure_environment(url: str, data_dir: str):
+    # Must run before any fflogs/storage module is imported
+    os.environ["FFLOGS_API_URL"] = f"{url}/api/v2/client"
+    os.environ["FFLOGS_TOKEN_URL"] = f"{url}/oauth/token"
+    os.environ.setdefault("FFLOGS_CLIENT_ID", "bench")
+    os.environ.setdefault("FFLOGS_CLIENT_SECRET", "bench")
+    os.environ.setdefault("GUILD_ID", "1")
+    os.environ["FFLOGS_VALIDATE_QUERIES"] = "0"
+    os.environ["PARSE_CACHE_SIZE"] = "100000"
+    # Fixture characters must never land in the real data/parse_history.*
+    os.environ["PARSE_HISTORY_FILE"] = os.path.join(data_dir, "parse_history.bin")
+
+    from fflogs.auth import token_provider
+    from fflogs.cache import parse_cache
+    from storage.users import users
+
+    token_provider.token_file = os.path.join(data_dir, "fflogs_token.json")
+    parse_cache.snapshot_file = os.path.join(data_dir, "parse_cache.json")
+    users.db_path = os.path.join(data_dir, "users.db")
+    users.json_path = os.path.join(data_dir, "users.json")
+
+
+async def measure(name: str, iterations: int, concurrency: int, make_call: Callable[[int], Awaitable[FakeInteraction]], server: FakeFFLogs) -> dict:
+    before = dict(server.requests)
+    latencies: List[float] = []
+    first_response: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal failures
+        async with semaphore:
+            interaction = await make_call(i)
+        latencies.append(interaction.events[-1][1] if interaction.events else 0.0)
+        first = next((t for kind, t, _ in interaction.events if kind != "defer"), None)
+        if first is not None:
+            first_response.append(first)
+        failures += interaction.failed
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    wall = time.perf_counter() - start
+
+    requests = {k: v - before.get(k, 0) for k, v in server.requests.items() if v - before.get(k, 0)}
+    result = {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "failures": failures,
+        "wall_seconds": round(wall, 4),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        # Time until the user saw an answer; p50-p99 above are until the command finished (streamed edits included)
+        "first_response_p50": percentile(first_response, 0.50),
+        "first_response_p95": percentile(first_response, 0.95),
+        "first_response_p99": percentile(first_response, 0.99),
+        "requests": requests,
+        "requests_per_call": {k: round(v / iterations, 2) for k, v in requests.items()},
+    }
+    print(f"{name:<22} p50 {result['p50'] * 1000:7.1f}ms  p95 {result['p95'] * 1000:7.1f}ms  "
+          f"p99 {result['p99'] * 1000:7.1f}ms  first p95 {result['first_response_p95'] * 1000:7.1f}ms  graphql/call {result['requests_per_call'].get('graphql', 0):.2f}  failures {failures}")
+    return result
+
+
+async def run(args) -> dict:
+    server = FakeFFLogs(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    url = await server.start()
+    data_dir = tempfile.mkdtemp(prefix="static-bot-bench-")
+    configure_environment(url, data_dir)
+
+    from fflogs import client as fflogs
+    from fflogs.cache import parse_cache
+    from commands.whoami.whoami import WhoAmI
+    from commands.register.register import Register
+
+    whoami_cog = WhoAmI(None)
+    register_cog = Register(None)
+    characters = list(server.fixtures["characters"].values())
+    rng = random.Random(args.seed)
+    scenarios: Dict[str, dict] = {}
+
+    async def register_by_id(i: int) -> FakeInteraction:
+        character = characters[i % len(characters)]
+        interaction = FakeInteraction(1000 + i, "register")
+        link = f"https://www.fflogs.com/character/id/{character['id']}"
+        await register_cog.register.callback(register_cog, interaction, job="Black Mage", fflogs_link=link)
+        return interaction
+
+    async def register_by_name(i: int) -> FakeInteraction:
+        character = characters[i % len(characters)]
+        interaction = FakeInteraction(1000 + i, "register")
+        link = f"https://www.fflogs.com/character/{character['region'].lower()}/{character['server_slug']}/{character['name'].replace(' ', '%20')}"
+        await register_cog.register.callback(register_cog, interaction, job="Black Mage", fflogs_link=link)
+        return interaction
+
+    def whoami(clear_cache: bool):
+        async def call(i: int) -> FakeInteraction:
+            user = 1000 + rng.randrange(min(args.iterations, len(characters)))
+            if clear_cache:
+                parse_cache.invalidate(characters[(user - 1000) % len(characters)]["id"])
+            interaction = FakeInteraction(user, "whoami")
+            await whoami_cog.whoami.callback(whoami_cog, interaction)
+            return interaction
+        return call
+
+    try:
+        scenarios["register_by_id"] = await measure("register_by_id", args.iterations, args.concurrency, register_by_id, server)
+        scenarios["register_by_name"] = await measure("register_by_name", args.iterations, args.concurrency, register_by_name, server)
+        scenarios["whoami_cold"] = await measure("whoami_cold", args.iterations, 1, whoami(clear_cache=True), server)
+        scenarios["whoami_warm"] = await measure("whoami_warm", args.iterations, 1, whoami(clear_cache=False), server)
+        scenarios["whoami_concurrent"] = await measure("whoami_concurrent", args.iterations, args.concurrency, whoami(clear_cache=True), server)
+    finally:
+        await fflogs.close_session()
+        await server.stop()
+
+    return {
+        "label": args.label,
+        "version": git_version(),
+        "timestamp": int(time.time()),
+        "config": {k: getattr(args, k) for k in ("iterations", "concurrency", "latency", "jitter", "error_rate", "seed")},
+        "scenarios": scenarios,
+    }
+
+
+def compare(results: dict, baseline_path: str, max_regression: float) -> bool:
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    ok = True
+    print(f"\nCompared with {baseline.get('label')} ({baseline.get('version')}):")
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for key, label in (("p95", "p95"), ("first_response_p95", "first p95")):
+            if not previous.get(key) or not current.get(key):
+                continue
+            change = current[key] / previous[key] - 1
+            flag = "REGRESSION" if change > max_regression else ""
+            ok = ok and not flag
+            print(f"  {name:<22} {label:<9} {previous[key] * 1000:7.1f}ms -> {current[key] * 1000:7.1f}ms ({change:+.0%}) {flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bot's commands against a local fake FFLogs.")
+    parser.add_argument("--label", default=git_version(), help="Name for this run; results go to bench/results/<label>.json")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake FFLogs response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of GraphQL requests answered with a 502")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", help="Baseline results JSON to compare p95 against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 slowdown before --compare fails")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{args.label}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {path}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
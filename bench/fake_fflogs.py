@@ -0,0 +1,171 @@
+"""A local stand-in for the FFLogs OAuth and GraphQL endpoints.
+
+Queries are parsed with graphql-core and resolved against fixture data, so
+aliases, batched characters and variables behave like the real API. Latency
+and errors can be injected to see how the bot copes with a slow or flaky
+FFLogs.
+"""
+import random
+import asyncio
+from collections import Counter
+from typing import Optional
+from aiohttp import web
+from graphql import parse, FieldNode, VariableNode, IntValueNode, StringValueNode
+
+from bench.fixtures import load_fixtures
+
+
+class FakeFFLogs:
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fixtures = load_fixtures()
+        self.requests = Counter()
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/oauth/token", self._token)
+        app.router.add_post("/api/v2/client", self._graphql)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay(self):
+        await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter)))
+
+    async def _token(self, request: web.Request) -> web.Response:
+        self.requests["oauth_token"] += 1
+        await self._delay()
+        return web.json_response({"access_token": "bench-token", "token_type": "Bearer", "expires_in": 3600})
+
+    async def _graphql(self, request: web.Request) -> web.Response:
+        self.requests["graphql"] += 1
+        await self._delay()
+        if request.headers.get("Authorization") != "Bearer bench-token":
+            return web.json_response({"error": "Unauthenticated."}, status=401)
+        if self._random.random() < self.error_rate:
+            self.requests["injected_errors"] += 1
+            return web.json_response({"error": "Injected failure"}, status=502)
+
+        body = await request.json()
+        variables = body.get("variables") or {}
+        document = parse(body["query"])
+        data, errors = {}, []
+        for definition in document.definitions:
+            for field in definition.selection_set.selections:
+                data[self._key(field)] = self._resolve_root(field, variables, errors)
+
+        payload = {"data": data}
+        if errors:
+            payload["errors"] = errors
+        return web.json_response(payload)
+
+    @staticmethod
+    def _key(field: FieldNode) -> str:
+        return field.alias.value if field.alias else field.name.value
+
+    @staticmethod
+    def _args(field: FieldNode, variables: dict) -> dict:
+        args = {}
+        for arg in field.arguments:
+            value = arg.value
+            if isinstance(value, VariableNode):
+                args[arg.name.value] = variables.get(value.name.value)
+            elif isinstance(value, IntValueNode):
+                args[arg.name.value] = int(value.value)
+            elif isinstance(value, StringValueNode):
+                args[arg.name.value] = value.value
+        return args
+
+    def _resolve_root(self, field: FieldNode, variables: dict, errors: list):
+        name = field.name.value
+        if name == "rateLimitData":
+            self.requests["rate_limit"] += 1
+            return {"limitPerHour": 18000, "pointsSpentThisHour": float(self.requests["graphql"]), "pointsResetIn": 3600}
+        if name != "characterData":
+            errors.append({"message": f"Unknown field {name}", "path": [self._key(field)]})
+            return None
+
+        result = {}
+        for character_field in field.selection_set.selections:
+            key = self._key(character_field)
+            args = self._args(character_field, variables)
+            character = self._find_character(args)
+            if character is None:
+                result[key] = None
+                continue
+            result[key] = self._resolve_character(character, character_field, variables)
+        return result
+
+    def _find_character(self, args: dict) -> Optional[dict]:
+        characters = self.fixtures["characters"]
+        if "id" in args:
+            self.requests["character_by_id"] += 1
+            return characters.get(str(args["id"]))
+        self.requests["character_by_name"] += 1
+        for character in characters.values():
+            if (character["name"].lower() == str(args.get("name", "")).lower()
+                    and character["server_slug"] == str(args.get("serverSlug", "")).lower()
+                    and character["region"] == str(args.get("serverRegion", "")).upper()):
+                return character
+        return None
+
+    def _resolve_character(self, character: dict, field: FieldNode, variables: dict) -> dict:
+        result = {}
+        for sub in field.selection_set.selections:
+            key = self._key(sub)
+            name = sub.name.value
+            if name == "id":
+                result[key] = character["id"]
+            elif name == "name":
+                result[key] = character["name"]
+            elif name == "server":
+                result[key] = {"name": character["server"]}
+            elif name == "zoneRankings":
+                self.requests["zone_rankings"] += 1
+                zone_id = self._args(sub, variables).get("zoneID")
+                result[key] = self._zone_rankings(character, zone_id)
+        return result
+
+    def _zone_rankings(self, character: dict, zone_id: Optional[int]) -> dict:
+        zone_key = str(zone_id) if zone_id is not None else "latest"
+        encounters = self.fixtures["zones"].get(zone_key)
+        if encounters is None:
+            return {"error": "Invalid zone specified"}
+        rankings = []
+        for encounter in encounters:
+            parse_data = character["parses"].get(str(encounter["id"]))
+            rankings.append({
+                "encounter": {"id": encounter["id"], "name": encounter["name"]},
+                "rankPercent": parse_data["percentile"] if parse_data else None,
+                "spec": parse_data["spec"] if parse_data else None,
+                "totalKills": parse_data["kills"] if parse_data else 0,
+            })
+        return {"zone": zone_id, "rankings": rankings}
+
+
+async def serve_forever(port: int = 8765, **kwargs):
+    server = FakeFFLogs(**kwargs)
+    url = await server.start(port=port)
+    print(f"Fake FFLogs listening on {url} (set FFLOGS_API_URL={url}/api/v2/client FFLOGS_TOKEN_URL={url}/oauth/token)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve_forever())
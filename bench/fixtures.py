@@ -0,0 +1,67 @@
+"""Fixture data for the fake FFLogs server.
+
+Regenerate bench/fixtures/fflogs.json (e.g. after the encounter catalog
+changes) with::
+
+    python -m bench.fixtures
+"""
+import os
+import json
+import random
+
+FIXTURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fflogs.json")
+
+CHARACTER_COUNT = 60
+FIRST_CHARACTER_ID = 10000
+SPECS = ["BlackMage", "WhiteMage", "Paladin", "Dragoon", "Samurai", "Bard", "Sage", "Warrior"]
+
+
+def build_fixtures(seed: int = 14) -> dict:
+    from fflogs.catalog import get_catalog
+
+    catalog = get_catalog()
+    rng = random.Random(seed)
+    names = catalog.encounter_names
+
+    zones = {}
+    for zone_id, encounter_ids in catalog.encounters_by_zone.items():
+        key = str(zone_id) if zone_id is not None else "latest"
+        zones[key] = [{"id": eid, "name": names.get(eid, f"Encounter {eid}")} for eid in encounter_ids]
+
+    characters = {}
+    for i in range(CHARACTER_COUNT):
+        character_id = FIRST_CHARACTER_ID + i
+        parses = {}
+        for encounter_ids in catalog.encounters_by_zone.values():
+            for eid in encounter_ids:
+                # Roughly a third of characters haven't cleared any given fight
+                if rng.random() < 0.35:
+                    continue
+                parses[str(eid)] = {
+                    "percentile": round(rng.uniform(1, 100), 1),
+                    "spec": rng.choice(SPECS),
+                    "kills": rng.randint(1, 40),
+                }
+        characters[str(character_id)] = {
+            "id": character_id,
+            "name": f"Bench Raider{i:02d}",
+            "server": "Twintania",
+            "server_slug": "twintania",
+            "region": "EU",
+            "parses": parses,
+        }
+
+    return {"zones": zones, "characters": characters}
+
+
+def load_fixtures() -> dict:
+    with open(FIXTURES_FILE, "r") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    fixtures = build_fixtures()
+    os.makedirs(os.path.dirname(FIXTURES_FILE), exist_ok=True)
+    with open(FIXTURES_FILE, "w") as f:
+        json.dump(fixtures, f, separators=(",", ":"))
+    print(f"Wrote {len(fixtures['characters'])} characters across {len(fixtures['zones'])} zones to {FIXTURES_FILE}")
@@ -0,0 +1,74 @@
+"""Drives the cog coroutines with fake interactions against the fake FFLogs."""
+import time
+import random
+from types import SimpleNamespace
+from typing import List, Optional
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+        self._interaction.record("defer")
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self._interaction.record("send_message", content=content, **kwargs)
+
+    async def edit_message(self, **kwargs):
+        self._done = True
+        self._interaction.record("edit_message", **kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self._interaction.record("followup", content=content, **kwargs)
+        return SimpleNamespace(id=random.getrandbits(63), edit=self._edit)
+
+    async def _edit(self, **kwargs):
+        self._interaction.record("followup_edit", **kwargs)
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the cogs' slash command callbacks."""
+
+    def __init__(self, user_id: int, command_name: str, guild_id: int = 1):
+        self.started_at = time.perf_counter()
+        self.user = SimpleNamespace(id=user_id, display_name=f"user{user_id}", mention=f"<@{user_id}>")
+        self.guild_id = guild_id
+        self.command = SimpleNamespace(qualified_name=command_name)
+        self.extras = {"started_at": self.started_at}
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.events: List[tuple] = []
+
+    def record(self, kind: str, **kwargs):
+        self.events.append((kind, time.perf_counter() - self.started_at, kwargs))
+
+    async def edit_original_response(self, **kwargs):
+        self.record("edit_original_response", **kwargs)
+
+    def first(self, kind: str) -> Optional[float]:
+        return next((t for k, t, _ in self.events if k == kind), None)
+
+    @property
+    def failed(self) -> bool:
+        return any("❌" in str(kwargs.get("content") or "") for _, _, kwargs in self.events)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q * len(ordered) + 0.5)) - 1))
+    return ordered[index]
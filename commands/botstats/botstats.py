@@ -0,0 +1,70 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from monitoring.metrics import metrics, format_ms
+from handlers.guilds import add_guild_command
+
+
+def _summarise(name: str, label: str) -> str:
+    lines = []
+    for labels, hist in sorted(metrics.series(name).items()):
+        key = dict(labels).get(label, "?")
+        lines.append(f"`{key}` p50 {format_ms(hist.quantile(0.5))} · p95 {format_ms(hist.quantile(0.95))} · n={hist.count}")
+    return "\n".join(lines) or "No data yet"
+
+
+def _counter_total(name: str) -> float:
+    return sum(metrics.counters.get(name, {}).values())
+
+
+class BotStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="botstats", description="Show bot latency, FFLogs and cache statistics.")
+    @app_commands.default_permissions(administrator=True)
+    async def botstats(self, interaction: discord.Interaction):
+        embed = discord.Embed(title="📊 Bot Stats", color=discord.Color.dark_teal())
+
+        embed.add_field(name="Time to defer", value=_summarise("command_defer_seconds", "command"), inline=False)
+        embed.add_field(name="Time to followup", value=_summarise("command_followup_seconds", "command"), inline=False)
+        embed.add_field(name="Time to finish", value=_summarise("command_completed_seconds", "command"), inline=False)
+        embed.add_field(name="FFLogs requests", value=_summarise("fflogs_request_seconds", "operation"), inline=False)
+        embed.add_field(name="FFLogs by zone", value=_summarise("fflogs_zone_seconds", "zone"), inline=False)
+
+        zone_errors = metrics.counters.get("fflogs_zone_errors_total", {})
+        errors = ", ".join(f"`{dict(labels)['zone']}`: {int(n)}" for labels, n in sorted(zone_errors.items()))
+        embed.add_field(name="FFLogs zone errors", value=errors or "None", inline=False)
+
+        cache_lines = []
+        for name, read in sorted(metrics.gauges.items()):
+            values = {dict(labels).get("kind"): value for labels, value in read().items()}
+            if "hit_ratio" in values:
+                cache_lines.append(f"`{name}` {values['hit_ratio']:.0%} hits ({int(values.get('entries', 0))} entries)")
+        embed.add_field(name="Cache hit ratio", value="\n".join(cache_lines) or "No data yet", inline=False)
+
+        budget = {dict(labels).get("kind"): value for labels, value in metrics.gauges["fflogs_budget"]().items()} if "fflogs_budget" in metrics.gauges else {}
+        if budget.get("limit"):
+            queued = int(budget["queued"])
+            embed.add_field(
+                name="FFLogs API budget",
+                value=f"{budget['remaining']:.0f}/{budget['limit']:.0f} points left, resets in {budget['reset_in'] / 60:.0f}m · {queued} queued",
+                inline=False
+            )
+
+        waits = sum(h.sum for h in metrics.series("discord_ratelimit_wait_seconds").values())
+        count = sum(h.count for h in metrics.series("discord_ratelimit_wait_seconds").values())
+        embed.add_field(name="Discord rate limits", value=f"{count} wait(s), {waits:.1f}s total", inline=False)
+
+        failures = int(_counter_total("command_failures_total"))
+        embed.set_footer(text=f"Unhandled command failures: {failures}")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def cog_load(self):
+        add_guild_command(self.bot, self.botstats)
+
+
+async def setup(bot):
+    await bot.add_cog(BotStats(bot))
@@ -0,0 +1,50 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from monitoring.metrics import metrics, format_ms
+from monitoring.stalls import stall_detector
+from handlers.guilds import add_guild_command
+
+
+class Diagnostics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="diagnostics", description="Show event loop stalls and the code that caused them.")
+    @app_commands.default_permissions(administrator=True)
+    async def diagnostics(self, interaction: discord.Interaction):
+        embed = discord.Embed(title="🩺 Diagnostics", color=discord.Color.dark_red())
+
+        lag = metrics.series("event_loop_lag_seconds").get(())
+        if not stall_detector.running:
+            embed.description = "Stall detector is off (LOOP_STALL_THRESHOLD=0)."
+        elif lag is not None:
+            embed.description = (
+                f"Loop lag p50 {format_ms(lag.quantile(0.5))} · p99 {format_ms(lag.quantile(0.99))} · "
+                f"worst {stall_detector.max_lag:.2f}s · threshold {format_ms(stall_detector.threshold)}"
+            )
+
+        sites = stall_detector.top(8)
+        for site in sites:
+            chain = " → ".join(f"`{frame}`" for frame in site.chain[-3:]) or "–"
+            embed.add_field(
+                name=f"{site.location}"[:256],
+                value=(
+                    f"{site.count} stall(s), {site.total:.1f}s total, worst {site.max:.2f}s\n"
+                    f"Inside `{site.blocking}`\nVia {chain}"
+                )[:1024],
+                inline=False
+            )
+        if not sites:
+            embed.add_field(name="Stalls", value="None recorded 🎉", inline=False)
+
+        embed.set_footer(text="Worst call sites first; move these off the event loop.")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def cog_load(self):
+        add_guild_command(self.bot, self.diagnostics)
+
+
+async def setup(bot):
+    await bot.add_cog(Diagnostics(bot))
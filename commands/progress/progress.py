@@ -0,0 +1,142 @@
+import time
+import discord
+from discord import app_commands
+from discord.ext import commands
+from typing import Dict, List, Optional, Tuple
+
+from fflogs.client import get_parses_for_fights
+from fflogs.catalog import get_catalog, DisplayGroup
+from storage.history import parse_history, Snapshot
+from storage.users import users
+from monitoring.commands import mark_deferred
+from handlers.guilds import add_guild_command
+
+SPARK = "▁▂▃▄▅▆▇█"
+SPARK_POINTS = 16
+
+GroupValue = Tuple[Optional[float], int]
+
+
+def group_value(states: Dict[int, Snapshot]) -> GroupValue:
+    """Best percentile and total kills across a display group's encounters."""
+    percentiles = [s.percentile for s in states.values() if s.percentile is not None]
+    return (max(percentiles) if percentiles else None), sum(s.kills for s in states.values())
+
+
+def sparkline(values: List[float]) -> str:
+    values = values[-SPARK_POINTS:]
+    return "".join(SPARK[min(int(value / 100 * len(SPARK)), len(SPARK) - 1)] for value in values)
+
+
+def format_group(group: DisplayGroup, baseline: Dict[int, Snapshot], snapshots: List[Snapshot]) -> Optional[str]:
+    eids = set(group.encounter_ids)
+    states = {eid: snap for eid, snap in baseline.items() if eid in eids}
+    start = group_value(states)
+    series = [start]
+    last_change = None
+    for snap in snapshots:
+        if snap.encounter_id not in eids:
+            continue
+        states[snap.encounter_id] = snap
+        if snap.timestamp == last_change:
+            # One fetch changing several encounters is one step, not several
+            series[-1] = group_value(states)
+        else:
+            series.append(group_value(states))
+        last_change = snap.timestamp
+    if not states:
+        return None
+
+    (start_pct, start_kills), (end_pct, end_kills) = series[0], series[-1]
+    if end_pct is None:
+        line = "No ranked parse"
+    elif start_pct is None:
+        line = f"**{int(end_pct)}** (new)"
+    else:
+        delta = int(end_pct) - int(start_pct)
+        line = f"{int(start_pct)} → **{int(end_pct)}** ({delta:+d})"
+
+    line += f" · {end_kills} kill(s)"
+    if end_kills > start_kills and start_kills:
+        line += f" (+{end_kills - start_kills})"
+    percentiles = [pct for pct, _ in series if pct is not None]
+    if len(percentiles) > 1:
+        line += f"\n{sparkline(percentiles)}"
+    if last_change is not None:
+        line += f" · changed <t:{last_change}:R>"
+    return line
+
+
+class Progress(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="progress", description="See how your parses have changed over time.")
+    @app_commands.describe(
+        section="Which fights to show (default: the current savage tier)",
+        days="How far back to look",
+        member="Someone else's progress (default: yours)"
+    )
+    async def progress(
+        self,
+        interaction: discord.Interaction,
+        section: Optional[str] = None,
+        days: app_commands.Range[int, 1, 365] = 30,
+        member: Optional[discord.Member] = None
+    ):
+        await interaction.response.defer(thinking=True)
+        mark_deferred(interaction)
+
+        target = member or interaction.user
+        user_data = users.guild(interaction.guild_id).get(str(target.id))
+        if user_data is None:
+            who = "You're" if member is None else f"{target.display_name} is"
+            await interaction.followup.send(f"❌ {who} not registered yet. Please use `/register` first.")
+            return
+
+        catalog = get_catalog()
+        try:
+            shown = catalog.section(section) if section else catalog.sections[0]
+        except KeyError:
+            await interaction.followup.send(f"❌ Unknown section `{section}`.")
+            return
+        character_id = user_data["character_id"]
+
+        try:
+            # Same path as /whoami, so anything new since the last fetch lands in the history first
+            await get_parses_for_fights(character_id, zone_ids=catalog.zones_for(shown.encounter_ids))
+        except Exception as e:
+            print(f"[ERROR] Failed to refresh parses before /progress: {e}")
+
+        since = int(time.time()) - days * 86400
+        baseline = await parse_history.latest_before(character_id, since, shown.encounter_ids)
+        snapshots = await parse_history.query(character_id, since=since, encounter_ids=shown.encounter_ids)
+
+        embed = discord.Embed(
+            title=f"📈 {user_data['character_name']} — {shown.label}",
+            color=discord.Color.green()
+        )
+        for group in shown.groups:
+            value = format_group(group, baseline, snapshots)
+            if value is not None:
+                embed.add_field(name=group.name, value=value[:1024], inline=False)
+
+        if not embed.fields:
+            embed.description = "No history yet. Parses are recorded every time they're fetched from FFLogs."
+        embed.set_footer(text=f"Last {days} day(s) · {len(snapshots)} change(s) recorded")
+        await interaction.followup.send(embed=embed)
+
+    @progress.autocomplete("section")
+    async def section_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=section.label, value=section.key)
+            for section in get_catalog().sections
+            if current.lower() in section.label.lower()
+        ][:25]
+
+    async def cog_load(self):
+        add_guild_command(self.bot, self.progress)
+
+
+async def setup(bot):
+    await bot.add_cog(Progress(bot))
@@ -0,0 +1,209 @@
+"""Bulk member import: many /register rows at once, from a CSV.
+
+Each row is ``discord_id, job, fflogs_link`` (a header row and ``#`` comments
+are skipped; ``<@123>`` mentions work as IDs)::
+
+    discord_id,job,fflogs
+    123456789012345678,Black Mage,https://www.fflogs.com/character/eu/twintania/Some%20One
+
+Admins upload it with /import_members, or run it from a shell::
+
+    python -m commands.register.bulk members.csv --guild 123 [--dry-run]
+
+Every row is validated before anything is looked up, characters are
+resolved many per aliased FFLogs query, and all successful rows are saved
+in one transaction.
+"""
+import os
+import io
+import csv
+import asyncio
+import argparse
+from typing import Dict, List, Optional
+import discord
+from discord import app_commands
+from discord.ext import commands
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from fflogs import client as fflogs
+from fflogs.budget import priority, BULK
+from fflogs.utils import parse_character_link, CharacterRef
+from storage.users import users
+from monitoring.commands import mark_deferred
+from handlers.guilds import add_guild_command, get_guild_config
+
+# Characters per aliased lookup query, and lookups in flight at once
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "25"))
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "3"))
+MAX_IMPORT_ROWS = 500
+
+HEADER_NAMES = {"discord_id", "discord", "user", "user_id", "id"}
+
+
+class ImportRow:
+    def __init__(self, line: int, discord_id: str, job: str, link: str):
+        self.line = line
+        self.discord_id = discord_id
+        self.job = job
+        self.link = link
+        self.ref: Optional[CharacterRef] = None
+        self.record: Optional[dict] = None
+        self.error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.record is not None
+
+
+def parse_rows(text: str) -> List[ImportRow]:
+    """Parse and validate every row up front; invalid rows carry an ``error``."""
+    rows: List[ImportRow] = []
+    seen: Dict[str, int] = {}
+    for line, cells in enumerate(csv.reader(io.StringIO(text)), start=1):
+        cells = [cell.strip() for cell in cells]
+        if not any(cells) or cells[0].startswith("#"):
+            continue
+        if not rows and cells[0].lower() in HEADER_NAMES:
+            continue
+
+        cells += [""] * (3 - len(cells))
+        discord_id = cells[0].removeprefix("<@").removeprefix("!").removesuffix(">")
+        row = ImportRow(line, discord_id, cells[1], cells[2])
+        rows.append(row)
+
+        if not discord_id.isdigit():
+            row.error = f"'{cells[0]}' isn't a Discord user ID"
+        elif not row.job:
+            row.error = "Missing job"
+        elif discord_id in seen:
+            row.error = f"Duplicate of line {seen[discord_id]}"
+        else:
+            try:
+                row.ref = parse_character_link(row.link)
+            except ValueError as e:
+                row.error = str(e)
+        seen.setdefault(discord_id, line)
+    return rows
+
+
+async def resolve_rows(rows: List[ImportRow], batch_size: int = IMPORT_BATCH_SIZE, concurrency: int = IMPORT_CONCURRENCY):
+    """Fill in each valid row's record, several characters per FFLogs query."""
+    pending = [row for row in rows if row.error is None]
+    # Several members may point at the same character; look each one up once
+    refs: List[CharacterRef] = list(dict.fromkeys(row.ref for row in pending))
+    resolved: Dict[CharacterRef, tuple] = {}
+    failures: Dict[CharacterRef, str] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def lookup(batch: List[CharacterRef]):
+        async with semaphore:
+            try:
+                found, errors = await fflogs.resolve_characters(batch)
+            except Exception as e:
+                print(f"[ERROR] Character lookup batch failed: {e}")
+                for ref in batch:
+                    failures[ref] = f"FFLogs lookup failed: {e}"
+                return
+            for index, character in found.items():
+                resolved[batch[index]] = character
+            for index, message in errors.items():
+                failures[batch[index]] = message
+
+    with priority(BULK):
+        await asyncio.gather(*(lookup(refs[i:i + batch_size]) for i in range(0, len(refs), batch_size)))
+
+    for row in pending:
+        if row.ref in resolved:
+            character_id, name, server = resolved[row.ref]
+            row.record = {
+                "character_name": name,
+                "server": server,
+                "job": row.job,
+                "fflogs": row.link,
+                "character_id": character_id
+            }
+        else:
+            row.error = failures.get(row.ref, "Character not found")
+
+
+async def import_rows(guild_id, text: str, dry_run: bool = False) -> List[ImportRow]:
+    rows = parse_rows(text)
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f"Too many rows ({len(rows)}); import at most {MAX_IMPORT_ROWS} at a time.")
+    await resolve_rows(rows)
+
+    records = {row.discord_id: row.record for row in rows if row.ok}
+    if records and not dry_run:
+        # One transaction: either every resolved member is saved or none are
+        await asyncio.to_thread(users.guild(guild_id).upsert_many, records)
+        print(f"[DEBUG] Imported {len(records)} member(s) into guild {guild_id}")
+    return rows
+
+
+def format_report(rows: List[ImportRow]) -> str:
+    lines = []
+    for row in rows:
+        if row.ok:
+            lines.append(f"line {row.line}: OK {row.discord_id} -> {row.record['character_name']} ({row.record['server']}) as {row.job}")
+        else:
+            lines.append(f"line {row.line}: FAILED {row.discord_id or '?'}: {row.error}")
+    return "\n".join(lines)
+
+
+class ImportMembers(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="import_members", description="Register many members at once from a CSV of discord_id, job, FFLogs link.")
+    @app_commands.describe(file="CSV with one member per row: discord_id, job, fflogs_link", dry_run="Check and look up the rows without saving anything")
+    @app_commands.default_permissions(administrator=True)
+    async def import_members(self, interaction: discord.Interaction, file: discord.Attachment, dry_run: bool = False):
+        await interaction.response.defer(thinking=True, ephemeral=True)
+        mark_deferred(interaction)
+
+        try:
+            text = (await file.read()).decode("utf-8-sig")
+            rows = await import_rows(interaction.guild_id, text, dry_run=dry_run)
+        except Exception as e:
+            print(f"[ERROR] Member import failed: {e}")
+            await interaction.followup.send(f"❌ Import failed: {e}", ephemeral=True)
+            return
+
+        imported = sum(1 for row in rows if row.ok)
+        failed = len(rows) - imported
+        verb = "Would import" if dry_run else "Imported"
+        summary = f"{'🧪' if dry_run else '✅'} {verb} **{imported}** member(s); **{failed}** row(s) failed."
+        report = discord.File(io.BytesIO(format_report(rows).encode()), filename="import_report.txt")
+        await interaction.followup.send(summary, file=report, ephemeral=True)
+
+    async def cog_load(self):
+        add_guild_command(self.bot, self.import_members)
+
+
+async def setup(bot):
+    await bot.add_cog(ImportMembers(bot))
+
+
+async def _main(args):
+    with open(args.csv, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    try:
+        rows = await import_rows(args.guild, text, dry_run=args.dry_run)
+    finally:
+        await fflogs.close_session()
+    print(format_report(rows))
+    imported = sum(1 for row in rows if row.ok)
+    print(f"\n{'Would import' if args.dry_run else 'Imported'} {imported} member(s); {len(rows) - imported} row(s) failed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Register many members at once from a CSV.")
+    parser.add_argument("csv", help="CSV of discord_id, job, fflogs_link rows")
+    parser.add_argument("--guild", type=int, default=None, help="Guild to import into (default: the first configured guild)")
+    parser.add_argument("--dry-run", action="store_true", help="Check and look up the rows without saving anything")
+    args = parser.parse_args()
+    if args.guild is None:
+        args.guild = get_guild_config().default_guild_id
+    asyncio.run(_main(args))
@@ -0,0 +1,134 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from typing import Dict, List, Optional
+
+from fflogs.bulk import stream_parses
+from fflogs.catalog import get_catalog, Section
+from storage.users import users
+from handlers.edits import MessageEditScheduler
+from monitoring.commands import mark_deferred, mark_followup
+from handlers.guilds import add_guild_command
+
+MEMBERS_PER_PAGE = 8
+ROSTER_SECTIONS = ["current_savage", "ultimates"]
+
+
+def format_section(section: Section, parses: dict) -> str:
+    parts = []
+    for group in section.groups:
+        best = None
+        kills = 0
+        for eid in group.encounter_ids:
+            data = parses.get(eid)
+            if not data:
+                continue
+            kills += data.get("kills") or 0
+            if data.get("percentile") is not None and (best is None or data["percentile"] > best):
+                best = data["percentile"]
+        if best is not None:
+            parts.append(f"{group.name} **{int(best)}**" + (f" ({kills})" if section.merge else ""))
+        elif not section.merge:
+            # Savage fights are listed even when uncleared; ultimates only once cleared
+            parts.append(f"{group.name} –")
+    return " · ".join(parts) or "–"
+
+
+class RosterView(discord.ui.View):
+    def __init__(self, members: List[dict], sections: List[Section]):
+        super().__init__(timeout=900)
+        self.members = members
+        self.sections = sections
+        self.page = 0
+        self.parses: Dict[int, dict] = {}
+        self.failed: Dict[int, list] = {}
+        # Alts registered by several members are fetched once
+        self.character_ids = list(dict.fromkeys(member["character_id"] for member in members))
+        self.edits = MessageEditScheduler()
+        self.message: Optional[discord.Message] = None
+        self._sync_buttons()
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.members) // MEMBERS_PER_PAGE))
+
+    def _sync_buttons(self):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    def render(self) -> dict:
+        embed = discord.Embed(title="📋 Static Roster", color=discord.Color.blue())
+        start = self.page * MEMBERS_PER_PAGE
+        for member in self.members[start:start + MEMBERS_PER_PAGE]:
+            character_id = member["character_id"]
+            name = f"{member['character_name']} — {member['job']}"
+            if character_id not in self.parses:
+                embed.add_field(name=name, value="⏳ Fetching parses…", inline=False)
+                continue
+            lines = [f"**{section.label}:** {format_section(section, self.parses[character_id])}" for section in self.sections]
+            if self.failed.get(character_id):
+                lines.append("⚠️ Some FFLogs data couldn't be fetched")
+            embed.add_field(name=name, value="\n".join(lines)[:1024], inline=False)
+
+        loaded = len(self.parses)
+        status = "" if loaded >= len(self.character_ids) else f" · loaded {loaded}/{len(self.character_ids)}"
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} · {len(self.members)} member(s){status}")
+        return {"embed": embed, "view": self}
+
+    def update(self, character_id: int, parses: dict, failed: list):
+        self.parses[character_id] = parses
+        self.failed[character_id] = failed
+        if self.message is not None:
+            self.edits.request(self.message.edit, self.render)
+
+    async def _turn(self, interaction: discord.Interaction, step: int):
+        self.page = min(max(self.page + step, 0), self.pages - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(**self.render())
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, -1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, 1)
+
+
+class Roster(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="roster", description="Show every registered member's current tier and ultimate parses.")
+    async def roster(self, interaction: discord.Interaction):
+        await interaction.response.defer(thinking=True)
+        mark_deferred(interaction)
+
+        members = sorted(users.guild(interaction.guild_id).all().values(), key=lambda m: m["character_name"].lower())
+        if not members:
+            await interaction.followup.send("❌ Nobody has registered yet. Use `/register` first.")
+            return
+
+        catalog = get_catalog()
+        sections = [catalog.section(key) for key in ROSTER_SECTIONS]
+        zone_ids = catalog.zones_for(eid for section in sections for eid in section.encounter_ids)
+
+        view = RosterView(members, sections)
+        view.message = await interaction.followup.send(wait=True, **view.render())
+        mark_followup(interaction)
+
+        try:
+            async for character_id, parses, failed in stream_parses(view.character_ids, zone_ids):
+                view.update(character_id, parses, failed)
+        except Exception as e:
+            print(f"[ERROR] Roster fetch failed: {e}")
+            for character_id in view.character_ids:
+                if character_id not in view.parses:
+                    view.update(character_id, {}, zone_ids)
+
+    async def cog_load(self):
+        add_guild_command(self.bot, self.roster)
+
+
+async def setup(bot):
+    await bot.add_cog(Roster(bot))
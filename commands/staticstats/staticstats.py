@@ -0,0 +1,114 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from typing import List, Optional
+
+from fflogs.catalog import get_catalog
+from storage.users import users
+from monitoring.commands import mark_deferred
+from handlers.guilds import add_guild_command
+
+VIEWS = [
+    app_commands.Choice(name="Per fight", value="fights"),
+    app_commands.Choice(name="Per job", value="jobs"),
+    app_commands.Choice(name="Below a percentile", value="below"),
+]
+
+
+def _pct(value: Optional[float]) -> str:
+    return "–" if value is None else str(int(value))
+
+
+class StaticStats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="staticstats", description="Static-wide parse statistics: medians, coverage and who's behind.")
+    @app_commands.describe(
+        view="What to break the numbers down by",
+        section="Which fights (default: the current savage tier)",
+        threshold="For 'Below a percentile': the median to compare against"
+    )
+    @app_commands.choices(view=VIEWS)
+    async def staticstats(
+        self,
+        interaction: discord.Interaction,
+        view: str = "fights",
+        section: Optional[str] = None,
+        threshold: app_commands.Range[int, 1, 100] = 50
+    ):
+        await interaction.response.defer(thinking=True)
+        mark_deferred(interaction)
+
+        if not len(users.guild(interaction.guild_id)):
+            await interaction.followup.send("❌ Nobody has registered yet. Use `/register` first.")
+            return
+
+        catalog = get_catalog()
+        try:
+            shown = catalog.section(section) if section else catalog.sections[0]
+        except KeyError:
+            await interaction.followup.send(f"❌ Unknown section `{section}`.")
+            return
+
+        try:
+            # NumPy loads on the first /staticstats, not at startup
+            from fflogs.analytics import load_table
+
+            table = await load_table(interaction.guild_id)
+        except Exception as e:
+            print(f"[ERROR] Failed to build static stats: {e}")
+            await interaction.followup.send("❌ Failed to retrieve FFLogs data.")
+            return
+
+        embed = discord.Embed(title=f"📊 Static Stats — {shown.label}", color=discord.Color.gold())
+        tiers = table.tier_stats()
+        embed.description = "\n".join(
+            f"**{tier['label']}:** median {_pct(tier['median'])} · {tier['coverage']:.0%} cleared"
+            for tier in tiers
+        )
+
+        if view == "jobs":
+            for job in table.job_stats(shown.key):
+                embed.add_field(
+                    name=f"{job['job']} ({job['members']})",
+                    value=f"Median **{_pct(job['median'])}** · {job['coverage']:.0%} of fights cleared",
+                    inline=True
+                )
+        elif view == "below":
+            below = table.below(shown.key, threshold)
+            lines = [f"{name} — {'no parses' if median is None else f'median **{int(median)}**'}" for name, median in below]
+            embed.add_field(
+                name=f"Below {threshold} ({len(below)}/{len(table.names)})",
+                value="\n".join(lines)[:1024] or f"Everyone is at {threshold} or above 🎉",
+                inline=False
+            )
+        else:
+            for fight in table.fight_stats(shown.key):
+                if fight["parsed"]:
+                    value = (
+                        f"Median **{_pct(fight['median'])}** (p25 {_pct(fight['p25'])} · p75 {_pct(fight['p75'])})\n"
+                        f"Best {_pct(fight['best'])} by {fight['best_member']} · cleared {fight['cleared']}/{fight['members']}"
+                    )
+                else:
+                    value = f"No parses · cleared {fight['cleared']}/{fight['members']}"
+                embed.add_field(name=fight["name"], value=value, inline=False)
+
+        warning = "" if table.complete else " · ⚠️ some FFLogs data couldn't be fetched"
+        embed.set_footer(text=f"{len(table.names)} member(s) · {len(table)} parse row(s){warning}")
+        await interaction.followup.send(embed=embed)
+
+    @staticstats.autocomplete("section")
+    async def section_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        return [
+            app_commands.Choice(name=section.label, value=section.key)
+            for section in get_catalog().sections
+            if current.lower() in section.label.lower()
+        ][:25]
+
+    async def cog_load(self):
+        add_guild_command(self.bot, self.staticstats)
+
+
+async def setup(bot):
+    await bot.add_cog(StaticStats(bot))
@@ -1,9 +1,10 @@
 import random
-import os
 import discord
 from discord.ext import commands
 from discord import app_commands
 
+from handlers.guilds import add_guild_command
+
 class Hello(commands.Cog):
     def __init__(self, client):
         self.client = client
@@ -25,9 +26,7 @@ class Hello(commands.Cog):
         await interaction.response.send_message(random.choice(greetings))
 
     async def cog_load(self):
-        guild = discord.Object(id=int(self.client.guild_id))
-        self.client.tree.add_command(self.hello, guild=guild)
+        add_guild_command(self.client, self.hello)
 
 async def setup(client):
-    client.guild_id = os.getenv("GUILD_ID")
     await client.add_cog(Hello(client))
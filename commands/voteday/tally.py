@@ -0,0 +1,122 @@
+import discord
+from typing import Dict, List, Optional
+
+
+class VoteTally:
+    """Incrementally maintained vote state and embed for one guild's votes.
+
+    Each day's voters are kept as an insertion-ordered set (a dict with None
+    values) inside ``vote_data`` itself, so the persisted state stays in sync.
+    Toggling a vote is O(1) and only re-renders the fields it touched.
+
+    ``vote_data`` is the guild's live dict from VoteStore, so there must be
+    exactly one tally per store: every /voteday message in the guild shares
+    it (see :meth:`reopen`).
+    """
+
+    def __init__(self, user_data: Dict[str, dict], vote_data: Dict[str, List[str]]):
+        self.user_data = user_data
+        self.vote_data = vote_data
+        self.days = list(vote_data)
+        self._day_index = {day: i for i, day in enumerate(self.days)}
+
+        self.days_voted: Dict[str, int] = {}
+        for day in self.days:
+            voters = dict.fromkeys(vote_data[day])
+            vote_data[day] = voters
+            for uid in voters:
+                self.days_voted[uid] = self.days_voted.get(uid, 0) + 1
+
+        self.not_voted = {uid for uid in user_data if uid not in self.days_voted}
+
+        # count -> days with that many votes, for O(1) leader tracking
+        self._days_by_count: Dict[int, set] = {}
+        self._max_count = 0
+        for day in self.days:
+            count = len(vote_data[day])
+            self._days_by_count.setdefault(count, set()).add(day)
+            self._max_count = max(self._max_count, count)
+
+        self.embed = self._render()
+        # Set once the "raid scheduled" announcement has gone out
+        self.announced = False
+
+    def reopen(self, user_data: Dict[str, dict]):
+        """Reuse this tally for a new /voteday message, with the current roster."""
+        self.user_data = user_data
+        self.not_voted = {uid for uid in user_data if not self.days_voted.get(uid)}
+        self.announced = False
+        self.embed = self._render()
+
+    @property
+    def all_voted(self) -> bool:
+        return not self.not_voted
+
+    @property
+    def leader(self) -> Optional[str]:
+        """Day with the most votes; ties go to the earliest day, like max() did."""
+        tied = self._days_by_count.get(self._max_count)
+        if not tied:
+            return None
+        return min(tied, key=self._day_index.__getitem__)
+
+    def _move(self, day: str, old: int, new: int):
+        self._days_by_count[old].discard(day)
+        self._days_by_count.setdefault(new, set()).add(day)
+        if new > self._max_count:
+            self._max_count = new
+        elif old == self._max_count and not self._days_by_count[old]:
+            self._max_count = new
+
+    def toggle(self, day: str, user_id: str) -> bool:
+        """Flip ``user_id``'s vote for ``day``; True if the vote was added."""
+        voters = self.vote_data.setdefault(day, {})
+        if day not in self._day_index:
+            self._day_index[day] = len(self.days)
+            self.days.append(day)
+            self._days_by_count.setdefault(0, set()).add(day)
+            self.embed.insert_field_at(self._day_index[day], name=day, value="No votes", inline=False)
+
+        count = len(voters)
+        previously_voted = self.days_voted.get(user_id, 0)
+        if user_id in voters:
+            del voters[user_id]
+            self.days_voted[user_id] = previously_voted - 1
+            self._move(day, count, count - 1)
+            added = False
+        else:
+            voters[user_id] = None
+            self.days_voted[user_id] = previously_voted + 1
+            self._move(day, count, count + 1)
+            added = True
+
+        self._render_day(day)
+        if added and previously_voted == 0:
+            self.not_voted.discard(user_id)
+            self._render_not_voted()
+        elif not added and previously_voted == 1 and user_id in self.user_data:
+            self.not_voted.add(user_id)
+            self._render_not_voted()
+        return added
+
+    def _day_value(self, day: str) -> str:
+        names = [f"💙 {self.user_data[uid]['character_name']}" for uid in self.vote_data[day] if uid in self.user_data]
+        return "\n".join(names) or "No votes"
+
+    def _not_voted_value(self) -> str:
+        non_voters = [f"🔴 {self.user_data[uid]['character_name']}" for uid in self.not_voted]
+        return "\n".join(non_voters) or "None"
+
+    def _render_day(self, day: str):
+        self.embed.set_field_at(self._day_index[day], name=day, value=self._day_value(day), inline=False)
+
+    def _render_not_voted(self):
+        self.embed.set_field_at(len(self.days), name="❌ Not Voted Yet", value=self._not_voted_value(), inline=False)
+
+    def _render(self) -> discord.Embed:
+        embed = discord.Embed(title="🗳️ Raid Day Voting", color=discord.Color.blurple())
+        embed.set_footer(text="Click buttons to toggle votes. You may vote for multiple days.")
+        for day in self.days:
+            embed.add_field(name=day, value=self._day_value(day), inline=False)
+        embed.add_field(name="❌ Not Voted Yet", value=self._not_voted_value(), inline=False)
+        return embed
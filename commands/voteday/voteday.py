@@ -1,27 +1,40 @@
-import os
-import json
 import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime, timedelta
+from typing import Dict, List
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-USERS_FILE = os.path.join(DATA_DIR, "users.json")
-SAVED_DAYS_FILE = os.path.join(DATA_DIR, "saved_days.json")
-
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
+from storage.users import users
+from storage.votes import vote_stores
+from commands.voteday.tally import VoteTally
+from handlers.edits import MessageEditScheduler
+from monitoring.commands import mark_deferred
+from handlers.guilds import add_guild_command, get_guild_config
 
+# Pinged when the vote is decided; guilds can set their own "raid_role_id" in guilds.json
 RAID_ROLE_ID = 1350916461467664535
 
+# guild -> the one tally over that guild's live vote data, shared by all its /voteday messages
+_tallies: Dict[str, VoteTally] = {}
+
+
+def get_tally(guild_id, user_data: Dict[str, dict], days: List[str]) -> VoteTally:
+    vote_data = vote_stores.get(guild_id).load(days)
+    tally = _tallies.get(str(guild_id))
+    if tally is None or tally.vote_data is not vote_data:
+        tally = _tallies[str(guild_id)] = VoteTally(user_data, vote_data)
+    else:
+        tally.reopen(user_data)
+    return tally
+
 class VoteView(discord.ui.View):
-    def __init__(self, days, user_data, vote_data, save_callback, disable_buttons=False):
+    def __init__(self, days, tally, save_callback, disable_buttons=False, raid_role_id=RAID_ROLE_ID):
         super().__init__(timeout=None)
         self.days = days
-        self.user_data = user_data
-        self.vote_data = vote_data
+        self.tally = tally
         self.save_callback = save_callback
+        self.raid_role_id = raid_role_id
+        self.edits = MessageEditScheduler()
 
         for day in self.days:
             self.add_item(self.create_button(day, disable_buttons))
@@ -33,50 +46,30 @@ class VoteView(discord.ui.View):
 
             async def callback(self_inner, interaction: discord.Interaction):
                 user_id = str(interaction.user.id)
-                if user_id not in self.user_data:
+                if user_id not in self.tally.user_data:
                     await interaction.response.send_message("❌ You must register before voting.", ephemeral=True)
                     return
 
-                self.vote_data.setdefault(day, [])
-                if user_id in self.vote_data[day]:
-                    self.vote_data[day].remove(user_id)
-                else:
-                    self.vote_data[day].append(user_id)
+                # Acknowledge right away; the message itself is updated by the edit scheduler
+                await interaction.response.defer()
+                if self.tally.announced:
+                    return
 
+                self.tally.toggle(day, user_id)
                 self.save_callback()
 
-                embed = generate_embed(self.user_data, self.vote_data)
-
-                all_voters = set()
-                for votes in self.vote_data.values():
-                    all_voters.update(votes)
-                if all_voters == set(self.user_data.keys()):
+                if self.tally.all_voted:
                     # All registered users have voted
-                    chosen_day = max(self.vote_data.items(), key=lambda item: len(item[1]))[0]
-                    embed.set_footer(text=f"✅ All votes submitted. Raid scheduled: {chosen_day}")
-                    await interaction.message.channel.send(f"<@&{RAID_ROLE_ID}> Raid scheduled for **{chosen_day}**! 📅")
-                    view = VoteView(self.days, self.user_data, self.vote_data, self.save_callback, disable_buttons=True)
-                    await interaction.response.edit_message(embed=embed, view=view)
-                else:
-                    await interaction.response.edit_message(embed=embed, view=self)
+                    self.tally.announced = True
+                    chosen_day = self.tally.leader
+                    self.tally.embed.set_footer(text=f"✅ All votes submitted. Raid scheduled: {chosen_day}")
+                    for item in self.children:
+                        item.disabled = True
+                    await interaction.message.channel.send(f"<@&{self.raid_role_id}> Raid scheduled for **{chosen_day}**! 📅")
 
-        return DayButton()
+                self.edits.request(interaction.edit_original_response, lambda: {"embed": self.tally.embed, "view": self})
 
-def generate_embed(user_data, vote_data):
-    embed = discord.Embed(title="🗳️ Raid Day Voting", color=discord.Color.blurple())
-    embed.set_footer(text="Click buttons to toggle votes. You may vote for multiple days.")
-
-    registered_ids = set(user_data.keys())
-    all_voters = set()
-
-    for day, votes in vote_data.items():
-        names = [f"💙 {user_data[uid]['character_name']}" for uid in votes if uid in user_data]
-        all_voters.update(votes)
-        embed.add_field(name=day, value="\n".join(names) or "No votes", inline=False)
-
-    non_voters = [f"🔴 {user_data[uid]['character_name']}" for uid in registered_ids - all_voters]
-    embed.add_field(name="❌ Not Voted Yet", value="\n".join(non_voters) or "None", inline=False)
-    return embed
+        return DayButton()
 
 class VoteDay(commands.Cog):
     def __init__(self, bot):
@@ -85,35 +78,26 @@ class VoteDay(commands.Cog):
     @app_commands.command(name="voteday", description="Start a vote for best raid day (next 7 days).")
     async def voteday(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=True)
+        mark_deferred(interaction)
 
         try:
-            with open(USERS_FILE, "r") as f:
-                user_data = json.load(f)
+            user_data = users.guild(interaction.guild_id).all()
         except Exception as e:
-            print(f"[ERROR] Failed to load users.json: {e}")
+            print(f"[ERROR] Failed to load registered users: {e}")
             await interaction.followup.send("❌ Couldn't load registered users.")
             return
 
         today = datetime.utcnow()
         days = [(today + timedelta(days=i)).strftime("%A (%Y-%m-%d)") for i in range(7)]
 
-        if os.path.exists(SAVED_DAYS_FILE):
-            with open(SAVED_DAYS_FILE, "r") as f:
-                vote_data = json.load(f)
-        else:
-            vote_data = {day: [] for day in days}
-
-        def save_votes():
-            with open(SAVED_DAYS_FILE, "w") as f:
-                json.dump(vote_data, f, indent=2)
-
-        embed = generate_embed(user_data, vote_data)
-        view = VoteView(days, user_data, vote_data, save_votes)
-        await interaction.followup.send(embed=embed, view=view)
+        store = vote_stores.get(interaction.guild_id)
+        tally = get_tally(interaction.guild_id, user_data, days)
+        raid_role_id = get_guild_config().settings(interaction.guild_id).get("raid_role_id", RAID_ROLE_ID)
+        view = VoteView(days, tally, store.mark_dirty, raid_role_id=raid_role_id)
+        await interaction.followup.send(embed=tally.embed, view=view)
 
     async def cog_load(self):
-        guild = discord.Object(id=int(os.getenv("GUILD_ID")))
-        self.bot.tree.add_command(self.voteday, guild=guild)
+        add_guild_command(self.bot, self.voteday)
 
 async def setup(bot):
     await bot.add_cog(VoteDay(bot))
@@ -1,45 +1,145 @@
-import os
-import json
 import discord
 from discord.ext import commands
 from discord import app_commands
+from typing import Dict, List, Optional, Set, Union
+
+from fflogs.client import cached_zones, stream_zones, ZONE_DEADLINE
+from fflogs.cache import ZoneData
+from fflogs.catalog import get_catalog, DisplayGroup, Section, EncounterCatalog
+from fflogs.utils import merge_zone_data
+from storage.users import users
+from handlers.edits import MessageEditScheduler
+from monitoring.commands import mark_deferred, mark_followup
+from handlers.guilds import add_guild_command
+
+
+def format_age(seconds: float) -> str:
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)}h ago"
+    return f"{int(seconds // 86400)}d ago"
+
+
+def merge_group(group: DisplayGroup, all_parses: ZoneData):
+    # The same fight across zones: sum kills, keep highest percentile
+    merged = None
+    for eid in group.encounter_ids:
+        data = all_parses.get(eid)
+        if not data:
+            continue
+
+        if merged is None:
+            merged = {
+                "percentile": data.get("percentile") or 0,
+                "kills": data.get("kills") or 0,
+                "spec": data.get("spec") or "Unknown"
+            }
+        else:
+            merged["kills"] += data.get("kills") or 0
+            if (data.get("percentile") or 0) > merged["percentile"]:
+                merged["percentile"] = data.get("percentile")
+                merged["spec"] = data.get("spec") or "Unknown"
+    return merged
+
+
+class WhoAmIReply:
+    """The /whoami embed: sent straight from the cache, then redrawn as fresh zones land."""
+
+    def __init__(
+        self,
+        user_data: dict,
+        catalog: EncounterCatalog,
+        zone_ids: List[Union[int, None]],
+        zone_results: Dict[Union[int, None], ZoneData],
+        ages: Dict[Union[int, None], float],
+        refreshing: List[Union[int, None]]
+    ):
+        self.user_data = user_data
+        self.catalog = catalog
+        self.zone_ids = zone_ids
+        self.zone_results = dict(zone_results)
+        self.ages = dict(ages)
+        self.outstanding: Set[Union[int, None]] = set(refreshing)
+        self.failed: Set[Union[int, None]] = set()
+        self.late: Set[Union[int, None]] = set()
+
+    def update(self, zone_id: Union[int, None], zone_data: Optional[ZoneData]):
+        self.outstanding.discard(zone_id)
+        if zone_data is None:
+            self.failed.add(zone_id)
+            return
+        self.zone_results[zone_id] = zone_data
+        self.ages[zone_id] = 0.0
+
+    def finish(self):
+        """Stop waiting; whatever hasn't arrived keeps its cached value."""
+        self.late |= self.outstanding
+        self.outstanding.clear()
+
+    def _loading(self, group: DisplayGroup) -> bool:
+        return any(self.catalog.zone_of.get(eid) in self.outstanding for eid in group.encounter_ids)
+
+    def _footer(self) -> str:
+        oldest = max(self.ages.values(), default=None)
+        if self.outstanding:
+            if oldest is None:
+                return "⏳ Fetching from FFLogs…"
+            return f"Cached data from {format_age(oldest)} · ⏳ refreshing {len(self.outstanding)} zone(s)…"
+        missed = len(self.late | self.failed)
+        if missed:
+            shown = f"showing data from {format_age(oldest)}" if oldest is not None else "no cached data"
+            return f"⚠️ FFLogs didn't answer for {missed} zone(s); {shown}"
+        return f"Updated {format_age(oldest or 0.0)}"
+
+    def render(self) -> dict:
+        if not self.zone_results and not self.outstanding and self.failed:
+            return {"content": "❌ Failed to retrieve FFLogs data.", "embed": None}
+
+        all_parses: ZoneData = {}
+        for zone_id in self.zone_ids:
+            if zone_id in self.zone_results:
+                merge_zone_data(all_parses, self.zone_results[zone_id])
+
+        user_data = self.user_data
+        embed = discord.Embed(
+            title=f"{user_data['character_name']} — {user_data['job']}",
+            description=f"Server: **{user_data['server']}**\n[View on FFLogs]({user_data['fflogs']})",
+            color=discord.Color.purple()
+        )
+
+        # Helper function for embedding parse data
+        def add_section_to_embed(section: Section):
+            embed.add_field(name=section.label, value="\u200b", inline=False)
+            for group in section.groups:
+                if section.merge:
+                    data = merge_group(group, all_parses)
+                else:
+                    data = all_parses.get(group.encounter_ids[0])
+                    if data and data.get("percentile") is None:
+                        data = None
+
+                if data:
+                    pct = int(data['percentile'])
+                    embed.add_field(
+                        name=group.name,
+                        value=f"**{pct}%** (Spec: {data['spec']}, Kills: {data['kills']})",
+                        inline=False
+                    )
+                elif self._loading(group):
+                    embed.add_field(name=group.name, value="⏳ Fetching…", inline=False)
+                else:
+                    embed.add_field(name=group.name, value="No data", inline=False)
+
+        # Add categories
+        for section in self.catalog.sections:
+            add_section_to_embed(section)
+
+        embed.set_footer(text=self._footer())
+        return {"embed": embed}
 
-from fflogs.utils import (
-    get_parses_for_fights,
-    get_access_token,
-    get_graphql_client
-)
-
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-DATA_FILE = os.path.join(BASE_DIR, "data", "users.json")
-
-CURRENT_SAVAGE_ENCOUNTER_IDS = {
-    97: "Dancing Green",
-    98: "Sugar Riot",
-    99: "Brute Abominator",
-    100: "Howling Blade",
-}
-
-PREVIOUS_SAVAGE_ENCOUNTER_IDS = {
-    93: "Black Cat",
-    94: "Honey B. Lovely",
-    95: "Brute Bomber",
-    96: "Wicked Thunder",
-}
-
-ULTIMATE_ENCOUNTER_IDS = {
-    1079: "Futures Rewritten",                       # zone 65 (Dawntrail)
-    1065: "Dragonsong's Reprise",                    # zone 45 (Endwalker)
-    1076: "Dragonsong's Reprise",                    # zone 59 (Dawntrail)
-    1068: "The Omega Protocol",                      # zone 53 (Endwalker)
-    1077: "The Omega Protocol",                      # zone 59 (Dawntrail)
-    1060: "The Unending Coil of Bahamut",            # zone 43
-    1073: "The Unending Coil of Bahamut",            # zone 59
-    1061: "The Weapon's Refrain",                    # zone 43
-    1074: "The Weapon's Refrain",                    # zone 59
-    1062: "The Epic of Alexander",                   # zone 43
-    1075: "The Epic of Alexander",                   # zone 59
-}
 
 class WhoAmI(commands.Cog):
     def __init__(self, bot):
@@ -48,101 +148,42 @@ class WhoAmI(commands.Cog):
     @app_commands.command(name="whoami", description="View your character and FFLogs data.")
     async def whoami(self, interaction: discord.Interaction):
         await interaction.response.defer(thinking=True)
+        mark_deferred(interaction)
         user_id = str(interaction.user.id)
 
-        if not os.path.exists(DATA_FILE):
-            await interaction.followup.send("❌ No data file found. Please register first.")
-            return
-
-        with open(DATA_FILE, "r") as f:
-            users = json.load(f)
-
-        if user_id not in users:
+        user_data = users.guild(interaction.guild_id).get(user_id)
+        if user_data is None:
             await interaction.followup.send("❌ You're not registered yet. Please use `/register` first.")
             return
 
-        user_data = users[user_id]
-        character_name = user_data["character_name"]
-        server = user_data["server"]
-        job = user_data["job"]
-        fflogs_url = user_data["fflogs"]
         character_id = user_data["character_id"]
+        catalog = get_catalog()
+        shown = [eid for section in catalog.sections for eid in section.encounter_ids]
+        zone_ids = catalog.zones_for(shown)
+
+        # Answer from the cache straight away, then fill in fresh zones as they arrive
+        zone_results, ages, to_refresh = cached_zones(character_id, zone_ids)
+        reply = WhoAmIReply(user_data, catalog, zone_ids, zone_results, ages, to_refresh)
+        message = await interaction.followup.send(ephemeral=True, wait=True, **reply.render())
+        mark_followup(interaction)
+        if not to_refresh:
+            return
 
-        embed = discord.Embed(
-            title=f"{character_name} — {job}",
-            description=f"Server: **{server}**\n[View on FFLogs]({fflogs_url})",
-            color=discord.Color.purple()
-        )
-
+        # Stale zones get a deadline and fall back to the cache; with nothing cached there's nothing to fall back to
+        deadline = ZONE_DEADLINE if zone_results else None
+        edits = MessageEditScheduler()
         try:
-            token = get_access_token()
-            client = get_graphql_client(token)
-            all_parses = get_parses_for_fights(client, character_id)
+            async for zone_id, zone_data in stream_zones(character_id, to_refresh, deadline=deadline):
+                reply.update(zone_id, zone_data)
+                edits.request(message.edit, reply.render)
         except Exception as e:
             print(f"[ERROR] Failed to fetch parses: {e}")
-            await interaction.followup.send("❌ Failed to retrieve FFLogs data.")
-            return
-
-        # Helper function for embedding parse data
-        def add_parses_to_embed(label: str, ids: dict):
-            embed.add_field(name=label, value="\u200b", inline=False)
-            for eid, name in ids.items():
-                data = all_parses.get(eid)
-                if data and data.get("percentile") is not None:
-                    pct = int(data['percentile'])
-                    embed.add_field(
-                        name=name,
-                        value=f"**{pct}%** (Spec: {data['spec']}, Kills: {data['kills']})",
-                        inline=False
-                    )
-                else:
-                    embed.add_field(name=name, value="No data", inline=False)
-
-        def add_deduplicated_ultimates_to_embed():
-            embed.add_field(name="Ultimates", value="\u200b", inline=False)
-            aggregated = {}
-
-            for eid, name in ULTIMATE_ENCOUNTER_IDS.items():
-                data = all_parses.get(eid)
-                if not data:
-                    continue
-
-                if name not in aggregated:
-                    aggregated[name] = {
-                        "percentile": data.get("percentile") or 0,
-                        "kills": data.get("kills") or 0,
-                        "spec": data.get("spec") or "Unknown"
-                    }
-                else:
-                    # Sum kills, keep highest percentile
-                    aggregated[name]["kills"] += data.get("kills") or 0
-                    if (data.get("percentile") or 0) > aggregated[name]["percentile"]:
-                        aggregated[name]["percentile"] = data.get("percentile")
-                        aggregated[name]["spec"] = data.get("spec") or "Unknown"
-
-            for name in sorted(set(ULTIMATE_ENCOUNTER_IDS.values())):
-                if name in aggregated:
-                    info = aggregated[name]
-                    pct = int(info["percentile"])
-                    embed.add_field(
-                        name=name,
-                        value=f"**{pct}%** (Spec: {info['spec']}, Kills: {info['kills']})",
-                        inline=False
-                    )
-                else:
-                    embed.add_field(name=name, value="No data", inline=False)
-
-        # Add categories
-        add_parses_to_embed("Current Savage Tier", CURRENT_SAVAGE_ENCOUNTER_IDS)
-        add_parses_to_embed("Previous Savage Tier", PREVIOUS_SAVAGE_ENCOUNTER_IDS)
-        add_deduplicated_ultimates_to_embed()
-
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        reply.finish()
+        edits.request(message.edit, reply.render)
 
     async def cog_load(self):
-        guild = discord.Object(id=int(os.getenv("GUILD_ID")))
-        self.bot.tree.add_command(self.whoami, guild=guild)
+        add_guild_command(self.bot, self.whoami)
 
 
 async def setup(bot):
-    await bot.add_cog(WhoAmI(bot))
\ No newline at end of file
+    await bot.add_cog(WhoAmI(bot))
@@ -0,0 +1,9 @@
+# events/client/metrics.py
+from monitoring.commands import mark_completed
+
+
+async def setup(bot):
+    async def on_app_command_completion(interaction, command):
+        mark_completed(interaction)
+
+    bot.add_listener(on_app_command_completion, "on_app_command_completion")
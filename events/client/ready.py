@@ -1,6 +1,8 @@
 # events/client/ready.py
 
-def setup(bot):
-    @bot.event
+async def setup(bot):
+    # A listener, not @bot.event, so main.py's own on_ready isn't replaced
     async def on_ready():
         print(f"[EVENT] Bot is ready as {bot.user}")
+
+    bot.add_listener(on_ready, "on_ready")
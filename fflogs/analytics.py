@@ -0,0 +1,197 @@
+"""Static-wide parse analytics for /staticstats.
+
+The roster's cached parses are loaded once into a columnar table with one
+row per (member, encounter): member, encounter, display group, tier
+(catalog section), percentile and kills, each a NumPy array. Rows are
+pivoted into member x fight matrices (best percentile, total kills), so
+medians, quartiles, coverage and the per-job and per-tier group-bys are
+array reductions instead of loops over each member's dicts.
+
+Tables are kept per guild until the roster or any member's cached
+rankings change (see ParseCache.version), and everything computed from a
+table is memoised on it.
+"""
+import warnings
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from fflogs.cache import ZoneData, parse_cache
+from fflogs.catalog import get_catalog, EncounterCatalog
+from fflogs.bulk import stream_parses
+from storage.users import users
+from monitoring.metrics import metrics
+
+
+def _quiet(func, *args, **kwargs):
+    # Fights nobody has a parse for are all-NaN; NaN is the right answer, the warning is noise
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return func(*args, **kwargs)
+
+
+def _number(value) -> Optional[float]:
+    return None if value is None or np.isnan(value) else float(value)
+
+
+class ParseTable:
+    def __init__(self, members: List[dict], parses: Dict[int, ZoneData], catalog: EncounterCatalog, complete: bool = True):
+        self.complete = complete
+        self.names = [member["character_name"] for member in members]
+        self.job_names, member_job = np.unique([member["job"].strip().title() for member in members], return_inverse=True)
+        self.member_job = member_job.astype(np.int32)
+
+        # Every display group of every section is one fight column
+        self.sections = catalog.sections
+        self.group_names: List[str] = []
+        group_section, group_of = [], {}
+        for section_index, section in enumerate(self.sections):
+            for group in section.groups:
+                for eid in (group.encounter_ids if section.merge else group.encounter_ids[:1]):
+                    group_of[eid] = len(self.group_names)
+                group_section.append(section_index)
+                self.group_names.append(group.name)
+        self.group_section = np.array(group_section, dtype=np.int16)
+
+        # One row per (member, encounter) the member has data for
+        member_col, encounter_col, percentile_col, kills_col = [], [], [], []
+        for index, member in enumerate(members):
+            for eid, data in parses.get(member["character_id"], {}).items():
+                if eid not in group_of:
+                    continue
+                member_col.append(index)
+                encounter_col.append(eid)
+                percentile = data.get("percentile")
+                percentile_col.append(np.nan if percentile is None else percentile)
+                kills_col.append(data.get("kills") or 0)
+        self.member = np.array(member_col, dtype=np.int32)
+        self.encounter = np.array(encounter_col, dtype=np.int32)
+        self.group = np.array([group_of[eid] for eid in encounter_col], dtype=np.int32)
+        self.percentile = np.array(percentile_col, dtype=np.float64)
+        self.kills = np.array(kills_col, dtype=np.int32)
+
+        # Pivot: best percentile and total kills per (member, fight); merged ultimates combine their encounters
+        shape = (len(members), len(self.group_names))
+        self.best = np.full(shape, np.nan)
+        np.fmax.at(self.best, (self.member, self.group), self.percentile)
+        self.kill_counts = np.zeros(shape, dtype=np.int32)
+        np.add.at(self.kill_counts, (self.member, self.group), self.kills)
+        self._memo: Dict[tuple, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.member)
+
+    def _memoised(self, key: tuple, compute):
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def columns(self, section_key: str) -> np.ndarray:
+        section_index = next(i for i, section in enumerate(self.sections) if section.key == section_key)
+        return np.flatnonzero(self.group_section == section_index)
+
+    def member_medians(self, section_key: str) -> np.ndarray:
+        """Each member's median best percentile across a tier's fights (NaN: no parses)."""
+        return self._memoised(("member_medians", section_key), lambda: _quiet(np.nanmedian, self.best[:, self.columns(section_key)], axis=1))
+
+    def fight_stats(self, section_key: str) -> List[dict]:
+        def compute():
+            cols = self.columns(section_key)
+            best = self.best[:, cols]
+            quartiles = _quiet(np.nanpercentile, best, [25, 50, 75], axis=0)
+            parsed = (~np.isnan(best)).sum(axis=0)
+            cleared = (self.kill_counts[:, cols] > 0).sum(axis=0)
+            leader = np.where(np.isnan(best), -1, best).argmax(axis=0) if len(self.names) else np.zeros(len(cols), dtype=int)
+            return [
+                {
+                    "name": self.group_names[col],
+                    "p25": _number(quartiles[0, i]),
+                    "median": _number(quartiles[1, i]),
+                    "p75": _number(quartiles[2, i]),
+                    "best": _number(best[leader[i], i]) if parsed[i] else None,
+                    "best_member": self.names[leader[i]] if parsed[i] else None,
+                    "parsed": int(parsed[i]),
+                    "cleared": int(cleared[i]),
+                    "members": len(self.names),
+                }
+                for i, col in enumerate(cols)
+            ]
+        return self._memoised(("fights", section_key), compute)
+
+    def job_stats(self, section_key: str) -> List[dict]:
+        def compute():
+            cols = self.columns(section_key)
+            members_per_job = np.bincount(self.member_job, minlength=len(self.job_names))
+            cleared_per_member = (self.kill_counts[:, cols] > 0).sum(axis=1)
+            cleared_per_job = np.bincount(self.member_job, weights=cleared_per_member, minlength=len(self.job_names))
+            coverage = cleared_per_job / np.maximum(members_per_job * len(cols), 1)
+            medians = self.member_medians(section_key)
+            return [
+                {
+                    "job": str(job),
+                    "members": int(members_per_job[j]),
+                    "median": _number(_quiet(np.nanmedian, medians[self.member_job == j])),
+                    "coverage": float(coverage[j]),
+                }
+                for j, job in enumerate(self.job_names)
+            ]
+        return self._memoised(("jobs", section_key), compute)
+
+    def tier_stats(self) -> List[dict]:
+        def compute():
+            stats = []
+            for section in self.sections:
+                cols = self.columns(section.key)
+                cleared = self.kill_counts[:, cols] > 0
+                stats.append({
+                    "key": section.key,
+                    "label": section.label,
+                    "median": _number(_quiet(np.nanmedian, self.member_medians(section.key))),
+                    "coverage": float(cleared.mean()) if cleared.size else 0.0,
+                })
+            return stats
+        return self._memoised(("tiers",), compute)
+
+    def below(self, section_key: str, threshold: float) -> List[Tuple[str, Optional[float]]]:
+        """Members whose median on a tier is under ``threshold`` (or who have no parses), lowest first."""
+        def compute():
+            medians = self.member_medians(section_key)
+            under = np.flatnonzero(np.isnan(medians) | (medians < threshold))
+            order = under[np.argsort(np.nan_to_num(medians[under], nan=-1.0), kind="stable")]
+            return [(self.names[i], _number(medians[i])) for i in order]
+        return self._memoised(("below", section_key, threshold), compute)
+
+
+# guild -> (roster and data signature, table)
+_tables: Dict[int, Tuple[tuple, ParseTable]] = {}
+
+
+def _signature(members: List[dict]) -> tuple:
+    return tuple(
+        (member["character_id"], member["character_name"], member["job"], parse_cache.version(member["character_id"]))
+        for member in members
+    )
+
+
+async def load_table(guild_id: int) -> ParseTable:
+    """The guild's parse table, rebuilt only when its roster or parse data changed."""
+    members = sorted(users.guild(guild_id).all().values(), key=lambda m: m["character_name"].lower())
+    cached = _tables.get(guild_id)
+    if cached is not None and cached[1].complete and cached[0] == _signature(members):
+        metrics.inc("staticstats_table_total", result="cached")
+        return cached[1]
+
+    catalog = get_catalog()
+    zone_ids = catalog.zones_for(eid for section in catalog.sections for eid in section.encounter_ids)
+    character_ids = list(dict.fromkeys(member["character_id"] for member in members))
+    parses: Dict[int, ZoneData] = {}
+    complete = True
+    async for character_id, merged, failed in stream_parses(character_ids, zone_ids):
+        parses[character_id] = merged
+        complete = complete and not failed
+
+    with metrics.timer("staticstats_build_seconds"):
+        table = ParseTable(members, parses, catalog, complete=complete)
+    # Signed after fetching, so what the fetch itself stored counts as seen
+    _tables[guild_id] = (_signature(members), table)
+    metrics.inc("staticstats_table_total", result="built")
+    return table
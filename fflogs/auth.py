@@ -0,0 +1,177 @@
+import os
+import json
+import asyncio
+import time
+import threading
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_URL = os.getenv("FFLOGS_TOKEN_URL", "https://www.fflogs.com/oauth/token")
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+TOKEN_FILE = os.path.join(DATA_DIR, "fflogs_token.json")
+
+# Start refreshing this many seconds before the token actually expires
+REFRESH_MARGIN = 300
+
+
+class TokenProvider:
+    """Caches the FFLogs client-credentials token in memory and on disk.
+
+    Callers always get a usable token without a round trip unless it is about
+    to expire. Only one refresh runs at a time; while a token is still valid
+    but inside the refresh margin, other callers keep using the old one.
+    """
+
+    def __init__(self, token_file: str = TOKEN_FILE, refresh_margin: int = REFRESH_MARGIN):
+        self.token_file = token_file
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._loaded = False
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def _is_valid(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_at - self.refresh_margin
+
+    def _load_from_disk(self):
+        self._loaded = True
+        if not os.path.exists(self.token_file):
+            return
+        try:
+            with open(self.token_file, "r") as f:
+                cached = json.load(f)
+            self._token = cached["access_token"]
+            self._expires_at = float(cached["expires_at"])
+            print("[DEBUG] Loaded cached FFLogs token from disk.")
+        except Exception as e:
+            print(f"[ERROR] Ignoring unreadable token cache {self.token_file}: {e}")
+
+    def _save_to_disk(self):
+        os.makedirs(os.path.dirname(self.token_file), exist_ok=True)
+        tmp_path = self.token_file + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"access_token": self._token, "expires_at": self._expires_at}, f)
+        os.replace(tmp_path, self.token_file)
+
+    def _credentials(self) -> dict:
+        return {
+            "grant_type": "client_credentials",
+            "client_id": os.getenv("FFLOGS_CLIENT_ID"),
+            "client_secret": os.getenv("FFLOGS_CLIENT_SECRET")
+        }
+
+    def _refresh(self):
+        # Only the blocking scripts refresh this way; the bot uses aiohttp (_refresh_async)
+        import requests
+
+        response = requests.post(TOKEN_URL, data=self._credentials())
+        response.raise_for_status()
+        self.store(response.json())
+        print("[DEBUG] Fetched new FFLogs access token.")
+
+    async def _refresh_async(self, session) -> str:
+        async with session.post(TOKEN_URL, data=self._credentials()) as response:
+            response.raise_for_status()
+            payload = await response.json()
+        self.store(payload)
+        print("[DEBUG] Fetched new FFLogs access token.")
+        return self._token
+
+    def store(self, payload: dict):
+        """Remember a token response of the form {"access_token", "expires_in"}."""
+        self._token = payload["access_token"]
+        self._expires_at = time.time() + float(payload.get("expires_in", 3600))
+        try:
+            self._save_to_disk()
+        except OSError as e:
+            print(f"[ERROR] Could not write token cache: {e}")
+
+    def get_token(self) -> str:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load_from_disk()
+
+        if self._is_fresh():
+            return self._token
+
+        if self._is_valid():
+            # Refresh ahead of expiry, but don't make anyone wait for it
+            if not self._lock.acquire(blocking=False):
+                return self._token
+            try:
+                if not self._is_fresh():
+                    try:
+                        self._refresh()
+                    except Exception as e:
+                        print(f"[ERROR] Early token refresh failed, using current token: {e}")
+                return self._token
+            finally:
+                self._lock.release()
+
+        with self._lock:
+            if not self._is_valid():
+                self._refresh()
+            return self._token
+
+    async def get_token_async(self, session) -> str:
+        """Async variant of :meth:`get_token` that refreshes over an aiohttp session."""
+        if not self._loaded:
+            self._load_from_disk()
+
+        if self._is_fresh():
+            return self._token
+
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_async(session))
+            self._refresh_task.add_done_callback(_log_refresh_failure)
+
+        if self._is_valid():
+            # Early refresh keeps running in the background
+            return self._token
+        return await asyncio.shield(self._refresh_task)
+
+    def invalidate(self, token: Optional[str] = None):
+        """Drop the cached token, e.g. after a 401.
+
+        If ``token`` is given, only drop it if it is still the current one, so
+        that a token refreshed by another caller in the meantime survives.
+        """
+        with self._lock:
+            if token is not None and token != self._token:
+                return
+            self._token = None
+            self._expires_at = 0.0
+            try:
+                os.remove(self.token_file)
+            except FileNotFoundError:
+                pass
+
+
+def _log_refresh_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[ERROR] FFLogs token refresh failed: {task.exception()}")
+
+
+token_provider = TokenProvider()
+
+
+def get_access_token() -> str:
+    return token_provider.get_token()
+
+
+def is_unauthorized(exc: Exception) -> bool:
+    """True if ``exc`` is an HTTP 401 from requests or a gql transport."""
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None) or getattr(exc, "code", None)
+    return status == 401
+
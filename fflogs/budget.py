@@ -0,0 +1,226 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from monitoring.metrics import metrics
+
+# Request priorities; lower goes first
+INTERACTIVE = 0
+BACKGROUND = 1
+BULK = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", BULK: "bulk"}
+
+# Seconds between rateLimitData reads; points are tracked locally in between
+SYNC_INTERVAL = float(os.getenv("FFLOGS_BUDGET_SYNC", "120"))
+# Fraction of the hourly limit each priority must leave for the ones above it
+RESERVE = {
+    INTERACTIVE: 0.0,
+    BACKGROUND: float(os.getenv("FFLOGS_BACKGROUND_RESERVE", "0.25")),
+    BULK: float(os.getenv("FFLOGS_BULK_RESERVE", "0.4")),
+}
+# Below this fraction of the limit, commands trim legacy zones and lean on the cache
+LOW_WATERMARK = float(os.getenv("FFLOGS_BUDGET_LOW", "0.1"))
+# Requests allowed in flight at once; queued ones are granted in priority order
+MAX_IN_FLIGHT = int(os.getenv("FFLOGS_MAX_IN_FLIGHT", "6"))
+
+_priority: contextvars.ContextVar = contextvars.ContextVar("fflogs_priority", default=INTERACTIVE)
+
+
+class BudgetExhausted(Exception):
+    """Raised when an interactive request can't be afforded before the hourly reset."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"FFLogs API budget exhausted, resets in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def estimate_cost(query: str) -> float:
+    """Rough point cost of a query; every zoneRankings alias is the expensive part."""
+    return float(max(1, query.count("zoneRankings")))
+
+
+@contextmanager
+def priority(level: int):
+    """Run FFLogs requests made inside this block (and tasks it spawns) at ``level``."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class RateLimitBudget:
+    """Token bucket of FFLogs API points, refilled from ``rateLimitData``.
+
+    Points are deducted locally per request using :func:`estimate_cost` and
+    corrected whenever ``rateLimitData`` is read, so spending by other
+    processes on the same client ID (e.g. ``get_ids.py``) is picked up on the
+    next sync. Until the first sync the budget is unknown and nothing is held
+    back.
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT, sync_interval: float = SYNC_INTERVAL):
+        self.max_in_flight = max_in_flight
+        self.sync_interval = sync_interval
+        self.limit: Optional[float] = None
+        self.remaining: Optional[float] = None
+        self.reset_at = 0.0
+        self.synced_at = 0.0
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._sync_task: Optional[asyncio.Task] = None
+
+    def update(self, limits: Dict[str, float]):
+        now = time.time()
+        self.limit = float(limits["limitPerHour"])
+        self.remaining = self.limit - float(limits["pointsSpentThisHour"])
+        self.reset_at = now + float(limits["pointsResetIn"])
+        self.synced_at = now
+
+    def exhaust(self, retry_after: Optional[float] = None):
+        """FFLogs refused a request for rate limiting; spend nothing until the reset."""
+        self.remaining = 0.0
+        if retry_after is not None:
+            self.reset_at = time.time() + retry_after
+        elif self.reset_at <= time.time():
+            self.reset_at = time.time() + 3600
+
+    def _refill(self):
+        if self.remaining is not None and self.reset_at and time.time() >= self.reset_at:
+            # Full bucket after the hourly reset; the next sync corrects any drift
+            self.remaining = self.limit if self.limit is not None else None
+            self.reset_at = time.time() + 3600
+
+    @property
+    def known(self) -> bool:
+        return self.remaining is not None and self.limit is not None
+
+    def fraction_left(self) -> Optional[float]:
+        self._refill()
+        if not self.known or not self.limit:
+            return None
+        return max(0.0, self.remaining) / self.limit
+
+    @property
+    def low(self) -> bool:
+        fraction = self.fraction_left()
+        return fraction is not None and fraction < LOW_WATERMARK
+
+    def retry_after(self) -> float:
+        return max(0.0, self.reset_at - time.time())
+
+    def allows(self, level: int, cost: float = 1.0) -> bool:
+        self._refill()
+        if not self.known:
+            return True
+        return self.remaining - cost >= RESERVE.get(level, 0.0) * self.limit
+
+    def needs_sync(self) -> bool:
+        return time.time() - self.synced_at >= self.sync_interval
+
+    def sync_soon(self, read_limits: Callable[[], Awaitable[Dict[str, float]]]):
+        """Refresh from ``rateLimitData`` in the background if the last read is old."""
+        if not self.needs_sync() or (self._sync_task is not None and not self._sync_task.done()):
+            return
+        self._sync_task = asyncio.create_task(self.sync(read_limits))
+
+    async def sync(self, read_limits: Callable[[], Awaitable[Dict[str, float]]]) -> bool:
+        try:
+            self.update(await read_limits())
+            return True
+        except Exception as e:
+            # Try again next interval rather than on every request
+            self.synced_at = time.time()
+            print(f"[ERROR] Could not read FFLogs rate limit: {e}")
+            return False
+
+    async def _take_slot(self, level: int):
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as we were cancelled
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the highest-priority waiter
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    @asynccontextmanager
+    async def spend(self, cost: float = 1.0, level: Optional[int] = None):
+        """Hold a request slot and charge ``cost`` points for the duration of one request.
+
+        Interactive requests raise :class:`BudgetExhausted` when the bucket is
+        empty; background and bulk requests wait for the reset instead, and
+        stop short of the share reserved for higher priorities.
+        """
+        if level is None:
+            level = current_priority()
+        name = PRIORITY_NAMES.get(level, str(level))
+
+        while not self.allows(level, cost):
+            if level == INTERACTIVE:
+                metrics.inc("fflogs_budget_rejected_total", priority=name)
+                raise BudgetExhausted(self.retry_after())
+            wait = self.retry_after() + 1
+            metrics.inc("fflogs_budget_waits_total", priority=name)
+            print(f"[DEBUG] FFLogs {name} request waiting {wait:.0f}s for the API budget to reset.")
+            await asyncio.sleep(wait)
+
+        # Charge before queueing, so concurrent callers can't all pass the reserve check first
+        charged_at = self.synced_at if self.remaining is not None else None
+        if charged_at is not None:
+            self.remaining -= cost
+        queued = time.perf_counter()
+        try:
+            await self._take_slot(level)
+        except BaseException:
+            self._refund(cost, charged_at)
+            raise
+        metrics.observe("fflogs_queue_seconds", time.perf_counter() - queued, priority=name)
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+    def _refund(self, cost: float, charged_at: Optional[float]):
+        """Give back points for a request that was never sent, unless a sync has replaced them since."""
+        if charged_at is None or self.remaining is None or self.synced_at != charged_at:
+            return
+        self.remaining = min(self.remaining + cost, self.limit) if self.limit is not None else self.remaining + cost
+
+    def stats(self) -> Dict[str, float]:
+        fraction = self.fraction_left()
+        return {
+            "limit": self.limit or 0.0,
+            "remaining": max(0.0, self.remaining) if self.remaining is not None else 0.0,
+            "fraction_left": fraction if fraction is not None else 1.0,
+            "reset_in": self.retry_after(),
+            "in_flight": self._in_flight,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+        }
+
+
+budget = RateLimitBudget()
+metrics.gauge("fflogs_budget", budget.stats)
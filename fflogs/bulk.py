@@ -0,0 +1,95 @@
+import os
+import asyncio
+from typing import AsyncIterator, Dict, List, Tuple, Union
+
+from fflogs.cache import ZoneData, parse_cache
+from fflogs.budget import budget
+from fflogs.client import fetch_zone_rankings, store_parses
+from fflogs.utils import merge_zone_data
+
+ZoneList = Tuple[Union[int, None], ...]
+
+# Characters per aliased query and queries in flight for one bulk fetch
+BULK_BATCH_SIZE = int(os.getenv("FFLOGS_BULK_BATCH_SIZE", "5"))
+BULK_CONCURRENCY = int(os.getenv("FFLOGS_BULK_CONCURRENCY", "3"))
+
+
+def plan_batches(needs: Dict[int, ZoneList], batch_size: int = BULK_BATCH_SIZE) -> List[Tuple[List[int], List[Union[int, None]]]]:
+    """Group characters that need the same zones, so each group shares one aliased query."""
+    groups: Dict[ZoneList, List[int]] = {}
+    for character_id, zones in needs.items():
+        if zones:
+            groups.setdefault(zones, []).append(character_id)
+
+    batches = []
+    for zones, ids in groups.items():
+        for i in range(0, len(ids), batch_size):
+            batches.append((ids[i:i + batch_size], list(zones)))
+    return batches
+
+
+async def stream_parses(
+    character_ids: List[int],
+    zone_ids: List[Union[int, None]],
+    batch_size: int = BULK_BATCH_SIZE,
+    concurrency: int = BULK_CONCURRENCY
+) -> AsyncIterator[Tuple[int, ZoneData, List[Union[int, None]]]]:
+    """Yield ``(character_id, merged parses, failed zones)`` for each character as soon as it's ready.
+
+    Characters whose zones are all fresh in the parse cache come first, with
+    no request at all. The rest are fetched several characters per query,
+    ``concurrency`` queries at a time, and written back to the cache. A
+    zone that fails falls back to its stale cached copy if there is one.
+    While the API budget is low, stale entries are served without refetching.
+    """
+    serve_stale = budget.low
+    zone_results: Dict[int, Dict[Union[int, None], ZoneData]] = {}
+    needs: Dict[int, ZoneList] = {}
+    for character_id in character_ids:
+        results = zone_results.setdefault(character_id, {})
+        missing = []
+        for zone_id in zone_ids:
+            cached = parse_cache.get(character_id, zone_id)
+            if cached is not None:
+                results[zone_id] = cached[0]
+                if cached[1] or serve_stale:
+                    continue
+            missing.append(zone_id)
+        needs[character_id] = tuple(missing)
+
+    def merged(character_id: int) -> ZoneData:
+        final_data: ZoneData = {}
+        for zone_id in zone_ids:
+            if zone_id in zone_results[character_id]:
+                merge_zone_data(final_data, zone_results[character_id][zone_id])
+        return final_data
+
+    for character_id in character_ids:
+        if not needs[character_id]:
+            yield character_id, merged(character_id), []
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(ids: List[int], zones: List[Union[int, None]]):
+        async with semaphore:
+            try:
+                results, errors = await fetch_zone_rankings(ids, zones)
+            except Exception as e:
+                print(f"[ERROR] Bulk fetch failed for {len(ids)} character(s): {e}")
+                results, errors = {}, {(character_id, zone_id): str(e) for character_id in ids for zone_id in zones}
+            return ids, zones, results, errors
+
+    tasks = [asyncio.create_task(fetch(ids, zones)) for ids, zones in plan_batches(needs, batch_size)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            ids, zones, results, errors = await next_done
+            for character_id in ids:
+                for zone_id, zone_data in results.get(character_id, {}).items():
+                    store_parses(character_id, zone_id, zone_data)
+                    zone_results[character_id][zone_id] = zone_data
+                failed = [zone_id for zone_id in zones if (character_id, zone_id) in errors]
+                yield character_id, merged(character_id), failed
+    finally:
+        # The consumer may stop early; don't leave fetches running for nobody
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,395 @@
+import os
+import json
+import time
+import atexit
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from fflogs.auth import DATA_DIR
+from monitoring.metrics import metrics
+
+PARSE_CACHE_FILE = os.path.join(DATA_DIR, "parse_cache.json")
+
+# Seconds a cached zone counts as fresh; older entries are served stale and refreshed
+PARSE_CACHE_TTL = float(os.getenv("PARSE_CACHE_TTL", "900"))
+PARSE_CACHE_SIZE = int(os.getenv("PARSE_CACHE_SIZE", "2048"))
+# SQLite file shared by every bot process on the host (e.g. data/parse_cache.db); unset for memory + snapshot only
+PARSE_CACHE_DB = os.getenv("PARSE_CACHE_DB", "")
+# Seconds to gather writes to the shared SQLite file before committing them together
+PARSE_CACHE_DB_FLUSH_DELAY = float(os.getenv("PARSE_CACHE_DB_FLUSH_DELAY", "1"))
+# Milliseconds a shared read may wait on a write lock; it runs on the event loop, so keep this small
+PARSE_CACHE_DB_READ_TIMEOUT = int(os.getenv("PARSE_CACHE_DB_READ_TIMEOUT", "50"))
+# Seconds to skip the shared tier after a read found it locked
+PARSE_CACHE_DB_BACKOFF = 5.0
+
+ZoneKey = Tuple[int, Union[int, None]]
+ZoneData = Dict[int, Dict[str, Union[str, float, int]]]
+
+
+def _encounter_rows(data: ZoneData) -> list:
+    # [[eid, name, percentile, spec, kills], ...], for the shared store and the snapshot alike
+    return [[eid, d.get("encounter_name"), d.get("percentile"), d.get("spec"), d.get("kills")] for eid, d in data.items()]
+
+
+def _encode(data: ZoneData) -> str:
+    return json.dumps(_encounter_rows(data), separators=(",", ":"))
+
+
+def _decode(encounters) -> ZoneData:
+    return {
+        eid: {"encounter_name": name, "percentile": pct, "spec": spec, "kills": kills}
+        for eid, name, pct, spec, kills in encounters
+    }
+
+
+class SharedParseStore:
+    """Zone rankings in SQLite (WAL), shared by several bot processes on one host.
+
+    Sits behind each process's in-memory LRU: a zone fetched by one shard
+    process is served to the others without another FFLogs request.
+
+    Only reads run on the event loop, on their own connection with a short
+    busy timeout; if the file is locked the shared tier is skipped for a
+    few seconds rather than stalling every command. Writes and deletes are
+    buffered and committed together in a thread, like votes.
+    """
+
+    def __init__(self, path: str, flush_delay: float = PARSE_CACHE_DB_FLUSH_DELAY, read_timeout: int = PARSE_CACHE_DB_READ_TIMEOUT):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.read_timeout = read_timeout
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        # Buffered until the next commit; _writing/_deleting are the batch being committed right now
+        self._puts: Dict[ZoneKey, Tuple[float, ZoneData]] = {}
+        self._deletes: set = set()
+        self._writing: Dict[ZoneKey, Tuple[float, ZoneData]] = {}
+        self._deleting: set = set()
+        self._skip_until = 0.0
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._pending: set = set()
+        atexit.register(self.flush_sync)
+
+    def _open(self, busy_timeout: int) -> sqlite3.Connection:
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS parses (
+                character_id INTEGER NOT NULL,
+                zone         TEXT NOT NULL,
+                fetched_at   REAL NOT NULL,
+                encounters   TEXT NOT NULL,
+                PRIMARY KEY (character_id, zone)
+            )
+        """)
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._open(5000)
+        return self._conn
+
+    @staticmethod
+    def _zone(zone_id: Union[int, None]) -> str:
+        return "latest" if zone_id is None else str(zone_id)
+
+    def get(self, character_id: int, zone_id: Union[int, None]) -> Optional[Tuple[float, ZoneData]]:
+        key = (character_id, zone_id)
+        for buffered in (self._puts, self._writing):
+            if key in buffered:
+                return buffered[key]
+        if character_id in self._deletes or character_id in self._deleting or time.time() < self._skip_until:
+            return None
+        try:
+            if self._reader is None:
+                self._reader = self._open(self.read_timeout)
+            row = self._reader.execute(
+                "SELECT fetched_at, encounters FROM parses WHERE character_id = ? AND zone = ?",
+                (character_id, self._zone(zone_id))
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # Locked by another process's write: serve from memory for a while instead of waiting
+            self._skip_until = time.time() + PARSE_CACHE_DB_BACKOFF
+            metrics.inc("parse_cache_shared_busy_total")
+            raise
+        if row is None:
+            return None
+        return row[0], _decode(json.loads(row[1]))
+
+    def put(self, character_id: int, zone_id: Union[int, None], fetched_at: float, data: ZoneData):
+        key = (character_id, zone_id)
+        pending = self._puts.get(key)
+        if pending is None or fetched_at >= pending[0]:
+            self._puts[key] = (fetched_at, data)
+        self._schedule_flush()
+
+    def invalidate(self, character_id: int):
+        for key in [k for k in self._puts if k[0] == character_id]:
+            del self._puts[key]
+        self._deletes.add(character_id)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (scripts): write straight away
+            self.flush_sync()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _write(self, puts: Dict[ZoneKey, Tuple[float, ZoneData]], deletes: set):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Deletes first: puts buffered after an invalidate are newer than it
+                conn.executemany("DELETE FROM parses WHERE character_id = ?", [(cid,) for cid in deletes])
+                # Keep whichever process's copy is newer
+                conn.executemany("""
+                    INSERT INTO parses (character_id, zone, fetched_at, encounters) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (character_id, zone) DO UPDATE SET
+                        fetched_at = excluded.fetched_at,
+                        encounters = excluded.encounters
+                    WHERE excluded.fetched_at > parses.fetched_at
+                """, [
+                    (character_id, self._zone(zone_id), fetched_at, _encode(data))
+                    for (character_id, zone_id), (fetched_at, data) in puts.items()
+                ])
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+    def _take(self) -> bool:
+        self._writing, self._puts = self._puts, {}
+        self._deleting, self._deletes = self._deletes, set()
+        return bool(self._writing or self._deleting)
+
+    def _restore(self):
+        # Anything buffered since is newer and wins
+        for key, entry in self._writing.items():
+            if key not in self._puts and key[0] not in self._deletes:
+                self._puts[key] = entry
+        self._deletes |= self._deleting
+        self._writing, self._deleting = {}, set()
+
+    async def flush(self):
+        """Commit buffered writes now, without blocking the event loop."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._take():
+                return
+            try:
+                await asyncio.to_thread(self._write, self._writing, self._deleting)
+            except sqlite3.Error as e:
+                print(f"[ERROR] Shared parse cache write failed: {e}")
+                self._restore()
+                return
+            self._writing, self._deleting = {}, set()
+
+    def flush_sync(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._take():
+            return
+        try:
+            self._write(self._writing, self._deleting)
+        except sqlite3.Error as e:
+            print(f"[ERROR] Shared parse cache write failed: {e}")
+            self._restore()
+            return
+        self._writing, self._deleting = {}, set()
+
+
+class ParseCache:
+    """LRU cache of zone rankings keyed by ``(character_id, zone_id)``.
+
+    Entries older than ``ttl`` are still returned (stale-while-revalidate);
+    the caller is told they are stale so it can refresh them in the background.
+    With a ``shared`` store, misses and stale entries are looked up there
+    before giving up, and every put is written behind to it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PARSE_CACHE_SIZE,
+        ttl: float = PARSE_CACHE_TTL,
+        snapshot_file: str = PARSE_CACHE_FILE,
+        shared: Optional[SharedParseStore] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.snapshot_file = snapshot_file
+        self.shared = shared
+        self._entries: "OrderedDict[ZoneKey, Tuple[float, ZoneData]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        # Bumped whenever a character's cached rankings actually change, so derived views know to rebuild
+        self._versions: Dict[int, int] = {}
+        # Entries changed since the last snapshot
+        self._dirty = False
+
+    def _lookup(self, key: ZoneKey) -> Optional[Tuple[float, ZoneData]]:
+        entry = self._entries.get(key)
+        if self.shared is None or (entry is not None and time.time() - entry[0] < self.ttl):
+            return entry
+        # Another process may have fetched it, or refreshed it more recently
+        try:
+            shared = self.shared.get(*key)
+        except sqlite3.Error as e:
+            print(f"[ERROR] Shared parse cache read failed: {e}")
+            return entry
+        if shared is not None and (entry is None or shared[0] > entry[0]):
+            self.shared_hits += 1
+            self._store(key, shared)
+            return shared
+        return entry
+
+    def _store(self, key: ZoneKey, entry: Tuple[float, ZoneData]):
+        previous = self._entries.get(key)
+        if previous is None or previous[1] != entry[1]:
+            self._versions[key[0]] = self._versions.get(key[0], 0) + 1
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._dirty = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, character_id: int, zone_id: Union[int, None]) -> Optional[Tuple[ZoneData, bool]]:
+        """Return ``(data, is_fresh)`` or None on a miss."""
+        key = (character_id, zone_id)
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        fetched_at, data = entry
+        fresh = time.time() - fetched_at < self.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return data, fresh
+
+    def age(self, character_id: int, zone_id: Union[int, None]) -> Optional[float]:
+        entry = self._lookup((character_id, zone_id))
+        return time.time() - entry[0] if entry else None
+
+    def put(self, character_id: int, zone_id: Union[int, None], data: ZoneData, fetched_at: Optional[float] = None):
+        entry = (fetched_at or time.time(), data)
+        self._store((character_id, zone_id), entry)
+        if self.shared is not None:
+            self.shared.put(character_id, zone_id, *entry)
+
+    def version(self, character_id: int) -> int:
+        """Changes whenever ``character_id``'s cached rankings change."""
+        return self._versions.get(character_id, 0)
+
+    def invalidate(self, character_id: int):
+        self._versions[character_id] = self._versions.get(character_id, 0) + 1
+        for key in [k for k in self._entries if k[0] == character_id]:
+            del self._entries[key]
+            self._dirty = True
+        if self.shared is not None:
+            self.shared.invalidate(character_id)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "shared_hits": self.shared_hits,
+            "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+    async def flush(self):
+        """Commit writes still buffered for the shared store."""
+        if self.shared is not None:
+            await self.shared.flush()
+
+    def _snapshot_rows(self) -> list:
+        # [character_id, zone_id, fetched_at, [[eid, name, percentile, spec, kills], ...]]
+        rows = []
+        for (character_id, zone_id), (fetched_at, data) in self._entries.items():
+            rows.append([character_id, zone_id, round(fetched_at, 1), _encounter_rows(data)])
+        return rows
+
+    def _write_snapshot(self, rows: list):
+        os.makedirs(os.path.dirname(self.snapshot_file), exist_ok=True)
+        tmp_path = self.snapshot_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(rows, f, separators=(",", ":"))
+        os.replace(tmp_path, self.snapshot_file)
+        print(f"[DEBUG] Saved {len(rows)} cached zone rankings to {self.snapshot_file}")
+
+    async def save_snapshot(self, force: bool = False):
+        """Write the snapshot off the event loop if anything changed since the last one (or ``force``)."""
+        if self.shared is not None or not (self._dirty or force):
+            # Shared: already persisted, and several processes would race on one file
+            return
+        # Rows are built on the loop so they're consistent; only serialising and writing is threaded
+        rows = self._snapshot_rows()
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._write_snapshot, rows)
+        except Exception:
+            self._dirty = True
+            raise
+
+    def _read_snapshot(self) -> List[Tuple[ZoneKey, Tuple[float, ZoneData]]]:
+        if self.shared is not None or not os.path.exists(self.snapshot_file):
+            return []
+        try:
+            with open(self.snapshot_file, "r") as f:
+                rows = json.load(f)
+            return [((character_id, zone_id), (fetched_at, _decode(encounters))) for character_id, zone_id, fetched_at, encounters in rows]
+        except Exception as e:
+            print(f"[ERROR] Ignoring unreadable parse cache snapshot: {e}")
+            return []
+
+    async def load_snapshot(self):
+        """Read the snapshot in a thread; call once at startup (setup_hook), before the cache is used."""
+        loaded = await asyncio.to_thread(self._read_snapshot)
+        if not loaded:
+            return
+        # Anything put since startup is newer than the snapshot and stays most recently used
+        entries = OrderedDict(loaded)
+        for key, entry in self._entries.items():
+            entries.pop(key, None)
+            entries[key] = entry
+        self._entries = entries
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        print(f"[DEBUG] Loaded {len(loaded)} cached zone rankings from disk.")
+
+
+parse_cache = ParseCache(shared=SharedParseStore(PARSE_CACHE_DB) if PARSE_CACHE_DB else None)
+metrics.gauge("parse_cache", parse_cache.stats)
@@ -0,0 +1,118 @@
+"""The compiled encounter catalog the bot reads all encounter knowledge from.
+
+fflogs/encounter_catalog.json is generated from FFLogs by ``get_ids.py``;
+rebuild it when a new tier or ultimate comes out::
+
+    python get_ids.py
+
+Zones are keyed by FFLogs zone ID, except the current savage tier, which is
+stored under ``"latest"`` and queried without a zone ID (``None`` in code).
+"""
+import os
+import json
+from typing import Dict, Iterable, List, Optional, Union
+
+# Bump when the stored file layout changes
+CATALOG_VERSION = 1
+CATALOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "encounter_catalog.json")
+
+LATEST = "latest"
+
+ZoneId = Union[int, None]
+
+
+def zone_from_key(key: str) -> ZoneId:
+    return None if key == LATEST else int(key)
+
+
+def zone_key(zone_id: ZoneId) -> str:
+    return LATEST if zone_id is None else str(zone_id)
+
+
+class DisplayGroup:
+    """One line in a view: an encounter, or the same fight merged across zones (e.g. DSR in zones 45 and 59)."""
+
+    def __init__(self, name: str, encounter_ids: List[int]):
+        self.name = name
+        self.encounter_ids = encounter_ids
+
+
+class Section:
+    def __init__(self, key: str, label: str, groups: List[DisplayGroup], current: bool = False, merge: bool = False):
+        self.key = key
+        self.label = label
+        self.groups = groups
+        # Current content is refreshed more often and kept when the API budget runs low
+        self.current = current
+        # Groups span several encounters whose parses are combined
+        self.merge = merge
+
+    @property
+    def encounter_ids(self) -> List[int]:
+        return [eid for group in self.groups for eid in group.encounter_ids]
+
+
+class EncounterCatalog:
+    def __init__(self, raw: dict):
+        self.version = raw["version"]
+        self.generated_at = raw.get("generated_at")
+
+        # zone -> encounters, in query order
+        self.encounters_by_zone: Dict[ZoneId, List[int]] = {
+            zone_from_key(key): zone["encounters"] for key, zone in raw["zones"].items()
+        }
+        self.zone_names: Dict[ZoneId, str] = {zone_from_key(key): zone["name"] for key, zone in raw["zones"].items()}
+
+        # encounter -> zone / name / display group
+        self.zone_of: Dict[int, ZoneId] = {}
+        self.encounter_names: Dict[int, str] = {}
+        self.display_group: Dict[int, str] = {}
+        for eid, encounter in raw["encounters"].items():
+            self.zone_of[int(eid)] = zone_from_key(encounter["zone"])
+            self.encounter_names[int(eid)] = encounter["name"]
+            self.display_group[int(eid)] = encounter["group"]
+
+        self.sections: List[Section] = [
+            Section(
+                section["key"],
+                section["label"],
+                [DisplayGroup(group["name"], group["encounters"]) for group in section["groups"]],
+                current=section.get("current", False),
+                merge=section.get("merge", False)
+            )
+            for section in raw["sections"]
+        ]
+
+        current = {self.zone_of[eid] for section in self.sections if section.current for eid in section.encounter_ids}
+        self.current_zones: List[ZoneId] = [zone_id for zone_id in self.encounters_by_zone if zone_id in current]
+        self.legacy_zones: List[ZoneId] = [zone_id for zone_id in self.encounters_by_zone if zone_id not in current]
+
+    def section(self, key: str) -> Section:
+        for section in self.sections:
+            if section.key == key:
+                return section
+        raise KeyError(key)
+
+    def zones_for(self, encounter_ids: Iterable[int]) -> List[ZoneId]:
+        """The fewest zones that cover ``encounter_ids``, in catalog order."""
+        needed = {self.zone_of[eid] for eid in encounter_ids if eid in self.zone_of}
+        return [zone_id for zone_id in self.encounters_by_zone if zone_id in needed]
+
+
+_catalog: Optional[EncounterCatalog] = None
+
+
+def load_catalog(path: str = CATALOG_FILE) -> EncounterCatalog:
+    with open(path, "r") as f:
+        raw = json.load(f)
+    if raw.get("version") != CATALOG_VERSION:
+        raise ValueError(f"{path} has version {raw.get('version')}, expected {CATALOG_VERSION}. Run `python get_ids.py`.")
+    return EncounterCatalog(raw)
+
+
+def get_catalog() -> EncounterCatalog:
+    """The catalog, read from disk on first use and shared after that."""
+    global _catalog
+    if _catalog is None:
+        _catalog = load_catalog()
+    return _catalog
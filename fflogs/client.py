@@ -0,0 +1,563 @@
+import os
+import time
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+import aiohttp
+
+from fflogs.auth import token_provider
+from fflogs.schema import validate_query
+from fflogs.cache import ZoneData, parse_cache
+from fflogs.singleflight import SingleFlight, request_key
+from fflogs.budget import budget, priority, estimate_cost, current_priority, BudgetExhausted, BACKGROUND, INTERACTIVE, PRIORITY_NAMES
+from monitoring.metrics import metrics
+from storage.history import parse_history
+from fflogs.utils import (
+    ENCOUNTER_IDS_BY_ZONE,
+    LEGACY_ZONES,
+    zone_rankings_request,
+    zone_alias,
+    character_alias,
+    build_zone_rankings_query,
+    build_character_lookup_query,
+    lookup_alias,
+    CharacterRef,
+    parse_zone_rankings,
+    merge_zone_data
+)
+
+API_URL = os.getenv("FFLOGS_API_URL", "https://www.fflogs.com/api/v2/client")
+
+# Seconds; a slow FFLogs should fail a command, not hang it
+REQUEST_TIMEOUT = float(os.getenv("FFLOGS_TIMEOUT", "15"))
+CONNECT_TIMEOUT = float(os.getenv("FFLOGS_CONNECT_TIMEOUT", "5"))
+MAX_CONNECTIONS = int(os.getenv("FFLOGS_MAX_CONNECTIONS", "10"))
+
+# Fetch all zones in one aliased query instead of one request per zone
+BATCH_ZONES = os.getenv("FFLOGS_BATCH_ZONES", "1") != "0"
+# Seconds a progressive view waits for fresh zones before settling for the cached ones
+ZONE_DEADLINE = float(os.getenv("FFLOGS_ZONE_DEADLINE", "4"))
+# Seconds to remember that a character doesn't exist, so typos aren't looked up again and again
+NOT_FOUND_TTL = float(os.getenv("FFLOGS_NOT_FOUND_TTL", "3600"))
+
+CHARACTER_BY_ID_QUERY = """
+query ($id: Int!) {
+  characterData {
+    character(id: $id) {
+      name
+      server {
+        name
+      }
+    }
+  }
+}
+"""
+
+CHARACTER_BY_NAME_QUERY = """
+query ($name: String!, $server: String!, $region: String!) {
+  characterData {
+    character(name: $name, serverSlug: $server, serverRegion: $region) {
+      id
+      name
+      server { name }
+    }
+  }
+}
+"""
+
+RATE_LIMIT_QUERY = """
+query {
+  rateLimitData {
+    limitPerHour
+    pointsSpentThisHour
+    pointsResetIn
+  }
+}
+"""
+
+_session: Optional[aiohttp.ClientSession] = None
+_background_refreshes: Dict[int, asyncio.Task] = {}
+# Zone fetches that missed their deadline, kept alive so they still fill the cache
+_late_refreshes: Set[asyncio.Task] = set()
+# Identical requests already on their way to FFLogs are shared, not repeated
+_in_flight = SingleFlight("fflogs")
+# Normalised character ref -> when FFLogs said it doesn't exist
+_not_found: Dict[CharacterRef, float] = {}
+
+
+class FFLogsError(Exception):
+    """Raised when FFLogs answers a query with GraphQL errors and no data."""
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=60, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT)
+        _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def get_access_token() -> str:
+    return await token_provider.get_token_async(get_session())
+
+
+async def execute_with_errors(query: str, variables: Optional[dict] = None, operation: str = "query") -> Tuple[dict, list]:
+    """POST a GraphQL query and return ``(data, errors)``, retrying once on a 401.
+
+    Partial results are returned as-is so batched queries can report errors
+    per alias; only a response with no data at all raises. Every request is
+    charged against the API budget at the caller's priority (see
+    :mod:`fflogs.budget`). Concurrent identical requests share one call to
+    FFLogs, so the returned data must not be mutated. A caller only joins a
+    call made at its own priority or a higher one, so an interactive command
+    never waits out a background request's reserve.
+    """
+    validate_query(query)
+    level = current_priority()
+    key = request_key(query, variables)
+
+    async def call() -> Tuple[dict, list]:
+        budget.sync_soon(get_rate_limit)
+        async with budget.spend(estimate_cost(query), level):
+            with metrics.timer("fflogs_request_seconds", operation=operation):
+                return await _post_query(query, variables)
+
+    higher = [(other,) + key for other in sorted(PRIORITY_NAMES) if other < level]
+    return await _in_flight.do((level,) + key, call, joinable=higher)
+
+
+async def _post_query(query: str, variables: Optional[dict]) -> Tuple[dict, list]:
+    session = get_session()
+    payload = {"query": query, "variables": variables or {}}
+
+    for attempt in range(2):
+        token = await get_access_token()
+        headers = {"Authorization": f"Bearer {token}"}
+        async with session.post(API_URL, json=payload, headers=headers) as response:
+            if response.status == 401 and attempt == 0:
+                print("[DEBUG] FFLogs token rejected, refreshing and retrying once.")
+                token_provider.invalidate(token)
+                continue
+            if response.status == 429:
+                retry_after = response.headers.get("Retry-After")
+                budget.exhaust(float(retry_after) if retry_after else None)
+                raise BudgetExhausted(budget.retry_after())
+            response.raise_for_status()
+            result = await response.json()
+
+        if result.get("data") is None:
+            messages = "; ".join(err.get("message", "unknown") for err in result.get("errors", []))
+            raise FFLogsError(messages or "Empty response from FFLogs")
+        return result["data"], result.get("errors") or []
+
+
+async def execute(query: str, variables: Optional[dict] = None, operation: str = "query") -> dict:
+    """POST a GraphQL query and return its ``data``."""
+    data, _ = await execute_with_errors(query, variables, operation)
+    return data
+
+
+async def fetch_rankings_by_zone(character_id: int, zone_id: Union[int, None]) -> ZoneData:
+    query, variables = zone_rankings_request(character_id, zone_id)
+    zone = zone_id or "latest"
+    try:
+        with metrics.timer("fflogs_zone_seconds", zone=zone):
+            result = await execute(query, variables, operation="zone_rankings")
+            return parse_zone_rankings(result["characterData"]["character"]["zoneRankings"], zone_id)
+    except Exception:
+        metrics.inc("fflogs_zone_errors_total", zone=zone)
+        raise
+
+
+async def fetch_zone_rankings(
+    character_ids: List[int],
+    zone_ids: List[Union[int, None]]
+) -> Tuple[Dict[int, Dict[Union[int, None], ZoneData]], Dict[Tuple[int, Union[int, None]], str]]:
+    """Fetch rankings for several characters and zones in a single request.
+
+    Returns ``(zone_results, errors)`` where ``zone_results`` maps character
+    ID to ``{zone_id: encounter data}`` and ``errors`` maps
+    ``(character_id, zone_id)`` to a message for every alias that failed.
+    One bad zone never fails the batch.
+    """
+    start = time.perf_counter()
+    query, variables = build_zone_rankings_query(character_ids, zone_ids)
+    data, graphql_errors = await execute_with_errors(query, variables, operation="zone_rankings_batch")
+    elapsed = time.perf_counter() - start
+    for zone_id in zone_ids:
+        # Every zone in a batch shares the request's latency
+        metrics.observe("fflogs_zone_seconds", elapsed, zone=zone_id or "latest")
+
+    errors: Dict[Tuple[int, Union[int, None]], str] = {}
+    failed_aliases = {}
+    for err in graphql_errors:
+        path = err.get("path") or []
+        failed_aliases[tuple(path[1:3])] = err.get("message", "unknown error")
+
+    zone_results: Dict[int, Dict[Union[int, None], ZoneData]] = {}
+    character_data = data.get("characterData") or {}
+    for c_index, character_id in enumerate(character_ids):
+        c_alias = character_alias(c_index)
+        character = character_data.get(c_alias)
+        results = zone_results.setdefault(character_id, {})
+
+        for z_index, zone_id in enumerate(zone_ids):
+            z_alias = zone_alias(z_index)
+            if not character:
+                errors[(character_id, zone_id)] = failed_aliases.get((c_alias,)) or failed_aliases.get((c_alias, z_alias)) or "Character not found"
+                continue
+            if (c_alias, z_alias) in failed_aliases:
+                errors[(character_id, zone_id)] = failed_aliases[(c_alias, z_alias)]
+                continue
+            try:
+                results[zone_id] = parse_zone_rankings(character.get(z_alias), zone_id)
+            except Exception as e:
+                errors[(character_id, zone_id)] = str(e)
+
+    for (_, zone_id) in errors:
+        metrics.inc("fflogs_zone_errors_total", zone=zone_id or "latest")
+    return zone_results, errors
+
+
+async def get_parses_for_characters(
+    character_ids: List[int],
+    zone_ids: Optional[List[Union[int, None]]] = None
+) -> Tuple[Dict[int, ZoneData], Dict[Tuple[int, Union[int, None]], str]]:
+    """Like :func:`fetch_zone_rankings`, but merged into one dict per character."""
+    if zone_ids is None:
+        zone_ids = list(ENCOUNTER_IDS_BY_ZONE)
+
+    zone_results, errors = await fetch_zone_rankings(character_ids, zone_ids)
+    parses: Dict[int, ZoneData] = {}
+    for character_id in character_ids:
+        final_data = parses.setdefault(character_id, {})
+        for zone_id in zone_ids:
+            if zone_id in zone_results[character_id]:
+                merge_zone_data(final_data, zone_results[character_id][zone_id])
+
+    return parses, errors
+
+
+async def _fetch_zones(character_id: int, zone_ids: List[Union[int, None]], batched: bool) -> Dict[Union[int, None], ZoneData]:
+    if batched:
+        zone_results, errors = await fetch_zone_rankings([character_id], zone_ids)
+        for (_, zone_id), message in errors.items():
+            print(f"[ERROR] Failed to fetch parses for zone {zone_id}: {message}")
+        return zone_results[character_id]
+
+    # Zones are independent, so fetch them concurrently
+    results = await asyncio.gather(
+        *(fetch_rankings_by_zone(character_id, zone_id) for zone_id in zone_ids),
+        return_exceptions=True
+    )
+    if results and all(isinstance(r, BudgetExhausted) for r in results):
+        raise results[0]
+    zone_results = {}
+    for zone_id, zone_data in zip(zone_ids, results):
+        if isinstance(zone_data, Exception):
+            print(f"[ERROR] Failed to fetch parses for zone {zone_id}: {zone_data}")
+            continue
+        zone_results[zone_id] = zone_data
+    return zone_results
+
+
+def store_parses(character_id: int, zone_id: Union[int, None], zone_data: ZoneData):
+    """Cache freshly fetched rankings and append whatever changed to the parse history."""
+    parse_cache.put(character_id, zone_id, zone_data)
+    try:
+        parse_history.record(character_id, zone_data)
+    except Exception as e:
+        print(f"[ERROR] Failed to record parse history for character {character_id}: {e}")
+
+
+async def refresh_parses(
+    character_id: int,
+    zone_ids: Optional[List[Union[int, None]]] = None,
+    batched: bool = BATCH_ZONES
+) -> Dict[Union[int, None], ZoneData]:
+    """Fetch zones from FFLogs and store them in the parse cache and history."""
+    if zone_ids is None:
+        zone_ids = list(ENCOUNTER_IDS_BY_ZONE)
+
+    zone_results = await _fetch_zones(character_id, zone_ids, batched)
+    for zone_id, zone_data in zone_results.items():
+        store_parses(character_id, zone_id, zone_data)
+    return zone_results
+
+
+def _refresh_in_background(character_id: int, zone_ids: List[Union[int, None]], batched: bool):
+    task = _background_refreshes.get(character_id)
+    if task is not None and not task.done():
+        return
+    if not budget.allows(BACKGROUND, len(zone_ids)):
+        # Stale data will do until the budget recovers
+        return
+
+    async def run():
+        try:
+            with priority(BACKGROUND):
+                await refresh_parses(character_id, zone_ids, batched)
+        except Exception as e:
+            print(f"[ERROR] Background refresh failed for character {character_id}: {e}")
+        finally:
+            _background_refreshes.pop(character_id, None)
+
+    _background_refreshes[character_id] = asyncio.create_task(run())
+
+
+def _trim_for_budget(character_id: int, zone_ids: List[Union[int, None]]) -> List[Union[int, None]]:
+    if not (zone_ids and budget.low and current_priority() == INTERACTIVE):
+        return zone_ids
+    # Running short on API points: current tiers first, legacy zones once the budget recovers
+    trimmed = [zone_id for zone_id in zone_ids if zone_id in LEGACY_ZONES]
+    if trimmed:
+        print(f"[DEBUG] FFLogs budget low, skipping legacy zones {trimmed} for character {character_id}.")
+        metrics.inc("fflogs_budget_trimmed_total", len(trimmed))
+    return [zone_id for zone_id in zone_ids if zone_id not in LEGACY_ZONES]
+
+
+def cached_zones(
+    character_id: int,
+    zone_ids: List[Union[int, None]]
+) -> Tuple[Dict[Union[int, None], ZoneData], Dict[Union[int, None], float], List[Union[int, None]]]:
+    """What the cache knows right now, without touching FFLogs.
+
+    Returns ``(zone_results, ages, to_refresh)``: cached data and its age in
+    seconds per zone, and the zones that are missing or stale (minus legacy
+    zones while the budget is low).
+    """
+    zone_results, ages, to_refresh = {}, {}, []
+    for zone_id in zone_ids:
+        cached = parse_cache.get(character_id, zone_id)
+        if cached is None:
+            to_refresh.append(zone_id)
+            continue
+        zone_results[zone_id], fresh = cached
+        ages[zone_id] = parse_cache.age(character_id, zone_id) or 0.0
+        if not fresh:
+            to_refresh.append(zone_id)
+    return zone_results, ages, _trim_for_budget(character_id, to_refresh)
+
+
+def _finish_late(task: asyncio.Task):
+    _late_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[ERROR] Late zone refresh failed: {task.exception()}")
+
+
+async def stream_zones(
+    character_id: int,
+    zone_ids: List[Union[int, None]],
+    deadline: Optional[float] = ZONE_DEADLINE,
+    batched: bool = BATCH_ZONES
+) -> AsyncIterator[Tuple[Union[int, None], Optional[ZoneData]]]:
+    """Refresh zones and yield ``(zone_id, data)`` as each lands.
+
+    ``data`` is None when that zone failed. Batched, current-tier zones and
+    legacy zones go out as two requests so the current tier shows first;
+    unbatched, every zone is its own request. Each request gets its own
+    ``deadline`` (seconds from when it was sent; None: no deadline), which
+    applies to every zone it carries: zones whose request misses it are not
+    waited for, and the request carries on in the background so its result
+    lands in the cache for next time.
+    """
+    if batched:
+        groups = [
+            [zone_id for zone_id in zone_ids if zone_id not in LEGACY_ZONES],
+            [zone_id for zone_id in zone_ids if zone_id in LEGACY_ZONES]
+        ]
+    else:
+        groups = [[zone_id] for zone_id in zone_ids]
+
+    loop = asyncio.get_running_loop()
+    tasks: Dict[asyncio.Future, List[Union[int, None]]] = {}
+    ends_at: Dict[asyncio.Future, float] = {}
+    for group in groups:
+        if group:
+            task = asyncio.ensure_future(refresh_parses(character_id, group, batched))
+            tasks[task] = group
+            if deadline is not None:
+                ends_at[task] = loop.time() + deadline
+    pending = set(tasks)
+    late: Set[asyncio.Future] = set()
+    try:
+        while pending:
+            expired = {task for task in pending if task in ends_at and ends_at[task] <= loop.time()}
+            late |= expired
+            pending -= expired
+            if not pending:
+                break
+            timeout = min(ends_at[task] for task in pending) - loop.time() if ends_at else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    print(f"[ERROR] Failed to fetch parses for zones {tasks[task]}: {task.exception()}")
+                    zone_results = {}
+                else:
+                    zone_results = task.result()
+                for zone_id in tasks[task]:
+                    yield zone_id, zone_results.get(zone_id)
+    finally:
+        # Missed their deadline, or the caller stopped listening
+        late |= pending
+        if late:
+            zones = [zone_id for task in late for zone_id in tasks[task]]
+            print(f"[DEBUG] Zones {zones} missed the {deadline}s deadline for character {character_id}; using cached data.")
+            metrics.inc("fflogs_zone_deadline_missed_total", len(zones))
+        for task in late:
+            _late_refreshes.add(task)
+            task.add_done_callback(_finish_late)
+
+
+async def get_parses_for_fights(
+    character_id: int,
+    batched: bool = BATCH_ZONES,
+    use_cache: bool = True,
+    zone_ids: Optional[List[Union[int, None]]] = None
+) -> ZoneData:
+    """Merged rankings for ``zone_ids`` (default: every catalog zone).
+
+    Pass ``catalog.zones_for(encounter_ids)`` to fetch only what a view shows.
+    """
+    if zone_ids is None:
+        zone_ids = list(ENCOUNTER_IDS_BY_ZONE)
+
+    if use_cache:
+        zone_results = {}
+        missing, stale = [], []
+        for zone_id in zone_ids:
+            cached = parse_cache.get(character_id, zone_id)
+            if cached is None:
+                missing.append(zone_id)
+                continue
+            zone_results[zone_id], fresh = cached
+            if not fresh:
+                stale.append(zone_id)
+
+        missing = _trim_for_budget(character_id, missing)
+        if missing:
+            try:
+                zone_results.update(await refresh_parses(character_id, missing, batched))
+            except BudgetExhausted as e:
+                # Whatever is cached beats an error
+                print(f"[DEBUG] {e}; serving cached parses for character {character_id}.")
+        if stale:
+            # Serve what we have now, refresh for next time
+            _refresh_in_background(character_id, stale, batched)
+    else:
+        zone_results = await refresh_parses(character_id, zone_ids, batched)
+
+    final_data: ZoneData = {}
+    for zone_id in zone_ids:
+        if zone_id in zone_results:
+            merge_zone_data(final_data, zone_results[zone_id])
+
+    return final_data
+
+
+def _ref_key(ref: CharacterRef) -> CharacterRef:
+    if isinstance(ref, int):
+        return ref
+    region, server, name = ref
+    return region.upper(), server.lower(), name.lower()
+
+
+def known_missing(ref: CharacterRef) -> bool:
+    """True if FFLogs recently said this character doesn't exist."""
+    key = _ref_key(ref)
+    missing_since = _not_found.get(key)
+    if missing_since is None:
+        return False
+    if time.time() - missing_since > NOT_FOUND_TTL:
+        del _not_found[key]
+        return False
+    return True
+
+
+def _remember_missing(ref: CharacterRef):
+    _not_found[_ref_key(ref)] = time.time()
+
+
+async def get_character_info(char_id: int) -> Tuple[str, str]:
+    if known_missing(char_id):
+        raise ValueError("Character not found")
+    result = await execute(CHARACTER_BY_ID_QUERY, {"id": char_id}, operation="character_by_id")
+    char = result["characterData"]["character"]
+    if not char:
+        _remember_missing(char_id)
+        raise ValueError("Character not found")
+
+    return char["name"], char["server"]["name"]
+
+
+async def get_character_info_from_url(region: str, server: str, name: str) -> Tuple[int, str, str]:
+    if known_missing((region, server, name)):
+        raise ValueError("Character not found by name")
+    variables = {"name": name, "server": server, "region": region.upper()}
+    result = await execute(CHARACTER_BY_NAME_QUERY, variables, operation="character_by_name")
+    char = result["characterData"]["character"]
+    if not char:
+        _remember_missing((region, server, name))
+        raise ValueError("Character not found by name")
+
+    return char["id"], char["name"], char["server"]["name"]
+
+
+async def resolve_characters(refs: List[CharacterRef]) -> Tuple[Dict[int, Tuple[int, str, str]], Dict[int, str]]:
+    """Look up several characters in one aliased query.
+
+    Returns ``(found, errors)``, both keyed by position in ``refs``: ``found``
+    holds ``(character_id, name, server)``, ``errors`` a message. Characters
+    recently found missing are answered from memory without a request.
+    """
+    found: Dict[int, Tuple[int, str, str]] = {}
+    errors: Dict[int, str] = {}
+    pending = []
+    for index, ref in enumerate(refs):
+        if known_missing(ref):
+            errors[index] = "Character not found (checked recently)"
+        else:
+            pending.append(index)
+    if not pending:
+        return found, errors
+
+    query, variables = build_character_lookup_query([refs[index] for index in pending])
+    data, graphql_errors = await execute_with_errors(query, variables, operation="character_lookup_batch")
+    failed_aliases = {}
+    for err in graphql_errors:
+        path = err.get("path") or []
+        if len(path) > 1:
+            failed_aliases[path[1]] = err.get("message", "unknown error")
+
+    characters = data.get("characterData") or {}
+    for position, index in enumerate(pending):
+        alias = lookup_alias(position)
+        char = characters.get(alias)
+        if char:
+            found[index] = (char["id"], char["name"], char["server"]["name"])
+        elif alias in failed_aliases:
+            errors[index] = failed_aliases[alias]
+        else:
+            _remember_missing(refs[index])
+            errors[index] = "Character not found"
+    return found, errors
+
+
+async def get_rate_limit() -> Dict[str, float]:
+    """Return FFLogs' ``rateLimitData`` (limitPerHour, pointsSpentThisHour, pointsResetIn).
+
+    Bypasses the budget, since this is what refills it.
+    """
+    with metrics.timer("fflogs_request_seconds", operation="rate_limit"):
+        data, _ = await _post_query(RATE_LIMIT_QUERY, None)
+    limits = data["rateLimitData"]
+    budget.update(limits)
+    return limits
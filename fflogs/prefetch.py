@@ -0,0 +1,146 @@
+import os
+import time
+import random
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
+
+from fflogs.cache import parse_cache
+from fflogs.utils import ENCOUNTER_IDS_BY_ZONE, LEGACY_ZONES
+from fflogs.budget import budget, priority, BACKGROUND
+from fflogs import client as fflogs
+from fflogs.bulk import plan_batches
+from storage.users import users
+
+CURRENT_INTERVAL = float(os.getenv("PREFETCH_CURRENT_INTERVAL", "600"))
+LEGACY_INTERVAL = float(os.getenv("PREFETCH_LEGACY_INTERVAL", "21600"))
+TICK_SECONDS = float(os.getenv("PREFETCH_TICK", "60"))
+CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "2"))
+BATCH_SIZE = int(os.getenv("PREFETCH_BATCH_SIZE", "5"))
+# Max random delay before each batch, so refreshes don't all land on the same second
+JITTER_SECONDS = float(os.getenv("PREFETCH_JITTER", "5"))
+# Stop prefetching while fewer than this many API points are left this hour
+MIN_POINTS_REMAINING = float(os.getenv("PREFETCH_MIN_POINTS", "1000"))
+
+
+class ParsePrefetcher:
+    """Keeps every registered member's rankings warm in the parse cache."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        # Only these guilds' members are kept warm (None: every guild); shard processes split the work
+        self.guild_ids: Optional[List[int]] = None
+        # (character_id, zone_id) -> last attempt, so failing zones aren't retried every tick
+        self._attempted: Dict[Tuple[int, Union[int, None]], float] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        # on_ready fires again after reconnects; only ever run one loop
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run())
+        print("[DEBUG] Parse prefetcher started.")
+
+    async def stop(self):
+        if self.running:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self):
+        # Everything the prefetcher fetches queues behind interactive commands
+        with priority(BACKGROUND):
+            await self._loop()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Prefetch cycle failed: {e}")
+            await asyncio.sleep(TICK_SECONDS)
+
+    @staticmethod
+    def interval(zone_id: Union[int, None]) -> float:
+        return LEGACY_INTERVAL if zone_id in LEGACY_ZONES else CURRENT_INTERVAL
+
+    def prune_attempts(self):
+        """Forget attempts older than their zone's retry window; they no longer hold anything back."""
+        now = time.time()
+        self._attempted = {
+            key: attempted for key, attempted in self._attempted.items()
+            if now - attempted < self.interval(key[1])
+        }
+
+    def due_zones(self, character_id: int) -> Tuple[Union[int, None], ...]:
+        due = []
+        now = time.time()
+        for zone_id in ENCOUNTER_IDS_BY_ZONE:
+            interval = self.interval(zone_id)
+            age = parse_cache.age(character_id, zone_id)
+            attempted = self._attempted.get((character_id, zone_id), 0)
+            if (age is None or age >= interval) and now - attempted >= interval:
+                due.append(zone_id)
+        return tuple(due)
+
+    async def wait_for_budget(self, cost: float) -> bool:
+        """Sleep until the hourly budget resets if this cycle can't be afforded. False if unknown."""
+        if budget.needs_sync() and not await budget.sync(fflogs.get_rate_limit):
+            return False
+        if not budget.known:
+            # An earlier sync failed and nothing has been read since
+            return False
+
+        if budget.remaining < MIN_POINTS_REMAINING or not budget.allows(BACKGROUND, cost):
+            print(f"[DEBUG] Prefetch paused: {budget.remaining:.0f} API points left, reset in {budget.retry_after():.0f}s.")
+            await asyncio.sleep(budget.retry_after() + random.uniform(0, JITTER_SECONDS))
+        return True
+
+    async def run_once(self):
+        character_ids = users.character_ids(self.guild_ids)
+        self.prune_attempts()
+
+        # Characters due for the same zones can share one aliased query
+        batches = plan_batches({character_id: self.due_zones(character_id) for character_id in character_ids}, BATCH_SIZE)
+        if not batches:
+            return
+
+        # A zoneRankings alias per character and zone
+        cost = sum(len(ids) * len(zones) for ids, zones in batches)
+        if not await self.wait_for_budget(cost):
+            return
+
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+
+        async def refresh(ids: List[int], zones: List[Union[int, None]]):
+            async with semaphore:
+                await asyncio.sleep(random.uniform(0, JITTER_SECONDS))
+                for character_id in ids:
+                    for zone_id in zones:
+                        self._attempted[(character_id, zone_id)] = time.time()
+                zone_results, errors = await fflogs.fetch_zone_rankings(ids, zones)
+                for character_id, results in zone_results.items():
+                    for zone_id, zone_data in results.items():
+                        fflogs.store_parses(character_id, zone_id, zone_data)
+                        # Cached now, so the cache's age decides when it's due again
+                        self._attempted.pop((character_id, zone_id), None)
+                for (character_id, zone_id), message in errors.items():
+                    print(f"[ERROR] Prefetch failed for character {character_id}, zone {zone_id}: {message}")
+
+        results = await asyncio.gather(*(refresh(ids, zones) for ids, zones in batches), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"[ERROR] Prefetch batch failed: {result}")
+
+        print(f"[DEBUG] Prefetched {sum(len(ids) for ids, _ in batches)} character(s) in {len(batches)} batch(es).")
+        await parse_cache.save_snapshot()
+
+
+prefetcher = ParsePrefetcher()
@@ -0,0 +1,92 @@
+"""Local copy of the FFLogs GraphQL schema.
+
+Fetch it once, offline, with::
+
+    python -m fflogs.schema
+
+Queries are then validated against the saved file instead of downloading the
+introspection schema on every command. Set FFLOGS_VALIDATE_QUERIES=0 to skip
+validation entirely.
+"""
+import os
+import json
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from fflogs.auth import DATA_DIR
+
+if TYPE_CHECKING:
+    from graphql import GraphQLSchema
+
+# Bump when the stored file layout changes
+SCHEMA_VERSION = 1
+SCHEMA_FILE = os.path.join(DATA_DIR, f"fflogs_schema.v{SCHEMA_VERSION}.json")
+
+VALIDATE_QUERIES = os.getenv("FFLOGS_VALIDATE_QUERIES", "1") != "0"
+
+_schema: Optional["GraphQLSchema"] = None
+_schema_loaded = False
+
+
+def get_schema() -> Optional["GraphQLSchema"]:
+    """Load the saved schema on first use; None if validation is off or no file exists."""
+    global _schema, _schema_loaded
+    if not VALIDATE_QUERIES:
+        return None
+    if not _schema_loaded:
+        _schema_loaded = True
+        if not os.path.exists(SCHEMA_FILE):
+            print(f"[DEBUG] No FFLogs schema at {SCHEMA_FILE}; run `python -m fflogs.schema` to enable validation.")
+            return None
+        with open(SCHEMA_FILE, "r") as f:
+            stored = json.load(f)
+        if stored.get("version") != SCHEMA_VERSION:
+            print(f"[ERROR] FFLogs schema file has version {stored.get('version')}, expected {SCHEMA_VERSION}. Skipping validation.")
+            return None
+        # graphql-core is slow to import; only pay for it once a query needs validating
+        from graphql import build_client_schema
+
+        _schema = build_client_schema(stored["introspection"])
+    return _schema
+
+
+@lru_cache(maxsize=256)
+def validate_query(query: str):
+    """Validate ``query`` against the local schema, once per distinct query string."""
+    schema = get_schema()
+    if schema is None:
+        return
+    from graphql import parse, validate
+
+    errors = validate(schema, parse(query))
+    if errors:
+        raise ValueError("Invalid FFLogs query: " + "; ".join(err.message for err in errors))
+
+
+def fetch_schema() -> str:
+    """Download the introspection schema and save it to SCHEMA_FILE."""
+    import requests
+    from graphql import get_introspection_query
+    from fflogs.auth import get_access_token
+    from fflogs.client import API_URL
+
+    response = requests.post(
+        API_URL,
+        headers={"Authorization": f"Bearer {get_access_token()}"},
+        json={"query": get_introspection_query()}
+    )
+    response.raise_for_status()
+    introspection = response.json()["data"]
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    tmp_path = SCHEMA_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"version": SCHEMA_VERSION, "fetched_at": int(time.time()), "introspection": introspection}, f)
+    os.replace(tmp_path, SCHEMA_FILE)
+    return SCHEMA_FILE
+
+
+if __name__ == "__main__":
+    path = fetch_schema()
+    print(f"Saved FFLogs schema to {path}")
@@ -0,0 +1,53 @@
+import re
+import json
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+from monitoring.metrics import metrics
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def request_key(query: str, variables: Optional[dict] = None) -> Tuple[str, str]:
+    """Key identical GraphQL requests the same regardless of formatting or variable order."""
+    return _WHITESPACE.sub(" ", query).strip(), json.dumps(variables or {}, sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one in-flight call.
+
+    The first caller starts the call as its own task and later callers await
+    the same task, so every waiter gets the same result or the same
+    exception. Waiters are shielded from each other: cancelling one doesn't
+    cancel the shared call. Results are shared, not copied, so callers must
+    not mutate them. Nothing is cached once the call finishes.
+
+    ``joinable`` lists other keys whose flight this caller may share when
+    its own key has none, e.g. the same request at a higher priority.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]], joinable: Iterable[Hashable] = ()) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = next((self._calls[other] for other in joinable if other in self._calls), None)
+        if task is None:
+            task = asyncio.create_task(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            metrics.inc("singleflight_shared_total", flight=self.name)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -1,68 +1,154 @@
-import os
-import requests
-import json
-from typing import Dict, List, Union
-from gql import Client, gql
-from gql.transport.requests import RequestsHTTPTransport
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Comprehensive map of all relevant zones + encounters
-ENCOUNTER_IDS_BY_ZONE: Dict[int, List[int]] = {
-    None: [97, 98, 99, 100],             # Dawntrail current savage
-    62: [93, 94, 95, 96],                # DT previous savage
-    65: [1079],                          # FRU
-    59: [1073, 1074, 1075, 1076, 1077],  # Legacy ultimates (Dawntrail)
-    45: [1065],                          # DSR (Endwalker)
-    53: [1068],                          # TOP (Endwalker)
-    43: [1060, 1061, 1062],              # Legacy ultimates (Endwalker)
-}
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+from urllib.parse import unquote
+
+from fflogs.auth import get_access_token, is_unauthorized, token_provider
+from fflogs.catalog import get_catalog
+
+if TYPE_CHECKING:
+    from gql import Client
+
+# Zone -> encounters for every zone the bot shows, from the compiled catalog
+ENCOUNTER_IDS_BY_ZONE: Dict[int, List[int]] = get_catalog().encounters_by_zone
 
-def get_access_token() -> str:
-    response = requests.post("https://www.fflogs.com/oauth/token", data={
-        "grant_type": "client_credentials",
-        "client_id": os.getenv("FFLOGS_CLIENT_ID"),
-        "client_secret": os.getenv("FFLOGS_CLIENT_SECRET")
-    })
-    response.raise_for_status()
-    return response.json()["access_token"]
+# Current savage tiers change every raid night; everything else is legacy content
+CURRENT_ZONES = get_catalog().current_zones
+LEGACY_ZONES = get_catalog().legacy_zones
 
-def get_graphql_client(token: str) -> Client:
+def get_graphql_client(token: str = None) -> "Client":
+    # gql and its transports are only needed by the blocking scripts, not at bot startup
+    from gql import Client
+    from gql.transport.requests import RequestsHTTPTransport
+    from fflogs.schema import get_schema
+    from fflogs.client import API_URL
+
+    if token is None:
+        token = get_access_token()
     transport = RequestsHTTPTransport(
-        url="https://www.fflogs.com/api/v2/client",
+        url=API_URL,
         headers={"Authorization": f"Bearer {token}"},
         use_json=True
     )
-    return Client(transport=transport, fetch_schema_from_transport=True)
+    # Validate against the locally saved schema rather than introspecting per client
+    return Client(transport=transport, schema=get_schema(), fetch_schema_from_transport=False)
+
+def execute(client: "Client", query, variables: dict) -> dict:
+    """Run ``query``, swapping in a fresh token and retrying once on a 401."""
+    try:
+        return client.execute(query, variable_values=variables)
+    except Exception as e:
+        if not is_unauthorized(e):
+            raise
+        stale = client.transport.headers.get("Authorization", "").removeprefix("Bearer ")
+        token_provider.invalidate(stale)
+        client.transport.headers["Authorization"] = f"Bearer {get_access_token()}"
+        return client.execute(query, variable_values=variables)
 
-def fetch_rankings_by_zone(client: Client, character_id: int, zone_id: Union[int, None]) -> Dict[int, Dict[str, Union[str, float, int]]]:
+ZONE_RANKINGS_QUERY = """
+query ($id: Int!, $zone: Int!) {
+  characterData {
+    character(id: $id) {
+      zoneRankings(zoneID: $zone)
+    }
+  }
+}
+"""
+
+LATEST_ZONE_RANKINGS_QUERY = """
+query ($id: Int!) {
+  characterData {
+    character(id: $id) {
+      zoneRankings
+    }
+  }
+}
+"""
+
+def zone_rankings_request(character_id: int, zone_id: Union[int, None]):
+    """Return the (query, variables) pair for one zone's rankings."""
     if zone_id is not None:
-        query = gql("""
-        query ($id: Int!, $zone: Int!) {
-          characterData {
-            character(id: $id) {
-              zoneRankings(zoneID: $zone)
-            }
-          }
-        }
-        """)
-        variables = {"id": character_id, "zone": zone_id}
-    else:
-        query = gql("""
-        query ($id: Int!) {
-          characterData {
-            character(id: $id) {
-              zoneRankings
-            }
-          }
-        }
-        """)
-        variables = {"id": character_id}
+        return ZONE_RANKINGS_QUERY, {"id": character_id, "zone": zone_id}
+    return LATEST_ZONE_RANKINGS_QUERY, {"id": character_id}
+
+def zone_alias(index: int) -> str:
+    return f"z{index}"
 
-    result = client.execute(query, variable_values=variables)
-    raw = result["characterData"]["character"]["zoneRankings"]
+def character_alias(index: int) -> str:
+    return f"c{index}"
 
+def build_zone_rankings_query(character_ids: List[int], zone_ids: List[Union[int, None]]) -> Tuple[str, dict]:
+    """Build one query fetching every zone for every character via aliases.
+
+    e.g. ``c0: character(id: $c0) { z0: zoneRankings(zoneID: $z0) ... }``;
+    aliases are positional and IDs go in variables, so the query text only
+    depends on the batch's shape and its validation stays cached.
+    """
+    params, variables, zone_fields = [], {}, []
+    for index, zone_id in enumerate(zone_ids):
+        if zone_id is not None:
+            params.append(f"${zone_alias(index)}: Int!")
+            variables[zone_alias(index)] = int(zone_id)
+            zone_fields.append(f"{zone_alias(index)}: zoneRankings(zoneID: ${zone_alias(index)})")
+        else:
+            zone_fields.append(f"{zone_alias(index)}: zoneRankings")
+    zones = "\n      ".join(zone_fields)
+
+    characters = []
+    for index, character_id in enumerate(character_ids):
+        params.append(f"${character_alias(index)}: Int!")
+        variables[character_alias(index)] = int(character_id)
+        characters.append(
+            f"{character_alias(index)}: character(id: ${character_alias(index)}) {{\n      {zones}\n    }}"
+        )
+    body = "\n    ".join(characters)
+    return f"query ({', '.join(params)}) {{\n  characterData {{\n    {body}\n  }}\n}}", variables
+
+# A character ID, or (region, server slug, name) from a profile URL
+CharacterRef = Union[int, Tuple[str, str, str]]
+
+def parse_character_link(link: str) -> CharacterRef:
+    """Parse an FFLogs character URL, raising ValueError with a user-facing message."""
+    if link.startswith("https://www.fflogs.com/character/id/"):
+        character_id = link.split("/")[-1]
+        if not character_id.isdigit():
+            raise ValueError("FFLogs character ID should be a number.")
+        return int(character_id)
+    if link.startswith("https://www.fflogs.com/character/"):
+        parts = link.split("/")
+        if len(parts) < 7:
+            raise ValueError("FFLogs link seems malformed. Expected format: /character/region/server/name")
+        return parts[4], parts[5], unquote(parts[6])
+    raise ValueError("Invalid FFLogs link format.")
+
+def lookup_alias(index: int) -> str:
+    return f"r{index}"
+
+def build_character_lookup_query(refs: List[CharacterRef]) -> Tuple[str, dict]:
+    """Build one query resolving every character via aliases, by ID or by name.
+
+    e.g. ``r0: character(id: $r0) { ... } r1: character(name: $n1, ...) { ... }``;
+    IDs and names go in variables, so names never need escaping and the
+    query text only depends on which refs are IDs and which are names.
+    """
+    fields = "id\n      name\n      server { name }"
+    params, characters, variables = [], [], {}
+    for index, ref in enumerate(refs):
+        alias = lookup_alias(index)
+        if isinstance(ref, int):
+            params.append(f"${alias}: Int!")
+            variables[alias] = int(ref)
+            characters.append(f"{alias}: character(id: ${alias}) {{\n      {fields}\n    }}")
+            continue
+        region, server, name = ref
+        params.append(f"$n{index}: String!, $s{index}: String!, $g{index}: String!")
+        variables.update({f"n{index}": name, f"s{index}": server, f"g{index}": region.upper()})
+        characters.append(
+            f"{alias}: character(name: $n{index}, serverSlug: $s{index}, serverRegion: $g{index}) {{\n      {fields}\n    }}"
+        )
+    signature = f" ({', '.join(params)})" if params else ""
+    body = "\n    ".join(characters)
+    return f"query{signature} {{\n  characterData {{\n    {body}\n  }}\n}}", variables
+
+def parse_zone_rankings(raw, zone_id: Union[int, None]) -> Dict[int, Dict[str, Union[str, float, int]]]:
     if not isinstance(raw, dict):
         raise TypeError("zoneRankings response is not a dict")
     if "error" in raw:
@@ -85,25 +171,35 @@ def fetch_rankings_by_zone(client: Client, character_id: int, zone_id: Union[int
 
     return encounter_data
 
-def get_parses_for_fights(client: Client, character_id: int) -> Dict[int, Dict[str, Union[str, float, int]]]:
+def merge_zone_data(final_data: Dict[int, Dict[str, Union[str, float, int]]], zone_data: Dict[int, Dict[str, Union[str, float, int]]]):
+    for eid, data in zone_data.items():
+        # Update if no data exists or this one has more kills or is lockedIn/better
+        if eid not in final_data:
+            final_data[eid] = data
+        else:
+            existing = final_data[eid]
+            new_kills = data.get("kills", 0) or 0
+            old_kills = existing.get("kills", 0) or 0
+            new_pct = data.get("percentile", 0) or 0
+            old_pct = existing.get("percentile", 0) or 0
+
+            if new_kills > old_kills or new_pct > old_pct:
+                final_data[eid] = data
+
+def fetch_rankings_by_zone(client: "Client", character_id: int, zone_id: Union[int, None]) -> Dict[int, Dict[str, Union[str, float, int]]]:
+    from gql import gql
+
+    query, variables = zone_rankings_request(character_id, zone_id)
+    result = execute(client, gql(query), variables)
+    return parse_zone_rankings(result["characterData"]["character"]["zoneRankings"], zone_id)
+
+def get_parses_for_fights(client: "Client", character_id: int) -> Dict[int, Dict[str, Union[str, float, int]]]:
     final_data: Dict[int, Dict[str, Union[str, float, int]]] = {}
 
     for zone_id in ENCOUNTER_IDS_BY_ZONE:
         try:
             zone_data = fetch_rankings_by_zone(client, character_id, zone_id)
-            for eid, data in zone_data.items():
-                # Update if no data exists or this one has more kills or is lockedIn/better
-                if eid not in final_data:
-                    final_data[eid] = data
-                else:
-                    existing = final_data[eid]
-                    new_kills = data.get("kills", 0) or 0
-                    old_kills = existing.get("kills", 0) or 0
-                    new_pct = data.get("percentile", 0) or 0
-                    old_pct = existing.get("percentile", 0) or 0
-
-                    if new_kills > old_kills or new_pct > old_pct:
-                        final_data[eid] = data
+            merge_zone_data(final_data, zone_data)
         except Exception as e:
             print(f"[ERROR] Failed to fetch parses for zone {zone_id}: {e}")
 
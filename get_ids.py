@@ -1,26 +1,133 @@
-import os
-from fflogsapi import FFLogsClient
+"""Builds fflogs/encounter_catalog.json from FFLogs.
+
+    python get_ids.py
+
+Fetches every expansion, zone and encounter in a single worldData query,
+then compiles the zones and display sections the bot shows (SECTIONS below)
+into the catalog. Edit SECTIONS and LATEST_ZONE_ID when a new tier or
+ultimate comes out, rerun, and commit the result.
+"""
+import json
+import time
+from typing import Dict, List, Union
+import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_all_encounters():
-    client_id = os.getenv("FFLOGS_CLIENT_ID")
-    client_secret = os.getenv("FFLOGS_CLIENT_SECRET")
+from fflogs.auth import get_access_token
+from fflogs.catalog import CATALOG_FILE, CATALOG_VERSION, zone_key
+from fflogs.client import API_URL
+
+CATALOG_QUERY = """
+query {
+  worldData {
+    expansions {
+      id
+      name
+      zones {
+        id
+        name
+        frozen
+        encounters {
+          id
+          name
+        }
+      }
+    }
+  }
+}
+"""
+
+# FFLogs ranks this tier when zoneRankings is given no zone ID
+LATEST_ZONE_ID = 68
+
+# What the bot shows, in order. None is the latest tier (LATEST_ZONE_ID).
+# Sections with "merge" combine same-named fights across zones into one line.
+SECTIONS = [
+    {"key": "current_savage", "label": "Current Savage Tier", "zones": [None], "current": True},
+    {"key": "previous_savage", "label": "Previous Savage Tier", "zones": [62], "current": True},
+    {"key": "ultimates", "label": "Ultimates", "zones": [65, 59, 45, 53, 43], "merge": True},
+]
+
+
+def fetch_expansions() -> List[dict]:
+    headers = {"Authorization": f"Bearer {get_access_token()}"}
+    response = requests.post(API_URL, json={"query": CATALOG_QUERY}, headers=headers, timeout=30)
+    response.raise_for_status()
+    result = response.json()
+    if result.get("data") is None:
+        raise RuntimeError("; ".join(err.get("message", "unknown") for err in result.get("errors", [])))
+    return result["data"]["worldData"]["expansions"]
+
+
+def display_name(encounter_name: str) -> str:
+    # Legacy zones sometimes suffix the fight name; group them with the original
+    return encounter_name.removesuffix(" (Ultimate)").strip()
+
+
+def build_catalog(expansions: List[dict], sections: List[dict] = SECTIONS, latest_zone_id: int = LATEST_ZONE_ID) -> dict:
+    zones_by_id: Dict[int, tuple] = {}
+    for expansion in expansions:
+        for zone in expansion["zones"]:
+            zones_by_id[zone["id"]] = (expansion["name"], zone)
+
+    zones: Dict[str, dict] = {}
+    encounters: Dict[str, dict] = {}
+    built_sections = []
+    for section in sections:
+        merge = section.get("merge", False)
+        groups: Dict[Union[str, int], dict] = {}
+
+        for zone_id in section["zones"]:
+            fflogs_id = latest_zone_id if zone_id is None else zone_id
+            if fflogs_id not in zones_by_id:
+                raise ValueError(f"Zone {fflogs_id} ({section['label']}) was not found on FFLogs")
+            expansion, zone = zones_by_id[fflogs_id]
+            key = zone_key(zone_id)
+            zones[key] = {
+                "name": zone["name"],
+                "fflogs_id": fflogs_id,
+                "expansion": expansion,
+                "encounters": [encounter["id"] for encounter in zone["encounters"]],
+            }
+
+            for encounter in zone["encounters"]:
+                name = display_name(encounter["name"])
+                encounters[str(encounter["id"])] = {"name": encounter["name"], "zone": key, "group": name}
+                group = groups.setdefault(name if merge else encounter["id"], {"name": name, "encounters": []})
+                group["encounters"].append(encounter["id"])
+
+        ordered = sorted(groups.values(), key=lambda g: g["name"]) if merge else list(groups.values())
+        built_sections.append({
+            "key": section["key"],
+            "label": section["label"],
+            "current": section.get("current", False),
+            "merge": merge,
+            "groups": ordered,
+        })
 
-    client = FFLogsClient(client_id, client_secret)
+    return {
+        "version": CATALOG_VERSION,
+        "generated_at": int(time.time()),
+        "zones": zones,
+        "encounters": encounters,
+        "sections": built_sections,
+    }
 
-    all_encounters = []
 
-    for expansion in client.all_expansions():
-        print(f"\n=== {expansion.name()} ===")
-        for zone in client.all_zones(expansion.id):
-            for encounter in zone.encounters():
-                all_encounters.append({"id": encounter.id, "name": encounter.name()})
-                print(f"{encounter.id}: {encounter.name()}")
+def write_catalog(catalog: dict, path: str = CATALOG_FILE):
+    with open(path, "w") as f:
+        json.dump(catalog, f, indent=2)
+        f.write("\n")
 
-    client.close()
-    return all_encounters
 
 if __name__ == "__main__":
-    get_all_encounters()
+    expansions = fetch_expansions()
+    catalog = build_catalog(expansions)
+    write_catalog(catalog)
+    print(f"Wrote {len(catalog['encounters'])} encounters across {len(catalog['zones'])} zones to {CATALOG_FILE}")
+    for section in catalog["sections"]:
+        print(f"\n=== {section['label']} ===")
+        for group in section["groups"]:
+            print(f"{group['name']}: {', '.join(str(eid) for eid in group['encounters'])}")
@@ -0,0 +1,61 @@
+import os
+import asyncio
+import discord
+from typing import Awaitable, Callable, Optional
+
+from monitoring.metrics import metrics
+
+# Minimum seconds between two edits of the same message
+EDIT_WINDOW = float(os.getenv("VOTE_EDIT_WINDOW", "1.0"))
+
+
+class MessageEditScheduler:
+    """Coalesces edits to one interactive message.
+
+    Every click calls :meth:`request` with the newest way to edit the message
+    and a function rendering the current state. At most one edit goes out
+    per ``window`` seconds and it always carries the latest state, so a burst
+    of clicks becomes one or two edits. A 429 pushes the next edit back by
+    the Retry-After Discord sent.
+    """
+
+    def __init__(self, window: float = EDIT_WINDOW):
+        self.window = window
+        self._edit: Optional[Callable[..., Awaitable]] = None
+        self._render: Optional[Callable[[], dict]] = None
+        self._dirty = False
+        self._next_allowed = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def request(self, edit: Callable[..., Awaitable], render: Callable[[], dict]):
+        self._edit = edit
+        self._render = render
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._dirty:
+            delay = self._next_allowed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            # Anything requested from here on needs another edit
+            self._dirty = False
+            try:
+                await self._edit(**self._render())
+                self._next_allowed = loop.time() + self.window
+            except discord.RateLimited as e:
+                metrics.observe("discord_ratelimit_wait_seconds", e.retry_after)
+                self._next_allowed = loop.time() + e.retry_after
+                self._dirty = True
+            except discord.HTTPException as e:
+                if e.status != 429:
+                    print(f"[ERROR] Failed to edit message: {e}")
+                    continue
+                retry_after = float(e.response.headers.get("Retry-After", self.window))
+                print(f"[DEBUG] Message edit rate limited, retrying in {retry_after:.2f}s")
+                metrics.observe("discord_ratelimit_wait_seconds", retry_after)
+                self._next_allowed = loop.time() + retry_after
+                self._dirty = True
@@ -0,0 +1,83 @@
+"""Which guilds the bot serves, and what each of them gets.
+
+One static only needs ``GUILD_ID`` in .env, as before. For several, list
+them in ``GUILD_IDS=123,456`` or describe them in guilds.json (path in
+``GUILDS_CONFIG``)::
+
+    {
+      "123": {"name": "Static A", "raid_role_id": 1350916461467664535},
+      "456": {"name": "Static B", "commands": ["register", "whoami", "roster"]}
+    }
+
+A guild without ``"commands"`` gets every command. Data from before
+multi-guild support (users.json, saved_days.json) belongs to the first
+guild listed.
+"""
+import os
+import json
+from typing import Dict, List, Optional
+import discord
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUILDS_CONFIG = os.path.join(BASE_DIR, "guilds.json")
+
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    """The shard Discord routes ``guild_id`` to."""
+    return (guild_id >> 22) % shard_count
+
+
+class GuildConfig:
+    def __init__(self, guilds: Dict[int, dict]):
+        self.guilds = guilds
+
+    @classmethod
+    def from_env(cls) -> "GuildConfig":
+        path = os.getenv("GUILDS_CONFIG", GUILDS_CONFIG)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                raw = json.load(f)
+            return cls({int(guild_id): settings or {} for guild_id, settings in raw.items()})
+
+        ids = os.getenv("GUILD_IDS") or os.getenv("GUILD_ID") or ""
+        return cls({int(guild_id): {} for guild_id in ids.split(",") if guild_id.strip()})
+
+    @property
+    def ids(self) -> List[int]:
+        return list(self.guilds)
+
+    @property
+    def default_guild_id(self) -> Optional[int]:
+        return self.ids[0] if self.guilds else None
+
+    def settings(self, guild_id: Optional[int]) -> dict:
+        return self.guilds.get(int(guild_id), {}) if guild_id is not None else {}
+
+    def enabled(self, guild_id: int, command_name: str) -> bool:
+        commands = self.settings(guild_id).get("commands")
+        return commands is None or command_name in commands
+
+    def served_by(self, shard_ids: Optional[List[int]], shard_count: Optional[int]) -> List[int]:
+        """Configured guilds on this process's shards (all of them when not split across processes)."""
+        if not shard_ids or not shard_count:
+            return self.ids
+        return [guild_id for guild_id in self.ids if shard_for(guild_id, shard_count) in shard_ids]
+
+
+_config: Optional[GuildConfig] = None
+
+
+def get_guild_config() -> GuildConfig:
+    """Read on first use, after .env has been loaded."""
+    global _config
+    if _config is None:
+        _config = GuildConfig.from_env()
+    return _config
+
+
+def add_guild_command(bot, command):
+    """Register ``command`` in every configured guild that has it enabled."""
+    config = get_guild_config()
+    for guild_id in config.ids:
+        if config.enabled(guild_id, command.name):
+            bot.tree.add_command(command, guild=discord.Object(id=guild_id))
@@ -0,0 +1,88 @@
+import sys
+import time
+import asyncio
+import functools
+import importlib.abc
+import importlib.machinery
+from typing import Dict, List
+
+from handlers.manifest import SECTIONS, load_manifest
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's loader to time its import and its ``setup`` coroutine."""
+
+    def __init__(self, loader, timings: Dict[str, Dict[str, float]]):
+        self._loader = loader
+        self._timings = timings
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        timing = self._timings.setdefault(module.__name__, {})
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            timing["import"] = time.perf_counter() - start
+
+        setup = getattr(module, "setup", None)
+        if asyncio.iscoroutinefunction(setup):
+            @functools.wraps(setup)
+            async def timed_setup(bot):
+                setup_start = time.perf_counter()
+                try:
+                    await setup(bot)
+                finally:
+                    timing["setup"] = time.perf_counter() - setup_start
+            module.setup = timed_setup
+
+
+class _ExtensionImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self, names: List[str]):
+        self.names = set(names)
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in self.names:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path, target)
+        if spec is not None and spec.loader is not None:
+            spec.loader = _TimedLoader(spec.loader, self.timings)
+        return spec
+
+
+async def load_extensions(bot) -> Dict[str, Dict[str, float]]:
+    """Load every extension in the manifest that isn't loaded yet.
+
+    Extensions go through discord.py's extension API, so each is loaded at
+    most once per process. Imports run one after another (they hold the
+    GIL anyway) but ``setup`` coroutines run concurrently.
+    """
+    manifest = load_manifest()
+    names = [name for section in SECTIONS for name in manifest[section] if name not in bot.extensions]
+    if not names:
+        return {}
+
+    timer = _ExtensionImportTimer(names)
+    sys.meta_path.insert(0, timer)
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(bot.load_extension(name) for name in names), return_exceptions=True)
+    finally:
+        sys.meta_path.remove(timer)
+    elapsed = time.perf_counter() - start
+
+    for name, result in zip(names, results):
+        timing = timer.timings.get(name, {})
+        if isinstance(result, Exception):
+            print(f"[!] Failed to load {name}: {result}")
+            continue
+        print(f"[+] Loaded {name} (import {timing.get('import', 0) * 1000:.1f}ms, setup {timing.get('setup', 0) * 1000:.1f}ms)")
+
+    print(f"[+] Loaded {len(bot.extensions)} extension(s) in {elapsed * 1000:.1f}ms")
+    return timer.timings
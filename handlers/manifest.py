@@ -0,0 +1,67 @@
+"""Generates handlers/extensions.json, the list of command and event extensions.
+
+Run after adding or removing a command or event module::
+
+    python -m handlers.manifest
+
+Modules are discovered by parsing source for a top-level ``setup`` function,
+so nothing is imported while building the manifest.
+"""
+import os
+import ast
+import json
+from typing import Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = os.path.join(BASE_DIR, "handlers", "extensions.json")
+MANIFEST_VERSION = 1
+
+SECTIONS = ("commands", "events")
+
+
+def has_setup(path: str) -> bool:
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    return any(
+        isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "setup"
+        for node in tree.body
+    )
+
+
+def discover(section: str) -> List[str]:
+    section_dir = os.path.join(BASE_DIR, section)
+    modules = []
+    for root, _, files in os.walk(section_dir):
+        for file in files:
+            if file.endswith(".py") and not file.startswith("_"):
+                path = os.path.join(root, file)
+                if has_setup(path):
+                    rel_path = os.path.relpath(path, BASE_DIR)
+                    modules.append(rel_path.replace(os.sep, ".")[:-3])
+    return sorted(modules)
+
+
+def build_manifest() -> Dict[str, List[str]]:
+    manifest = {"version": MANIFEST_VERSION}
+    for section in SECTIONS:
+        manifest[section] = discover(section)
+    with open(MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+
+def load_manifest() -> Dict[str, List[str]]:
+    with open(MANIFEST_FILE, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{MANIFEST_FILE} has version {manifest.get('version')}, expected {MANIFEST_VERSION}. Run `python -m handlers.manifest`.")
+    return manifest
+
+
+if __name__ == "__main__":
+    manifest = build_manifest()
+    for section in SECTIONS:
+        print(f"{section}: {len(manifest[section])}")
+        for name in manifest[section]:
+            print(f"  {name}")
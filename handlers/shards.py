@@ -0,0 +1,69 @@
+"""Which Discord shards this process runs.
+
+Unsharded by default. ``SHARDED=1`` lets discord.py pick the shard count
+and run every shard in this process. To split shards across processes,
+give every process the same ``SHARD_COUNT`` and its own ``SHARD_IDS``::
+
+    SHARD_COUNT=4 SHARD_IDS=0,1 python main.py
+    SHARD_COUNT=4 SHARD_IDS=2,3 python main.py
+"""
+import os
+from typing import List, Optional
+
+
+class ShardConfigError(ValueError):
+    """The shard settings in the environment don't make sense together."""
+
+
+class ShardConfig:
+    def __init__(self, count: Optional[int] = None, ids: Optional[List[int]] = None, auto: bool = False):
+        self.count = count
+        self.ids = ids
+        self.auto = auto
+
+    @classmethod
+    def from_env(cls) -> "ShardConfig":
+        raw_count = os.getenv("SHARD_COUNT", "").strip()
+        raw_ids = os.getenv("SHARD_IDS", "").strip()
+        try:
+            count = int(raw_count) if raw_count else None
+        except ValueError:
+            raise ShardConfigError(f"SHARD_COUNT must be a whole number, got {raw_count!r}")
+        try:
+            ids = [int(shard_id) for shard_id in raw_ids.split(",") if shard_id.strip()] or None
+        except ValueError:
+            raise ShardConfigError(f"SHARD_IDS must be comma-separated shard numbers, got {raw_ids!r}")
+
+        if count is not None and count < 1:
+            raise ShardConfigError(f"SHARD_COUNT must be at least 1, got {count}")
+        if ids is not None:
+            if count is None:
+                raise ShardConfigError("SHARD_IDS is set without SHARD_COUNT; every process needs the same total SHARD_COUNT")
+            outside = [shard_id for shard_id in ids if not 0 <= shard_id < count]
+            if outside:
+                raise ShardConfigError(f"SHARD_IDS {outside} outside 0..{count - 1} for SHARD_COUNT={count}")
+        return cls(count, ids, auto=os.getenv("SHARDED") == "1")
+
+    @property
+    def sharded(self) -> bool:
+        return self.auto or self.count is not None
+
+    @property
+    def split(self) -> bool:
+        """This process runs only some of the shards; others run the rest."""
+        return self.ids is not None
+
+    def options(self) -> dict:
+        """Keyword arguments for AutoShardedBot."""
+        return {"shard_count": self.count, "shard_ids": self.ids} if self.sharded else {}
+
+
+_config: Optional[ShardConfig] = None
+
+
+def get_shard_config() -> ShardConfig:
+    """Read on first use, after .env has been loaded; raises ShardConfigError if invalid."""
+    global _config
+    if _config is None:
+        _config = ShardConfig.from_env()
+    return _config
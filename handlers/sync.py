@@ -0,0 +1,70 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Dict, Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SYNC_STATE_FILE = os.path.join(BASE_DIR, "data", "command_sync.json")
+
+log = logging.getLogger(__name__)
+
+
+def command_fingerprints(tree, guild) -> Dict[str, str]:
+    """Hash each app command's serialized payload, keyed by command name."""
+    fingerprints = {}
+    for cmd in tree.get_commands(guild=guild):
+        payload = json.dumps(cmd.to_dict(), sort_keys=True, separators=(",", ":"))
+        fingerprints[cmd.name] = hashlib.sha256(payload.encode()).hexdigest()
+    return fingerprints
+
+
+def tree_hash(fingerprints: Dict[str, str]) -> str:
+    joined = "\n".join(f"{name}:{digest}" for name, digest in sorted(fingerprints.items()))
+    return hashlib.sha256(joined.encode()).hexdigest()
+
+
+def load_sync_state() -> dict:
+    if not os.path.exists(SYNC_STATE_FILE):
+        return {}
+    try:
+        with open(SYNC_STATE_FILE, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        log.warning(f"⚠️ Ignoring unreadable {SYNC_STATE_FILE}: {e}")
+        return {}
+
+
+def save_sync_state(state: dict):
+    os.makedirs(os.path.dirname(SYNC_STATE_FILE), exist_ok=True)
+    tmp_path = SYNC_STATE_FILE + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, SYNC_STATE_FILE)
+
+
+async def sync_if_changed(tree, guild, force: bool = False) -> Optional[list]:
+    """Sync ``guild``'s commands only if they changed since the last sync.
+
+    Returns the synced commands, or None when the sync was skipped.
+    """
+    fingerprints = command_fingerprints(tree, guild)
+    digest = tree_hash(fingerprints)
+    state = load_sync_state()
+    previous = state.get(str(guild.id), {})
+
+    if not force and previous.get("hash") == digest:
+        log.info(f"⏭️ Command tree unchanged ({digest[:12]}), skipping sync for guild {guild.id}")
+        return None
+
+    old = previous.get("commands", {})
+    added = sorted(set(fingerprints) - set(old))
+    removed = sorted(set(old) - set(fingerprints))
+    changed = sorted(name for name in set(fingerprints) & set(old) if fingerprints[name] != old[name])
+    log.info(f"🔁 Command tree changed{' (forced)' if force else ''}: added={added} removed={removed} changed={changed}")
+
+    synced = await tree.sync(guild=guild)
+    state[str(guild.id)] = {"hash": digest, "commands": fingerprints, "synced_at": int(time.time())}
+    save_sync_state(state)
+    return synced
@@ -1,44 +1,141 @@
+# .env before anything else: modules read their settings (e.g. STARTUP_BUDGET) when imported
+from dotenv import load_dotenv
+load_dotenv()
+
+# Started before anything else is imported, so every import after it is timed
+from monitoring.startup import startup_profiler
+startup_profiler.start()
+
 import os
+import sys
+import asyncio
 import logging
+import argparse
 import discord
 from discord.ext import commands
-from dotenv import load_dotenv
-from handlers.handle_commands import load_commands
-from handlers.handle_events import load_events
+from handlers.loader import load_extensions
+from handlers.sync import sync_if_changed
+from handlers.guilds import get_guild_config
+from handlers.shards import get_shard_config, ShardConfigError
+from fflogs.client import close_session
+from fflogs.catalog import get_catalog
+from fflogs.cache import parse_cache
+from fflogs.prefetch import prefetcher
+from storage.users import users
+from storage.votes import vote_stores
+from storage.history import parse_history
+from monitoring.commands import InstrumentedCommandTree
+from monitoring.metrics import install_discord_ratelimit_hook
+from monitoring.http import start_metrics_server, stop_metrics_server
+from monitoring.stalls import stall_detector
+
+parser = argparse.ArgumentParser(description="Run the static bot.")
+parser.add_argument("--force-sync", action="store_true", help="Sync app commands even if they look unchanged.")
+parser.add_argument("--check-startup", action="store_true", help="Load everything without connecting, print startup timings and exit 1 if over budget.")
+args = parser.parse_args()
+startup_profiler.mark("imports")
 
-load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
-GUILD_ID = os.getenv("GUILD_ID")
 
-if not TOKEN:
+# Sharding: SHARD_COUNT shards in total (or SHARDED=1 to let Discord pick),
+# SHARD_IDS the ones this process runs when splitting shards across processes
+try:
+    shard_config = get_shard_config()
+except ShardConfigError as e:
+    sys.exit(f"❌ Invalid shard settings: {e}")
+SHARD_COUNT = shard_config.count
+SHARD_IDS = shard_config.ids
+SHARDED = shard_config.sharded
+
+if not TOKEN and not args.check_startup:
     raise ValueError("DISCORD_TOKEN not set in environment")
 
-if not GUILD_ID:
-    raise ValueError("GUILD_ID not set in environment")
+guild_config = get_guild_config()
+if not guild_config.ids and not args.check_startup:
+    raise ValueError("GUILD_ID not set in environment (or GUILD_IDS / guilds.json for several guilds)")
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
 log = logging.getLogger(__name__)
 
-intents = discord.Intents.default()
-client = commands.Bot(command_prefix="!", intents=intents)
+class StaticBot(commands.AutoShardedBot if SHARDED else commands.Bot):
+    async def setup_hook(self):
+        with startup_profiler.phase("setup_hook"):
+            await self._setup()
 
-guild = discord.Object(id=int(GUILD_ID))
+    async def _setup(self):
+        # Open the user store (and migrate users.json) before the first command needs it
+        await asyncio.to_thread(users.count)
+        await asyncio.to_thread(parse_history.load)
+        await parse_cache.load_snapshot()
+        catalog = get_catalog()
+        log.info(f"📚 Encounter catalog: {len(catalog.zone_of)} encounters in {len(catalog.encounters_by_zone)} zones")
+        install_discord_ratelimit_hook()
+        stall_detector.start()
+        await start_metrics_server()
+
+        # setup_hook runs once per process, unlike on_ready which repeats on reconnect
+        await self.load_all_extensions()
+
+        # Each shard process looks after its own guilds' commands and members
+        served = guild_config.served_by(SHARD_IDS, SHARD_COUNT)
+        prefetcher.guild_ids = served
+
+        log.info(f"📦 Attempting to sync commands for {len(served)} guild(s)...")
+        for guild_id in served:
+            try:
+                synced = await sync_if_changed(self.tree, discord.Object(id=guild_id), force=args.force_sync)
+                if synced is not None:
+                    log.info(f"✅ Synced {len(synced)} command(s) to guild {guild_id}")
+                    for cmd in synced:
+                        log.info(f"  • /{cmd.name} — {cmd.description}")
+            except Exception as e:
+                log.warning(f"⚠️ Failed to sync commands for guild {guild_id}: {e}")
+
+    async def load_all_extensions(self):
+        with startup_profiler.phase("extensions"):
+            startup_profiler.record_extensions(await load_extensions(self))
+
+    async def close(self):
+        await prefetcher.stop()
+        await vote_stores.flush()
+        await parse_history.close()
+        try:
+            await parse_cache.flush()
+            await parse_cache.save_snapshot(force=True)
+        except Exception as e:
+            log.warning(f"⚠️ Failed to save parse cache: {e}")
+        await close_session()
+        await stop_metrics_server()
+        stall_detector.stop()
+        await super().close()
+
+intents = discord.Intents.default()
+client = StaticBot(command_prefix="!", intents=intents, tree_cls=InstrumentedCommandTree, **shard_config.options())
 
 @client.event
 async def on_ready():
-    log.info(f"READY | {client.user} is online.")
-
-    await load_commands(client)
-    load_events(client)
-
-    log.info("📦 Attempting to sync commands...")
-    try:
-        synced = await client.tree.sync(guild=guild)
-        log.info(f"✅ Synced {len(synced)} command(s) to guild {GUILD_ID}")
-        for cmd in synced:
-            log.info(f"  • /{cmd.name} — {cmd.description}")
-    except Exception as e:
-        log.warning(f"⚠️ Failed to sync commands: {e}")
+    shards = f" (shards {SHARD_IDS or 'all'} of {client.shard_count})" if SHARDED else ""
+    log.info(f"READY | {client.user} is online{shards}.")
+    if "ready" not in startup_profiler.marks:
+        startup_profiler.finish()
+        log.info(f"🚀 {startup_profiler.summary()}")
+        for problem in startup_profiler.problems():
+            log.error(f"❌ {problem}")
+    prefetcher.start()
+
+async def check_startup() -> int:
+    await client.load_all_extensions()
+    startup_profiler.finish()
+    print(startup_profiler.report())
+    problems = startup_profiler.problems()
+    for problem in problems:
+        log.error(f"❌ {problem}")
+    if not problems:
+        log.info(f"✅ Startup within budget ({startup_profiler.local_seconds:.2f}s of {startup_profiler.budget:.2f}s)")
+    return 1 if problems else 0
+
+if args.check_startup:
+    sys.exit(asyncio.run(check_startup()))
 
 # Run the bot
 client.run(TOKEN)
@@ -0,0 +1,49 @@
+import time
+import discord
+from discord import app_commands
+
+from monitoring.metrics import metrics
+
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Stamps each interaction so command latency can be measured."""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        mark_completed(interaction, failed=True)
+        await super().on_error(interaction, error)
+
+
+def _command_name(interaction: discord.Interaction) -> str:
+    return interaction.command.qualified_name if interaction.command else "unknown"
+
+
+def mark_deferred(interaction: discord.Interaction):
+    """Call right after ``interaction.response.defer()``."""
+    started_at = interaction.extras.get("started_at")
+    if started_at is not None:
+        metrics.observe("command_defer_seconds", time.perf_counter() - started_at, command=_command_name(interaction))
+
+
+def mark_followup(interaction: discord.Interaction):
+    """Call when the first followup (the user's answer) has been sent, for commands that keep working after it."""
+    started_at = interaction.extras.get("started_at")
+    if started_at is None or "followup_at" in interaction.extras:
+        return
+    interaction.extras["followup_at"] = time.perf_counter()
+    metrics.observe("command_followup_seconds", interaction.extras["followup_at"] - started_at, command=_command_name(interaction))
+
+
+def mark_completed(interaction: discord.Interaction, failed: bool = False):
+    started_at = interaction.extras.get("started_at")
+    if started_at is None:
+        return
+    command = _command_name(interaction)
+    # Most commands answer with their last followup; streaming ones marked their first one already
+    mark_followup(interaction)
+    metrics.observe("command_completed_seconds", time.perf_counter() - started_at, command=command)
+    if failed:
+        metrics.inc("command_failures_total", command=command)
@@ -0,0 +1,144 @@
+"""In-process metrics: latency histograms, counters and gauges.
+
+Everything is kept in memory and can be rendered in Prometheus text format
+(see monitoring/http.py) or summarised by the /botstats command.
+"""
+import re
+import time
+import bisect
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_ms(value: Optional[float]) -> str:
+    """A quantile from :meth:`Histogram.quantile` for display, e.g. in /botstats."""
+    if value is None:
+        return "–"
+    if value == float("inf"):
+        return f">{DEFAULT_BUCKETS[-1]:.0f}s"
+    return f"{value * 1000:.0f}ms"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self):
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Callable[[], Dict[Labels, float]]] = {}
+
+    def observe(self, name: str, value: float, **labels):
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        if key not in series:
+            series[key] = Histogram()
+        series[key].observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def gauge(self, name: str, read: Callable[[], Dict[str, float]], label: str = "kind"):
+        """Register a gauge whose values are read when metrics are rendered."""
+        self.gauges[name] = lambda: {((label, k),): v for k, v in read().items()}
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(name.removesuffix("_seconds") + "_failures_total", **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def series(self, name: str) -> Dict[Labels, Histogram]:
+        return self.histograms.get(name, {})
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+
+        def fmt(labels: Labels, extra: Labels = ()) -> str:
+            pairs = labels + extra
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        for name, series in sorted(self.histograms.items()):
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in series.items():
+                cumulative = 0
+                for bound, n in zip(hist.buckets + [float("inf")], hist.counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{fmt(labels, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{fmt(labels)} {hist.sum}")
+                lines.append(f"{name}_count{fmt(labels)} {hist.count}")
+
+        for name, series in sorted(self.counters.items()):
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{fmt(labels)} {value}")
+
+        for name, read in sorted(self.gauges.items()):
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in read().items():
+                lines.append(f"{name}{fmt(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class _DiscordRateLimitHandler(logging.Handler):
+    """Counts discord.py's own 429 retries, which it only reports via logging."""
+
+    RETRY = re.compile(r"[Rr]etrying in ([\d.]+) seconds")
+
+    def emit(self, record: logging.LogRecord):
+        match = self.RETRY.search(record.getMessage())
+        if match:
+            metrics.inc("discord_ratelimit_waits_total")
+            metrics.observe("discord_ratelimit_wait_seconds", float(match.group(1)))
+
+
+def install_discord_ratelimit_hook():
+    logger = logging.getLogger("discord.http")
+    if not any(isinstance(h, _DiscordRateLimitHandler) for h in logger.handlers):
+        logger.addHandler(_DiscordRateLimitHandler())
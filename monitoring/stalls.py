@@ -0,0 +1,173 @@
+"""Event-loop stall detector.
+
+A callback on the loop ticks every ``LOOP_WATCHDOG_INTERVAL`` seconds and
+records how late it ran (``event_loop_lag_seconds``). A watchdog thread
+notices when a tick is overdue by more than ``LOOP_STALL_THRESHOLD`` and
+grabs the loop thread's stack while it is still blocked, so each stall is
+attributed to the bot's own code that made the blocking call, e.g.
+``fflogs/utils.py:42 in execute`` inside ``requests/sessions.py``.
+
+Stalls are counted per location, logged, exported as metrics and shown by
+/diagnostics. Set LOOP_STALL_THRESHOLD=0 to turn the detector off.
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+from monitoring.metrics import metrics
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds
+STALL_THRESHOLD = float(os.getenv("LOOP_STALL_THRESHOLD", "0.25"))
+CHECK_INTERVAL = float(os.getenv("LOOP_WATCHDOG_INTERVAL", "0.05"))
+
+
+def _is_own_code(filename: str) -> bool:
+    return (
+        filename.startswith(BASE_DIR)
+        and "site-packages" not in filename
+        and os.sep + "venv" + os.sep not in filename
+        and filename != os.path.abspath(__file__)
+    )
+
+
+def _short(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if _is_own_code(filename):
+        filename = os.path.relpath(filename, BASE_DIR)
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+def attribute(stack: Optional[List[traceback.FrameSummary]]) -> Tuple[str, List[str], str]:
+    """``(location, own call chain, blocking frame)`` for a sampled stack.
+
+    The location is the innermost frame in the bot's own code, i.e. the call
+    site to move off the loop; the blocking frame is the innermost frame
+    overall (usually inside a library).
+    """
+    if not stack:
+        return "unknown (stall ended before it was sampled)", [], "?"
+    own = [frame for frame in stack if _is_own_code(frame.filename)]
+    blocking = _short(stack[-1])
+    if not own:
+        return blocking, [], blocking
+    return _short(own[-1]), [_short(frame) for frame in own], blocking
+
+
+class StallSite:
+    def __init__(self, location: str):
+        self.location = location
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_seen = 0.0
+        self.chain: List[str] = []
+        self.blocking = "?"
+
+    def record(self, lag: float, chain: List[str], blocking: str):
+        self.count += 1
+        self.total += lag
+        self.max = max(self.max, lag)
+        self.last_seen = time.time()
+        self.chain = chain
+        self.blocking = blocking
+
+
+class StallDetector:
+    def __init__(self, threshold: float = STALL_THRESHOLD, interval: float = CHECK_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.sites: Dict[str, StallSite] = {}
+        self.max_lag = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        # Written by the loop thread, read by the watchdog
+        self._last_tick = 0.0
+        self._expected = 0.0
+        self._sample: Optional[List[traceback.FrameSummary]] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running or self.threshold <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._schedule()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._thread.start()
+        print(f"[DEBUG] Event loop stall detector started (threshold {self.threshold * 1000:.0f}ms).")
+
+    def stop(self):
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._thread = None
+
+    def _schedule(self):
+        self._expected = time.monotonic() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._tick)
+
+    def _tick(self):
+        now = time.monotonic()
+        lag = max(0.0, now - self._expected)
+        self._last_tick = now
+        metrics.observe("event_loop_lag_seconds", lag)
+        if lag >= self.threshold:
+            with self._lock:
+                sample, self._sample = self._sample, None
+            self._record(lag, sample)
+        if not self._stopped.is_set():
+            self._schedule()
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            overdue = time.monotonic() - self._last_tick - self.interval
+            if overdue < self.threshold or self._sample is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            with self._lock:
+                if self._sample is None:
+                    self._sample = stack
+
+    def _record(self, lag: float, stack: Optional[List[traceback.FrameSummary]]):
+        location, chain, blocking = attribute(stack)
+        site = self.sites.get(location)
+        if site is None:
+            site = self.sites[location] = StallSite(location)
+        site.record(lag, chain, blocking)
+        self.max_lag = max(self.max_lag, lag)
+
+        metrics.inc("event_loop_stalls_total", location=location)
+        metrics.inc("event_loop_stall_seconds_total", lag, location=location)
+        print(f"[ERROR] Event loop blocked for {lag:.2f}s at {location} (inside {blocking})")
+        if chain:
+            print(f"[DEBUG]   call chain: {' -> '.join(chain)}")
+
+    def top(self, n: int = 10) -> List[StallSite]:
+        """Worst call sites first, by total time blocked."""
+        return sorted(self.sites.values(), key=lambda site: site.total, reverse=True)[:n]
+
+
+stall_detector = StallDetector()
@@ -0,0 +1,180 @@
+"""Startup profiler and budget.
+
+main.py imports this before anything else and starts it, so every import
+after that is timed (self time, i.e. excluding the modules it imported in
+turn). Phases are marked as startup goes on: imports done, extensions
+loaded, setup_hook done, ready. At ready the bot logs one summary line::
+
+    🚀 Ready in 2.41s · imports 0.31s (discord 0.17s, aiohttp 0.08s, …) · extensions 0.04s · setup_hook 0.52s · connect 1.50s
+
+Heavy FFLogs/GraphQL/NumPy machinery is imported on first use, not at
+startup. The budget catches regressions: local startup (imports plus
+extensions) over STARTUP_BUDGET seconds, or one of LAZY_MODULES loaded
+eagerly, logs an error at ready. ``python main.py --check-startup``
+performs the same check without connecting to Discord and exits non-zero,
+for CI and deploy scripts.
+"""
+import os
+import sys
+import time
+import threading
+import importlib.abc
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+STARTED_AT = time.perf_counter()
+
+# Seconds for imports plus extension loading, before any network
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "1.5"))
+# Only ever imported on first use; seeing one at startup means something imports it eagerly again
+LAZY_MODULES = ["gql", "graphql", "requests", "numpy"]
+
+
+class _ProfiledLoader(importlib.abc.Loader):
+    def __init__(self, loader, profiler: "ImportProfiler"):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hand the module its real loader back; only this first execution is timed
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(module.__name__, time.perf_counter() - start)
+
+
+class ImportProfiler(importlib.abc.MetaPathFinder):
+    """Times every module imported on the main thread while installed."""
+
+    def __init__(self):
+        # module -> (total seconds including its own imports, self seconds)
+        self.modules: Dict[str, Tuple[float, float]] = {}
+        self._children: List[float] = []
+        self._thread_id = threading.get_ident()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        if threading.get_ident() != self._thread_id:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _ProfiledLoader(spec.loader, self)
+                return spec
+        return None
+
+    def _enter(self):
+        self._children.append(0.0)
+
+    def _exit(self, name: str, elapsed: float):
+        children = self._children.pop()
+        if self._children:
+            self._children[-1] += elapsed
+        self.modules[name] = (elapsed, max(0.0, elapsed - children))
+
+    def by_package(self) -> List[Tuple[str, float]]:
+        """Self time summed per top-level package, slowest first."""
+        totals: Dict[str, float] = {}
+        for name, (_, self_time) in self.modules.items():
+            package = name.split(".", 1)[0]
+            totals[package] = totals.get(package, 0.0) + self_time
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def top(self, n: int = 15) -> List[Tuple[str, float, float]]:
+        ranked = sorted(self.modules.items(), key=lambda item: item[1][1], reverse=True)
+        return [(name, total, self_time) for name, (total, self_time) in ranked[:n]]
+
+
+class StartupProfiler:
+    def __init__(self, budget: float = STARTUP_BUDGET):
+        self.budget = budget
+        self.imports = ImportProfiler()
+        self.marks: Dict[str, float] = {}
+        self.phases: Dict[str, float] = {}
+        self.extensions: Dict[str, Dict[str, float]] = {}
+        self.eager: List[str] = []
+
+    def start(self):
+        self.imports.install()
+
+    def mark(self, name: str):
+        """Seconds since process start at which ``name`` happened."""
+        self.marks[name] = time.perf_counter() - STARTED_AT
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            self.mark(name)
+
+    def record_extensions(self, timings: Dict[str, Dict[str, float]]):
+        self.extensions.update(timings)
+        self.eager = [name for name in LAZY_MODULES if name in sys.modules]
+
+    def finish(self):
+        self.mark("ready")
+        self.imports.uninstall()
+
+    @property
+    def local_seconds(self) -> float:
+        """Imports plus extension loading: the part of startup that is ours, not Discord's."""
+        return self.marks.get("imports", 0.0) + self.phases.get("extensions", 0.0)
+
+    def problems(self) -> List[str]:
+        found = []
+        if self.budget > 0 and self.local_seconds > self.budget:
+            slowest = ", ".join(f"{name} {self_time:.2f}s" for name, _, self_time in self.imports.top(3))
+            found.append(f"Startup took {self.local_seconds:.2f}s, over the {self.budget:.2f}s budget (slowest imports: {slowest})")
+        if self.eager:
+            found.append(f"Loaded at startup but meant to be lazy: {', '.join(self.eager)}")
+        return found
+
+    def summary(self) -> str:
+        parts = []
+        if "ready" in self.marks:
+            parts.append(f"Ready in {self.marks['ready']:.2f}s")
+        packages = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.imports.by_package()[:4])
+        parts.append(f"imports {self.marks.get('imports', 0.0):.2f}s ({packages})")
+        for name in ("extensions", "setup_hook"):
+            if name in self.phases:
+                parts.append(f"{name} {self.phases[name]:.2f}s")
+        if "ready" in self.marks and "setup_hook" in self.marks:
+            parts.append(f"connect {self.marks['ready'] - self.marks['setup_hook']:.2f}s")
+        return " · ".join(parts)
+
+    def report(self, n: int = 15) -> str:
+        lines = [self.summary(), "", f"{'module':<48} {'self':>8} {'total':>8}"]
+        for name, total, self_time in self.imports.top(n):
+            lines.append(f"{name:<48} {self_time * 1000:>6.1f}ms {total * 1000:>6.1f}ms")
+        if self.extensions:
+            lines += ["", f"{'extension':<48} {'import':>8} {'setup':>8}"]
+            for name, timing in sorted(self.extensions.items(), key=lambda item: -sum(item[1].values())):
+                lines.append(f"{name:<48} {timing.get('import', 0) * 1000:>6.1f}ms {timing.get('setup', 0) * 1000:>6.1f}ms")
+        return "\n".join(lines)
+
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,360 @@
+"""Append-only history of every character's parses, for /progress.
+
+Each change to an encounter's percentile, kills or spec is one fixed-size
+binary record appended to data/parse_history.bin (one file per shard
+process when shards are split across processes)::
+
+    timestamp u32 | character_id u32 | encounter_id u32 | percentile f32 | kills u16 | spec u16
+
+Unchanged values are not written again, so the file only grows when
+someone's parses actually move. Spec names are stored once each in
+data/parse_history.specs and referenced by line number.
+
+At startup the file is scanned once, in chunks, to build a per-character
+index of record numbers and timestamps (appended in time order). Range
+queries bisect that index and read only the matching records from disk.
+New records are buffered and appended off the event loop, like votes.
+"""
+import os
+import time
+import array
+import atexit
+import asyncio
+import struct
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from handlers.shards import get_shard_config
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+# One file per bot process: processes sharing a host must not append to the same history.
+# Unset: data/parse_history.bin, or data/parse_history.<first shard id>.bin when shards are split across processes
+HISTORY_FILE = os.getenv("PARSE_HISTORY_FILE", "")
+
+# Seconds to gather new snapshots before appending them
+HISTORY_FLUSH_DELAY = float(os.getenv("HISTORY_FLUSH_DELAY", "5"))
+
+MAGIC = b"PHST"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+RECORD = struct.Struct("<IIIfHH")
+# Records read per chunk when indexing the file
+SCAN_CHUNK = 4096
+# Stored for "no percentile" (e.g. a clear without a ranked log)
+NO_PERCENTILE = -1.0
+MAX_KILLS = 0xFFFF
+
+
+def default_history_file() -> str:
+    shards = get_shard_config()
+    name = f"parse_history.{shards.ids[0]}.bin" if shards.split else "parse_history.bin"
+    return os.path.join(DATA_DIR, name)
+
+
+def _as_float32(value: float) -> float:
+    return struct.unpack("<f", struct.pack("<f", value))[0]
+
+
+class Snapshot:
+    def __init__(self, timestamp: int, character_id: int, encounter_id: int, percentile: Optional[float], kills: int, spec: str):
+        self.timestamp = timestamp
+        self.character_id = character_id
+        self.encounter_id = encounter_id
+        self.percentile = percentile
+        self.kills = kills
+        self.spec = spec
+
+
+class CharacterIndex:
+    """Record numbers and timestamps of one character's snapshots, oldest first."""
+
+    def __init__(self):
+        self.timestamps = array.array("I")
+        self.records = array.array("I")
+
+    def add(self, timestamp: int, record: int):
+        self.timestamps.append(timestamp)
+        self.records.append(record)
+
+    def between(self, since: int, until: int) -> array.array:
+        return self.records[bisect_left(self.timestamps, since):bisect_right(self.timestamps, until)]
+
+
+class ParseHistory:
+    def __init__(self, path: Optional[str] = None, flush_delay: float = HISTORY_FLUSH_DELAY):
+        self._path = path
+        self.flush_delay = flush_delay
+        self._index: Dict[int, CharacterIndex] = {}
+        # (character, encounter) -> last stored (percentile, kills, spec)
+        self._latest: Dict[Tuple[int, int], Tuple[float, int, int]] = {}
+        self._specs: List[str] = []
+        self._spec_ids: Dict[str, int] = {}
+        # Specs on disk; the rest of _specs still has to be appended
+        self._specs_written = 0
+        self._records = 0
+        self._flushed = 0
+        self._buffer = bytearray()
+        self._loaded = False
+        self._load_lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._pending: set = set()
+        atexit.register(self.flush_sync)
+
+    @property
+    def path(self) -> str:
+        # Resolved on first use, once .env and the shard settings are known
+        if self._path is None:
+            self._path = HISTORY_FILE or default_history_file()
+        return self._path
+
+    @property
+    def specs_path(self) -> str:
+        return os.path.splitext(self.path)[0] + ".specs"
+
+    @property
+    def records(self) -> int:
+        self._ensure_loaded()
+        return self._records
+
+    def load(self):
+        """Index the file; run once at startup (in a thread), or lazily on first use."""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if os.path.exists(self.specs_path):
+                with open(self.specs_path, "r", encoding="utf-8") as f:
+                    for line in f.read().splitlines():
+                        self._spec_ids[line] = len(self._specs)
+                        self._specs.append(line)
+                self._specs_written = len(self._specs)
+            if os.path.exists(self.path):
+                self._scan()
+            self._loaded = True
+
+    def _scan(self):
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER.size)
+            magic, version, record_size = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+                raise ValueError(f"{self.path} is not a version {VERSION} parse history file")
+
+            record = 0
+            while True:
+                chunk = f.read(RECORD.size * SCAN_CHUNK)
+                # A torn final record (crash mid-append) is ignored and overwritten
+                usable = len(chunk) - len(chunk) % RECORD.size
+                for timestamp, character_id, encounter_id, percentile, kills, spec in RECORD.iter_unpack(chunk[:usable]):
+                    self._index_record(record, timestamp, character_id, encounter_id, percentile, kills, spec)
+                    record += 1
+                if len(chunk) < RECORD.size * SCAN_CHUNK:
+                    break
+        self._records = self._flushed = record
+        print(f"[DEBUG] Indexed {record} parse history record(s) for {len(self._index)} character(s).")
+
+    def _index_record(self, record: int, timestamp: int, character_id: int, encounter_id: int, percentile: float, kills: int, spec: int):
+        index = self._index.get(character_id)
+        if index is None:
+            index = self._index[character_id] = CharacterIndex()
+        index.add(timestamp, record)
+        self._latest[(character_id, encounter_id)] = (percentile, kills, spec)
+
+    def _spec_id(self, spec: str) -> int:
+        spec_id = self._spec_ids.get(spec)
+        if spec_id is None:
+            spec_id = self._spec_ids[spec] = len(self._specs)
+            self._specs.append(spec)
+        return spec_id
+
+    def record(self, character_id: int, zone_data: Dict[int, dict], fetched_at: Optional[float] = None) -> int:
+        """Append a snapshot for every encounter whose values changed; returns how many."""
+        self._ensure_loaded()
+        timestamp = int(fetched_at or time.time())
+        index = self._index.get(character_id)
+        if index is not None and index.timestamps:
+            # Keep each character's records in time order so range queries can bisect
+            timestamp = max(timestamp, index.timestamps[-1])
+        appended = 0
+        for encounter_id, data in zone_data.items():
+            percentile = data.get("percentile")
+            spec = data.get("spec") or "Unknown"
+            values = (
+                _as_float32(percentile) if percentile is not None else NO_PERCENTILE,
+                min(int(data.get("kills") or 0), MAX_KILLS),
+                self._spec_ids.get(spec, -1)
+            )
+            key = (character_id, encounter_id)
+            if self._latest.get(key) == values:
+                continue
+            if key not in self._latest and values[0] == NO_PERCENTILE and values[1] == 0:
+                # Never cleared and never seen: nothing worth a record yet
+                continue
+            values = values[:2] + (self._spec_id(spec),)
+            self._buffer += RECORD.pack(timestamp, character_id, encounter_id, *values)
+            self._index_record(self._records, timestamp, character_id, encounter_id, *values)
+            self._records += 1
+            appended += 1
+        if appended:
+            self._schedule_flush()
+        return appended
+
+    def _snapshot(self, raw: Tuple[int, int, int, float, int, int]) -> Snapshot:
+        timestamp, character_id, encounter_id, percentile, kills, spec = raw
+        return Snapshot(
+            timestamp,
+            character_id,
+            encounter_id,
+            None if percentile == NO_PERCENTILE else percentile,
+            kills,
+            self._specs[spec] if spec < len(self._specs) else "Unknown"
+        )
+
+    def _read(self, records: Iterable[int]) -> List[Tuple]:
+        out = []
+        with open(self.path, "rb") as f:
+            for record in records:
+                f.seek(HEADER.size + record * RECORD.size)
+                out.append(RECORD.unpack(f.read(RECORD.size)))
+        return out
+
+    async def _load_records(self, records: Iterable[int]) -> List[Tuple]:
+        flushed = self._flushed
+        # Buffered records are read straight from memory, before a flush can move them
+        buffered = [
+            RECORD.unpack_from(self._buffer, (record - flushed) * RECORD.size)
+            for record in records if record >= flushed
+        ]
+        on_disk = [record for record in records if record < flushed]
+        return (await asyncio.to_thread(self._read, on_disk) if on_disk else []) + buffered
+
+    async def query(
+        self,
+        character_id: int,
+        since: Union[int, float] = 0,
+        until: Optional[Union[int, float]] = None,
+        encounter_ids: Optional[Iterable[int]] = None
+    ) -> List[Snapshot]:
+        """Snapshots for one character between ``since`` and ``until``, oldest first."""
+        self._ensure_loaded()
+        index = self._index.get(character_id)
+        if index is None:
+            return []
+        raw = await self._load_records(index.between(int(since), int(until if until is not None else time.time())))
+
+        encounter_ids = set(encounter_ids) if encounter_ids is not None else None
+        return [
+            self._snapshot(entry) for entry in raw
+            if encounter_ids is None or entry[2] in encounter_ids
+        ]
+
+    async def latest_before(self, character_id: int, timestamp: Union[int, float], encounter_ids: Iterable[int]) -> Dict[int, Snapshot]:
+        """Each encounter's last snapshot before ``timestamp``: the baseline for a range."""
+        self._ensure_loaded()
+        index = self._index.get(character_id)
+        wanted = set(encounter_ids)
+        found: Dict[int, Snapshot] = {}
+        if index is None:
+            return found
+        end = bisect_left(index.timestamps, int(timestamp))
+        # Walk backwards a chunk at a time until every encounter has a value
+        while end > 0 and len(found) < len(wanted):
+            start = max(0, end - SCAN_CHUNK // 16)
+            raw = await self._load_records(index.records[start:end])
+            for entry in reversed(raw):
+                if entry[2] in wanted and entry[2] not in found:
+                    found[entry[2]] = self._snapshot(entry)
+            end = start
+        return found
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (scripts): write straight away
+            self.flush_sync()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.flush_delay, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _append_specs(self, specs: List[str]):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.specs_path, "a", encoding="utf-8") as f:
+            f.write("".join(spec + "\n" for spec in specs))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append_records(self, data: bytes):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "ab") as f:
+            if new_file:
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            else:
+                # Drop a torn final record left by a crash
+                torn = (f.tell() - HEADER.size) % RECORD.size
+                if torn:
+                    f.truncate(f.tell() - torn)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _done(self, data: bytes):
+        del self._buffer[:len(data)]
+        self._flushed += len(data) // RECORD.size
+
+    async def flush(self):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            # Specs first, so every record on disk can be decoded; once written they're never appended again
+            specs = self._specs[self._specs_written:]
+            data = bytes(self._buffer)
+            try:
+                if specs:
+                    await asyncio.to_thread(self._append_specs, specs)
+                    self._specs_written += len(specs)
+                if data:
+                    await asyncio.to_thread(self._append_records, data)
+                    self._done(data)
+            except OSError as e:
+                print(f"[ERROR] Failed to append parse history: {e}")
+
+    def flush_sync(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        specs = self._specs[self._specs_written:]
+        data = bytes(self._buffer)
+        try:
+            if specs:
+                self._append_specs(specs)
+                self._specs_written += len(specs)
+            if data:
+                self._append_records(data)
+                self._done(data)
+        except OSError as e:
+            print(f"[ERROR] Failed to append parse history: {e}")
+
+    async def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.flush()
+
+
+parse_history = ParseHistory()
@@ -0,0 +1,229 @@
+"""Registered users, stored in SQLite (WAL mode) with an in-process read cache.
+
+Records look like the old users.json entries::
+
+    {"character_name", "server", "job", "fflogs", "character_id"}
+
+and are keyed by guild and Discord user ID, so each static has its own
+roster; ``users.guild(guild_id)`` gives one guild's view. The first time the
+repository opens, an existing data/users.json is imported into the default
+guild (see handlers/guilds.py) and renamed to users.json.migrated, and a
+database from before guild partitioning is moved to the default guild too.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from handlers.guilds import get_guild_config
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+USERS_DB = os.path.join(DATA_DIR, "users.db")
+USERS_FILE = os.path.join(DATA_DIR, "users.json")
+
+FIELDS = ("character_name", "server", "job", "fflogs", "character_id")
+
+CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS users (
+    guild_id       TEXT NOT NULL,
+    discord_id     TEXT NOT NULL,
+    character_id   INTEGER,
+    character_name TEXT NOT NULL,
+    server         TEXT NOT NULL,
+    job            TEXT NOT NULL,
+    fflogs         TEXT NOT NULL,
+    updated_at     REAL NOT NULL,
+    PRIMARY KEY (guild_id, discord_id)
+)
+"""
+CREATE_INDEX = "CREATE INDEX IF NOT EXISTS idx_users_character_id ON users (character_id)"
+
+
+class GuildUsers:
+    """One guild's registered users."""
+
+    def __init__(self, repository: "UserRepository", guild_id):
+        self._repository = repository
+        self.guild_id = str(guild_id)
+
+    def _records(self) -> Dict[str, dict]:
+        return self._repository._load().get(self.guild_id, {})
+
+    def get(self, discord_id) -> Optional[dict]:
+        record = self._records().get(str(discord_id))
+        return dict(record) if record else None
+
+    def all(self) -> Dict[str, dict]:
+        return {discord_id: dict(record) for discord_id, record in self._records().items()}
+
+    def __contains__(self, discord_id) -> bool:
+        return str(discord_id) in self._records()
+
+    def __len__(self) -> int:
+        return len(self._records())
+
+    def character_ids(self) -> List[int]:
+        return sorted({record["character_id"] for record in self._records().values() if record.get("character_id")})
+
+    def upsert(self, discord_id, record: dict):
+        self.upsert_many({str(discord_id): record})
+
+    def upsert_many(self, records: Dict[str, dict]):
+        """Insert or update several users in one transaction."""
+        self._repository.upsert_many(self.guild_id, records)
+
+
+class UserRepository:
+    def __init__(self, db_path: str = USERS_DB, json_path: str = USERS_FILE):
+        self.db_path = db_path
+        self.json_path = json_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # guild ID -> Discord ID -> record
+        self._cache: Optional[Dict[str, Dict[str, dict]]] = None
+        self._by_character: Dict[int, List[Tuple[str, str]]] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Shard processes on one host share the database
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._conn = conn
+            self._upgrade()
+            self._migrate_from_json()
+        return self._conn
+
+    @staticmethod
+    def _default_guild() -> str:
+        guild_id = get_guild_config().default_guild_id
+        if guild_id is None:
+            raise ValueError("No guild configured to own existing users; set GUILD_ID")
+        return str(guild_id)
+
+    def _upgrade(self):
+        columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(users)")]
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            if columns and "guild_id" not in columns:
+                # Table from before guild partitioning: its users belong to the default guild
+                guild_id = self._default_guild()
+                self._conn.execute("DROP INDEX IF EXISTS idx_users_character_id")
+                self._conn.execute("ALTER TABLE users RENAME TO users_v1")
+                self._conn.execute(CREATE_TABLE)
+                self._conn.execute("""
+                    INSERT INTO users (guild_id, discord_id, character_id, character_name, server, job, fflogs, updated_at)
+                    SELECT ?, discord_id, character_id, character_name, server, job, fflogs, updated_at FROM users_v1
+                """, (guild_id,))
+                self._conn.execute("DROP TABLE users_v1")
+                print(f"[DEBUG] Moved existing users in {self.db_path} to guild {guild_id}")
+            self._conn.execute(CREATE_TABLE)
+            self._conn.execute(CREATE_INDEX)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _migrate_from_json(self):
+        if not os.path.exists(self.json_path):
+            return
+        if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            return
+
+        with open(self.json_path, "r") as f:
+            raw = f.read().strip()
+        users = json.loads(raw) if raw else {}
+        guild_id = self._default_guild()
+        self._write(guild_id, users.items())
+        os.replace(self.json_path, self.json_path + ".migrated")
+        print(f"[DEBUG] Migrated {len(users)} user(s) from {self.json_path} to {self.db_path} (guild {guild_id})")
+
+    def _write(self, guild_id: str, records: Iterable[Tuple[str, dict]]):
+        now = time.time()
+        rows = [
+            (guild_id, str(discord_id), record.get("character_id"), record["character_name"],
+             record["server"], record["job"], record["fflogs"], now)
+            for discord_id, record in records
+        ]
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._conn.executemany("""
+                INSERT INTO users (guild_id, discord_id, character_id, character_name, server, job, fflogs, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (guild_id, discord_id) DO UPDATE SET
+                    character_id = excluded.character_id,
+                    character_name = excluded.character_name,
+                    server = excluded.server,
+                    job = excluded.job,
+                    fflogs = excluded.fflogs,
+                    updated_at = excluded.updated_at
+            """, rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    cache: Dict[str, Dict[str, dict]] = {}
+                    for row in self._connect().execute("SELECT * FROM users").fetchall():
+                        cache.setdefault(row["guild_id"], {})[row["discord_id"]] = {field: row[field] for field in FIELDS}
+                    self._set_cache(cache)
+        return self._cache
+
+    def _set_cache(self, cache: Dict[str, Dict[str, dict]]):
+        by_character: Dict[int, List[Tuple[str, str]]] = {}
+        for guild_id, records in cache.items():
+            for discord_id, record in records.items():
+                if record.get("character_id"):
+                    by_character.setdefault(record["character_id"], []).append((guild_id, discord_id))
+        self._by_character = by_character
+        self._cache = cache
+
+    def guild(self, guild_id) -> GuildUsers:
+        return GuildUsers(self, guild_id)
+
+    def guild_ids(self) -> List[str]:
+        return list(self._load())
+
+    def count(self) -> int:
+        return sum(len(records) for records in self._load().values())
+
+    def get_by_character_id(self, character_id: int) -> List[Tuple[str, str, dict]]:
+        """Every ``(guild_id, discord_id, record)`` registered with ``character_id``."""
+        cache = self._load()
+        return [(guild_id, discord_id, dict(cache[guild_id][discord_id])) for guild_id, discord_id in self._by_character.get(character_id, [])]
+
+    def character_ids(self, guild_ids: Optional[Iterable] = None) -> List[int]:
+        """Characters registered in ``guild_ids`` (default: every guild), each once."""
+        self._load()
+        if guild_ids is None:
+            return sorted(self._by_character)
+        wanted = {str(guild_id) for guild_id in guild_ids}
+        return sorted(cid for cid, owners in self._by_character.items() if any(guild_id in wanted for guild_id, _ in owners))
+
+    def upsert_many(self, guild_id, records: Dict[str, dict]):
+        """Insert or update several of ``guild_id``'s users in one transaction."""
+        guild_id = str(guild_id)
+        self._load()
+        with self._lock:
+            self._connect()
+            self._write(guild_id, records.items())
+            # Copy-on-write so readers on the event loop never see a dict mid-update
+            cache = dict(self._cache)
+            guild = dict(cache.get(guild_id, {}))
+            for discord_id, record in records.items():
+                guild[str(discord_id)] = {field: record.get(field) for field in FIELDS}
+            cache[guild_id] = guild
+            self._set_cache(cache)
+
+
+users = UserRepository()
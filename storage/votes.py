@@ -0,0 +1,124 @@
+"""Write-behind persistence for raid day votes, one file per guild.
+
+The default guild (see handlers/guilds.py) keeps data/saved_days.json from
+before multi-guild support; every other guild gets
+data/saved_days.<guild_id>.json.
+
+Vote buttons mutate the in-memory dict and call :meth:`VoteStore.mark_dirty`.
+The file is rewritten at most once per debounce window, off the event loop,
+atomically (temp file + rename). Pending votes are flushed on shutdown and,
+as a last resort, at interpreter exit.
+"""
+import os
+import json
+import atexit
+import asyncio
+from typing import Dict, List, Optional
+
+from handlers.guilds import get_guild_config
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+SAVED_DAYS_FILE = os.path.join(DATA_DIR, "saved_days.json")
+
+# Seconds to wait for more clicks before writing
+VOTE_FLUSH_DELAY = float(os.getenv("VOTE_FLUSH_DELAY", "2"))
+
+
+def write_atomic(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class VoteStore:
+    def __init__(self, path: str = SAVED_DAYS_FILE, flush_delay: float = VOTE_FLUSH_DELAY):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._data: Optional[Dict[str, List[str]]] = None
+        self._dirty = False
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._pending: set = set()
+        atexit.register(self.flush_sync)
+
+    def load(self, days: List[str]) -> Dict[str, List[str]]:
+        """Return the live vote dict, reading the file only the first time."""
+        if self._data is None:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    self._data = json.load(f)
+            else:
+                self._data = {day: [] for day in days}
+        return self._data
+
+    def mark_dirty(self):
+        self._dirty = True
+        if self._flush_handle is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(self.flush_delay, self._schedule_flush)
+
+    def _schedule_flush(self):
+        self._flush_handle = None
+        task = asyncio.create_task(self.flush())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _snapshot(self) -> Optional[str]:
+        if not self._dirty or self._data is None:
+            return None
+        self._dirty = False
+        # Voters may be held as lists, sets or ordered dicts in memory
+        return json.dumps({day: list(voters) for day, voters in self._data.items()}, indent=2)
+
+    async def flush(self):
+        """Write pending votes now, without blocking the event loop."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        async with self._flush_lock:
+            # Serialise on the loop so the snapshot is consistent, write in a thread
+            text = self._snapshot()
+            if text is None:
+                return
+            try:
+                await asyncio.to_thread(write_atomic, self.path, text)
+            except Exception as e:
+                self._dirty = True
+                print(f"[ERROR] Failed to save votes to {self.path}: {e}")
+
+    def flush_sync(self):
+        text = self._snapshot()
+        if text is not None:
+            write_atomic(self.path, text)
+
+
+class VoteStores:
+    """One :class:`VoteStore` per guild, created on first use."""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.data_dir = data_dir
+        self._stores: Dict[str, VoteStore] = {}
+
+    def path_for(self, guild_id) -> str:
+        if guild_id is None or int(guild_id) == get_guild_config().default_guild_id:
+            return os.path.join(self.data_dir, os.path.basename(SAVED_DAYS_FILE))
+        return os.path.join(self.data_dir, f"saved_days.{guild_id}.json")
+
+    def get(self, guild_id) -> VoteStore:
+        key = str(guild_id)
+        if key not in self._stores:
+            self._stores[key] = VoteStore(self.path_for(guild_id))
+        return self._stores[key]
+
+    async def flush(self):
+        for store in list(self._stores.values()):
+            await store.flush()
+
+
+vote_stores = VoteStores()
@@ -0,0 +1,44 @@
+import time
+import unittest
+from types import SimpleNamespace
+
+from monitoring import commands as command_metrics
+from monitoring.metrics import Metrics
+
+
+def interaction(name: str, started_ago: float = 0.0):
+    return SimpleNamespace(
+        command=SimpleNamespace(qualified_name=name),
+        extras={"started_at": time.perf_counter() - started_ago},
+    )
+
+
+class FollowupTimingTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+        original, command_metrics.metrics = command_metrics.metrics, self.metrics
+        self.addCleanup(setattr, command_metrics, "metrics", original)
+
+    def observed(self, name: str, command: str) -> float:
+        return self.metrics.series(name)[(("command", command),)].sum
+
+    def test_streaming_command_records_first_followup_not_completion(self):
+        streamed = interaction("whoami", started_ago=0.2)
+        command_metrics.mark_followup(streamed)
+        # The stream keeps editing the reply for a while after the answer went out
+        streamed.extras["started_at"] -= 5
+        command_metrics.mark_followup(streamed)
+        command_metrics.mark_completed(streamed)
+
+        self.assertLess(self.observed("command_followup_seconds", "whoami"), 1)
+        self.assertGreater(self.observed("command_completed_seconds", "whoami"), 5)
+        self.assertEqual(self.metrics.series("command_followup_seconds")[(("command", "whoami"),)].count, 1)
+
+    def test_one_shot_command_followup_is_its_completion(self):
+        command_metrics.mark_completed(interaction("register", started_ago=0.3))
+        self.assertGreaterEqual(self.observed("command_followup_seconds", "register"), 0.3)
+        self.assertGreaterEqual(self.observed("command_completed_seconds", "register"), 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
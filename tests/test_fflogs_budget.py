@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fflogs import prefetch
+from fflogs.budget import RateLimitBudget, BACKGROUND
+
+LIMITS = {"limitPerHour": 100, "pointsSpentThisHour": 0, "pointsResetIn": 3600}
+
+
+class SpendTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_spends_respect_the_reserve(self):
+        budget = RateLimitBudget(max_in_flight=1)
+        # 30 points left; background must keep 25 for interactive requests
+        budget.update(dict(LIMITS, pointsSpentThisHour=70))
+        started = []
+
+        async def request(n):
+            async with budget.spend(2, BACKGROUND):
+                started.append(n)
+                await asyncio.sleep(0)
+
+        tasks = [asyncio.create_task(request(n)) for n in range(5)]
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(started), 2)
+        self.assertGreaterEqual(budget.remaining, 25)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def test_cancelled_while_queued_is_refunded(self):
+        budget = RateLimitBudget(max_in_flight=1)
+        budget.update(LIMITS)
+        release = asyncio.Event()
+
+        async def hold():
+            async with budget.spend(1):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        self.assertEqual(budget.remaining, 98)
+
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        self.assertEqual(budget.remaining, 99)
+        release.set()
+        await holder
+
+
+class PrefetchBudgetTest(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_sync_skips_the_cycle(self):
+        budget = RateLimitBudget()
+
+        async def broken():
+            raise RuntimeError("FFLogs down")
+
+        with mock.patch.object(prefetch, "budget", budget), mock.patch.object(prefetch.fflogs, "get_rate_limit", broken):
+            self.assertFalse(await prefetch.prefetcher.wait_for_budget(10))
+            # Next tick: not due for a sync, but the budget is still unknown
+            self.assertFalse(await prefetch.prefetcher.wait_for_budget(10))
+
+
+if __name__ == "__main__":
+    unittest.main()
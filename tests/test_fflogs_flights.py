@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fflogs import client
+from fflogs.budget import RateLimitBudget, priority, BACKGROUND, INTERACTIVE
+
+
+class PriorityFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.posts = 0
+        self.release = asyncio.Event()
+
+        async def post(query, variables):
+            self.posts += 1
+            await self.release.wait()
+            return {"ok": self.posts}, []
+
+        self.budget = RateLimitBudget()
+        patches = [
+            mock.patch.object(client, "_post_query", post),
+            mock.patch.object(client, "budget", self.budget),
+            mock.patch.object(client, "validate_query", lambda query: None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        # Never due a rateLimitData sync: tests never reach the network
+        self.budget.synced_at = float("inf")
+
+    async def background(self, query):
+        with priority(BACKGROUND):
+            return await client.execute(query)
+
+    async def test_interactive_does_not_wait_behind_background_reserve(self):
+        # Near the reserve: background must wait for the reset, interactive may still spend
+        self.budget.update({"limitPerHour": 100, "pointsSpentThisHour": 80, "pointsResetIn": 3600})
+        waiting = asyncio.create_task(self.background("query { a }"))
+        await asyncio.sleep(0)
+
+        self.release.set()
+        with priority(INTERACTIVE):
+            result = await asyncio.wait_for(client.execute("query { a }"), timeout=1)
+        self.assertEqual(result, {"ok": 1})
+        waiting.cancel()
+
+    async def test_background_joins_interactive_flight(self):
+        with priority(INTERACTIVE):
+            first = asyncio.create_task(client.execute("query { b }"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(self.background("query { b }"))
+        await asyncio.sleep(0)
+
+        self.release.set()
+        self.assertEqual(await first, await second)
+        self.assertEqual(self.posts, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
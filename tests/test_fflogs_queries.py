@@ -0,0 +1,32 @@
+import unittest
+
+from fflogs.utils import build_zone_rankings_query, build_character_lookup_query
+
+
+class ZoneRankingsQueryTest(unittest.TestCase):
+    def test_query_text_depends_only_on_batch_shape(self):
+        query, variables = build_zone_rankings_query([101, 102], [62, None])
+        other, other_variables = build_zone_rankings_query([201, 202], [63, None])
+        self.assertEqual(query, other)
+        self.assertEqual(variables, {"z0": 62, "c0": 101, "c1": 102})
+        self.assertEqual(other_variables, {"z0": 63, "c0": 201, "c1": 202})
+        self.assertNotIn("101", query)
+
+    def test_latest_zone_takes_no_variable(self):
+        query, variables = build_zone_rankings_query([101], [None])
+        self.assertIn("z0: zoneRankings\n", query)
+        self.assertEqual(variables, {"c0": 101})
+
+
+
+class CharacterLookupQueryTest(unittest.TestCase):
+    def test_ids_and_names_go_in_variables(self):
+        query, variables = build_character_lookup_query([123, ("eu", "twintania", "Bench Raider")])
+        other, _ = build_character_lookup_query([456, ("na", "gilgamesh", "Someone Else")])
+        self.assertEqual(query, other)
+        self.assertEqual(variables, {"r0": 123, "n1": "Bench Raider", "s1": "twintania", "g1": "EU"})
+        self.assertNotIn("123", query)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from storage import history
+from storage.history import ParseHistory
+from handlers.shards import ShardConfig
+
+ZONE = {
+    101: {"percentile": 75.0, "kills": 2, "spec": "Sage"},
+    102: {"percentile": 40.0, "kills": 1, "spec": "Scholar"},
+}
+
+
+class FlushFailureTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "parse_history.bin")
+
+    def history(self) -> ParseHistory:
+        history = ParseHistory(self.path, flush_delay=60)
+        self.addCleanup(history.flush_sync)
+        return history
+
+    def read_specs(self):
+        with open(os.path.splitext(self.path)[0] + ".specs", encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    async def test_records_failure_after_specs_does_not_duplicate_specs(self):
+        history = self.history()
+        history.record(1, ZONE, fetched_at=1000)
+
+        with mock.patch.object(history, "_append_records", side_effect=OSError("disk full")):
+            await history.flush()
+        self.assertEqual(self.read_specs(), ["Sage", "Scholar"])
+
+        history.record(1, {103: {"percentile": 90.0, "kills": 1, "spec": "Sage"}}, fetched_at=2000)
+        await history.flush()
+        self.assertEqual(self.read_specs(), ["Sage", "Scholar"])
+
+        reloaded = ParseHistory(self.path)
+        snapshots = await reloaded.query(1, until=3000)
+        self.assertEqual([(s.encounter_id, s.spec) for s in snapshots], [(101, "Sage"), (102, "Scholar"), (103, "Sage")])
+
+    def test_flush_sync_retries_only_what_is_missing(self):
+        history = self.history()
+        with mock.patch.object(history, "_append_specs", side_effect=OSError("read-only")):
+            # No running loop: record() writes straight away
+            history.record(2, ZONE, fetched_at=1000)
+        self.assertFalse(os.path.exists(self.path))
+
+        history.flush_sync()
+        self.assertEqual(self.read_specs(), ["Sage", "Scholar"])
+        self.assertEqual(ParseHistory(self.path).records, 2)
+
+
+class DefaultPathTest(unittest.TestCase):
+    def path_for(self, shards: ShardConfig) -> str:
+        with mock.patch.object(history, "get_shard_config", lambda: shards), mock.patch.object(history, "HISTORY_FILE", ""):
+            return os.path.basename(ParseHistory().path)
+
+    def test_one_file_per_split_shard_process(self):
+        self.assertEqual(self.path_for(ShardConfig()), "parse_history.bin")
+        self.assertEqual(self.path_for(ShardConfig(auto=True)), "parse_history.bin")
+        self.assertEqual(self.path_for(ShardConfig(4, [2, 3])), "parse_history.2.bin")
+
+    def test_explicit_file_wins(self):
+        with mock.patch.object(history, "HISTORY_FILE", "/tmp/mine.bin"):
+            self.assertEqual(ParseHistory().path, "/tmp/mine.bin")
+
+
+if __name__ == "__main__":
+    unittest.main()
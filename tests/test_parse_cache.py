@@ -0,0 +1,116 @@
+import os
+import time
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from fflogs.cache import ParseCache, SharedParseStore
+from fflogs.prefetch import ParsePrefetcher, CURRENT_INTERVAL
+
+ZONE = {101: {"encounter_name": "Fight", "percentile": 50.0, "spec": "Sage", "kills": 1}}
+
+
+class SnapshotTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache = ParseCache(snapshot_file=os.path.join(self.tmp.name, "parse_cache.json"))
+
+    async def test_snapshot_only_written_when_changed(self):
+        with mock.patch.object(self.cache, "_write_snapshot", wraps=self.cache._write_snapshot) as write:
+            self.cache.put(1, 62, ZONE)
+            await self.cache.save_snapshot()
+            await self.cache.save_snapshot()
+            self.assertEqual(write.call_count, 1)
+
+            await self.cache.save_snapshot(force=True)
+            self.assertEqual(write.call_count, 2)
+
+        reloaded = ParseCache(snapshot_file=self.cache.snapshot_file)
+        self.assertIsNone(reloaded.get(1, 62))
+        await reloaded.load_snapshot()
+        self.assertEqual(reloaded.get(1, 62)[0], ZONE)
+
+    async def test_load_keeps_entries_put_since_startup(self):
+        self.cache.put(1, 62, ZONE, fetched_at=1000.0)
+        self.cache.put(2, 62, ZONE, fetched_at=1000.0)
+        await self.cache.save_snapshot()
+
+        newer = {101: dict(ZONE[101], percentile=90.0)}
+        reloaded = ParseCache(snapshot_file=self.cache.snapshot_file)
+        reloaded.put(1, 62, newer, fetched_at=2000.0)
+        await reloaded.load_snapshot()
+        self.assertEqual(reloaded.get(1, 62)[0], newer)
+        self.assertEqual(reloaded.get(2, 62)[0], ZONE)
+
+
+class AttemptsTest(unittest.TestCase):
+    def test_old_attempts_are_pruned(self):
+        prefetcher = ParsePrefetcher()
+        now = time.time()
+        prefetcher._attempted = {(1, 62): now, (2, 62): now - CURRENT_INTERVAL - 1}
+        prefetcher.prune_attempts()
+        self.assertEqual(list(prefetcher._attempted), [(1, 62)])
+
+
+class SharedStoreTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "parse_cache.db")
+
+    def store(self) -> SharedParseStore:
+        store = SharedParseStore(self.path, flush_delay=60)
+        self.addCleanup(store.flush_sync)
+        return store
+
+    async def test_writes_are_buffered_and_committed_in_a_thread(self):
+        writer, other = self.store(), self.store()
+        writer.put(1, 62, 1000.0, ZONE)
+        self.assertEqual(writer.get(1, 62), (1000.0, ZONE))
+        self.assertIsNone(other.get(1, 62))
+
+        with mock.patch("fflogs.cache.asyncio.to_thread", wraps=asyncio.to_thread) as to_thread:
+            await writer.flush()
+        to_thread.assert_called_once()
+        self.assertEqual(other.get(1, 62), (1000.0, ZONE))
+
+    async def test_put_after_invalidate_survives_the_flush(self):
+        store = self.store()
+        store.put(1, 62, 1000.0, ZONE)
+        await store.flush()
+        store.put(1, 65, 1000.0, ZONE)
+        store.invalidate(1)
+        store.put(1, 62, 2000.0, ZONE)
+        await store.flush()
+
+        fresh = self.store()
+        self.assertEqual(fresh.get(1, 62), (2000.0, ZONE))
+        self.assertIsNone(fresh.get(1, 65))
+
+    async def test_locked_file_is_skipped_instead_of_waited_on(self):
+        store = self.store()
+        store.put(1, 62, 1000.0, ZONE)
+        await store.flush()
+        cache = ParseCache(snapshot_file=os.path.join(self.tmp.name, "unused.json"), ttl=0, shared=store)
+        cache._entries[(1, 62)] = (500.0, ZONE)
+        # Another process takes the file exclusively (e.g. a checkpoint or a non-WAL tool)
+        store._conn.close()
+        store._conn = None
+        lock = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(lock.close)
+        lock.execute("PRAGMA locking_mode=EXCLUSIVE")
+        lock.execute("BEGIN EXCLUSIVE")
+
+        started = time.perf_counter()
+        self.assertEqual(cache.get(1, 62), (ZONE, False))
+        self.assertEqual(cache.get(1, 62), (ZONE, False))
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertGreater(store._skip_until, time.time())
+        lock.execute("ROLLBACK")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import unittest
+from unittest import mock
+
+from handlers.shards import ShardConfig, ShardConfigError
+
+
+def config(**env) -> ShardConfig:
+    clean = {key: value for key, value in os.environ.items() if key not in ("SHARD_COUNT", "SHARD_IDS", "SHARDED")}
+    with mock.patch.dict(os.environ, dict(clean, **env), clear=True):
+        return ShardConfig.from_env()
+
+
+class ShardConfigTest(unittest.TestCase):
+    def test_unsharded_by_default(self):
+        shards = config()
+        self.assertFalse(shards.sharded)
+        self.assertEqual(shards.options(), {})
+
+    def test_split_across_processes(self):
+        shards = config(SHARD_COUNT="4", SHARD_IDS="2, 3")
+        self.assertTrue(shards.split)
+        self.assertEqual(shards.options(), {"shard_count": 4, "shard_ids": [2, 3]})
+
+    def test_auto_sharded(self):
+        self.assertEqual(config(SHARDED="1").options(), {"shard_count": None, "shard_ids": None})
+
+    def test_invalid_settings(self):
+        for env in [
+            {"SHARD_IDS": "0,1"},
+            {"SHARDED": "1", "SHARD_IDS": "0"},
+            {"SHARD_COUNT": "4", "SHARD_IDS": "3,4"},
+            {"SHARD_COUNT": "four"},
+            {"SHARD_COUNT": "4", "SHARD_IDS": "a"},
+            {"SHARD_COUNT": "0"},
+        ]:
+            with self.subTest(env=env), self.assertRaises(ShardConfigError):
+                config(**env)
+
+
+if __name__ == "__main__":
+    unittest.main()
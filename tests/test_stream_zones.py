@@ -0,0 +1,37 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from fflogs import client
+
+DELAYS = {1: 0.0, 2: 0.05, 3: 0.5}
+
+
+class StreamZonesTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.finished = []
+
+        async def refresh(character_id, zone_ids, batched):
+            await asyncio.sleep(DELAYS[zone_ids[0]])
+            self.finished.append(zone_ids[0])
+            return {zone_id: {zone_id: {}} for zone_id in zone_ids}
+
+        patch = mock.patch.object(client, "refresh_parses", refresh)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    async def stream(self, deadline):
+        return [zone_id async for zone_id, data in client.stream_zones(7, [1, 2, 3], deadline=deadline, batched=False) if data]
+
+    async def test_zone_past_its_deadline_refreshes_in_the_background(self):
+        self.assertEqual(await self.stream(0.2), [1, 2])
+        self.assertEqual(self.finished, [1, 2])
+        await asyncio.sleep(0.4)
+        self.assertEqual(self.finished, [1, 2, 3])
+
+    async def test_no_deadline_waits_for_every_zone(self):
+        self.assertEqual(await self.stream(None), [1, 2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from storage.votes import VoteStores
+from commands.voteday import voteday
+from commands.voteday.voteday import VoteView, get_tally
+
+DAYS = ["Monday", "Tuesday", "Wednesday"]
+USERS = {
+    "1": {"character_name": "Alpha"},
+    "2": {"character_name": "Beta"},
+    "3": {"character_name": "Gamma"},
+}
+
+
+def click(view: VoteView, day: str, user_id: str):
+    button = next(item for item in view.children if item.label == day)
+    interaction = mock.MagicMock()
+    interaction.user.id = int(user_id)
+    interaction.response.defer = mock.AsyncMock()
+    interaction.edit_original_response = mock.AsyncMock()
+    interaction.message.channel.send = mock.AsyncMock()
+    return button.callback(interaction), interaction
+
+
+class TwoVoteViewsTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patches = [
+            mock.patch.object(voteday, "vote_stores", VoteStores(self.tmp.name)),
+            mock.patch.dict(voteday._tallies, clear=True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.tmp.cleanup)
+
+    def open_view(self) -> VoteView:
+        store = voteday.vote_stores.get(1234)
+        store.mark_dirty = mock.MagicMock()
+        return VoteView(DAYS, get_tally(1234, dict(USERS), DAYS), store.mark_dirty)
+
+    async def test_views_in_one_guild_share_a_tally(self):
+        first, second = self.open_view(), self.open_view()
+        self.assertIs(first.tally, second.tally)
+
+        for view, day, user_id in [(first, "Monday", "1"), (second, "Monday", "1"), (second, "Monday", "2"), (first, "Tuesday", "2")]:
+            callback, _ = click(view, day, user_id)
+            await callback
+
+        tally = first.tally
+        self.assertEqual(list(tally.vote_data["Monday"]), ["2"])
+        self.assertEqual(list(tally.vote_data["Tuesday"]), ["2"])
+        self.assertEqual(tally.not_voted, {"1", "3"})
+        self.assertIn(tally.leader, ["Monday", "Tuesday"])
+
+    async def test_last_vote_on_either_view_announces_once(self):
+        first, second = self.open_view(), self.open_view()
+        for view, user_id in [(first, "1"), (second, "2")]:
+            callback, _ = click(view, "Wednesday", user_id)
+            await callback
+        callback, interaction = click(second, "Wednesday", "3")
+        await callback
+
+        self.assertTrue(second.tally.all_voted)
+        self.assertEqual(second.tally.leader, "Wednesday")
+        interaction.message.channel.send.assert_awaited_once()
+
+    async def test_new_voteday_picks_up_new_members(self):
+        first = self.open_view()
+        callback, _ = click(first, "Monday", "1")
+        await callback
+
+        roster = dict(USERS, **{"4": {"character_name": "Delta"}})
+        tally = get_tally(1234, roster, DAYS)
+        self.assertIs(tally, first.tally)
+        self.assertEqual(tally.not_voted, {"2", "3", "4"})
+        self.assertEqual(tally.embed.fields[len(DAYS)].value.count("🔴"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()